@@ -1,13 +1,6 @@
 # -*- coding: utf-8 -*-
 """
-算法模块初始化
-自动导入所有算法模块，让装饰器注册生效
+算法模块包
+这里不导入算法模块：注册器按算法清单发现算法（见app.core.manifest），
+首次执行某个算法时才导入它所在的模块，装饰器在导入时完成注册
 """
-
-# 导入所有算法模块，让装饰器注册生效
-from . import hello_world
-from . import bubble_sort
-from . import stone_distribution
-
-# 这个文件的主要目的是确保所有算法模块被导入
-# 实际的算法注册通过装饰器完成
\ No newline at end of file
@@ -5,7 +5,9 @@
 import time
 from typing import List, Dict, Any
 from app.core.base_algorithm import BaseAlgorithm
+from app.core.exceptions import AlgorithmInputError
 from app.core.registry import algorithm_register
+from app.core.tracked_state import TrackedDict, TrackedList, TrackedState
 
 
 @algorithm_register(
@@ -14,11 +16,14 @@ from app.core.registry import algorithm_register
     category="排序算法", 
     description="通过重复遍历列表，比较相邻元素并交换它们来排序数组的简单排序算法",
     complexity_time="O(n²)",
-    complexity_space="O(1)"
+    complexity_space="O(1)",
+    deterministic=True
 )
 class BubbleSortAlgorithm(BaseAlgorithm):
     """冒泡排序算法类"""
     
+    key_actions = frozenset({"initialize", "pass_complete", "complete"})
+    
     def get_metadata(self):
         """获取算法元数据"""
         from app.models.algorithm import AlgorithmMetadata
@@ -78,55 +83,49 @@ class BubbleSortAlgorithm(BaseAlgorithm):
         
         # 验证输入
         if not isinstance(array, list) or len(array) < 2:
-            raise ValueError("数组必须是包含至少2个元素的列表")
+            raise AlgorithmInputError("数组必须是包含至少2个元素的列表")
         
         if not all(isinstance(x, (int, float)) for x in array):
-            raise ValueError("数组元素必须是数字")
+            raise AlgorithmInputError("数组元素必须是数字")
         
-        # 复制数组以避免修改原数组
-        arr = array.copy()
-        n = len(arr)
+        n = len(array)
         
-        # 性能指标
-        performance_metrics = {
-            "comparisons": 0,
-            "swaps": 0,
-            "iterations": 0,
-            "array_length": n
-        }
+        # 可追踪的状态：直接修改数组与计数，步骤快照由框架按需生成（原数组不被修改）
+        state = TrackedState(
+            array=TrackedList(array),
+            comparing=[],
+            swapping=[],
+            sorted=[],
+            current_pass=0,
+            total_passes=n - 1,
+            performance=TrackedDict({
+                "comparisons": 0,
+                "swaps": 0,
+                "iterations": 0,
+                "array_length": n
+            })
+        )
+        arr = state["array"]
+        performance_metrics = state["performance"]
         
         # 初始状态
         self.add_step(
             action="initialize",
-            data_snapshot={
-                "array": arr.copy(),
-                "comparing": [],
-                "swapping": [],
-                "sorted": [],
-                "current_pass": 0,
-                "total_passes": n - 1,
-                "performance": performance_metrics.copy()
-            },
+            data_snapshot=state,
             highlight=[],
-            description=f"初始化数组：{arr}"
+            description=f"初始化数组：{arr.tolist()}"
         )
         
         # 冒泡排序主循环
         for i in range(n):
-            performance_metrics["iterations"] += 1
+            performance_metrics.incr("iterations")
+            state["sorted"] = list(range(n - i, n))
+            state["current_pass"] = i + 1
             
             # 本轮开始
             self.add_step(
                 action="pass_start",
-                data_snapshot={
-                    "array": arr.copy(),
-                    "comparing": [],
-                    "swapping": [],
-                    "sorted": list(range(n - i, n)),
-                    "current_pass": i + 1,
-                    "total_passes": n - 1,
-                    "performance": performance_metrics.copy()
-                },
+                data_snapshot=state,
                 highlight=[],
                 description=f"开始第 {i + 1} 轮冒泡，目标：将最大值移到位置 {n - 1 - i}"
             )
@@ -135,82 +134,52 @@ class BubbleSortAlgorithm(BaseAlgorithm):
             
             # 内层循环：比较相邻元素
             for j in range(0, n - i - 1):
-                performance_metrics["comparisons"] += 1
+                performance_metrics.incr("comparisons")
                 
                 # 比较步骤
                 if show_comparisons:
+                    state["comparing"] = [j, j + 1]
                     self.add_step(
                         action="compare",
-                        data_snapshot={
-                            "array": arr.copy(),
-                            "comparing": [j, j + 1],
-                            "swapping": [],
-                            "sorted": list(range(n - i, n)),
-                            "current_pass": i + 1,
-                            "total_passes": n - 1,
-                            "comparison_result": ">" if arr[j] > arr[j + 1] else "<=",
-                            "performance": performance_metrics.copy()
-                        },
+                        data_snapshot=state.with_fields(comparison_result=">" if arr[j] > arr[j + 1] else "<="),
                         highlight=[j, j + 1],
                         description=f"比较 {arr[j]} 和 {arr[j + 1]}：{arr[j]} {'>' if arr[j] > arr[j + 1] else '<='} {arr[j + 1]}"
                     )
+                    state["comparing"] = []
                 
                 # 如果需要交换
                 if arr[j] > arr[j + 1]:
+                    state["swapping"] = [j, j + 1]
+                    
                     # 交换前的状态
                     if show_swaps:
                         self.add_step(
                             action="swap_start",
-                            data_snapshot={
-                                "array": arr.copy(),
-                                "comparing": [],
-                                "swapping": [j, j + 1],
-                                "sorted": list(range(n - i, n)),
-                                "current_pass": i + 1,
-                                "total_passes": n - 1,
-                                "swap_values": [arr[j], arr[j + 1]],
-                                "performance": performance_metrics.copy()
-                            },
+                            data_snapshot=state.with_fields(swap_values=[arr[j], arr[j + 1]]),
                             highlight=[j, j + 1],
                             description=f"需要交换：{arr[j]} 和 {arr[j + 1]}"
                         )
                     
                     # 执行交换
-                    arr[j], arr[j + 1] = arr[j + 1], arr[j]
+                    arr.swap(j, j + 1)
                     swapped = True
-                    performance_metrics["swaps"] += 1
+                    performance_metrics.incr("swaps")
                     
                     # 交换后的状态
                     if show_swaps:
                         self.add_step(
                             action="swap_complete",
-                            data_snapshot={
-                                "array": arr.copy(),
-                                "comparing": [],
-                                "swapping": [j, j + 1],
-                                "sorted": list(range(n - i, n)),
-                                "current_pass": i + 1,
-                                "total_passes": n - 1,
-                                "swap_values": [arr[j], arr[j + 1]],
-                                "performance": performance_metrics.copy()
-                            },
+                            data_snapshot=state.with_fields(swap_values=[arr[j], arr[j + 1]]),
                             highlight=[j, j + 1],
                             description=f"交换完成：位置 {j} 和 {j + 1}"
                         )
+                    state["swapping"] = []
             
             # 本轮结束，确定一个元素的最终位置
+            state["sorted"] = list(range(n - i - 1, n))
             self.add_step(
                 action="pass_complete",
-                data_snapshot={
-                    "array": arr.copy(),
-                    "comparing": [],
-                    "swapping": [],
-                    "sorted": list(range(n - i - 1, n)),
-                    "current_pass": i + 1,
-                    "total_passes": n - 1,
-                    "fixed_element": n - i - 1,
-                    "performance": performance_metrics.copy()
-                },
+                data_snapshot=state.with_fields(fixed_element=n - i - 1),
                 highlight=[n - i - 1],
                 description=f"第 {i + 1} 轮完成，元素 {arr[n - i - 1]} 已就位"
             )
@@ -220,24 +189,18 @@ class BubbleSortAlgorithm(BaseAlgorithm):
                 break
         
         # 排序完成
+        state["sorted"] = list(range(n))
+        state["current_pass"] = performance_metrics["iterations"]
         self.add_step(
             action="complete",
-            data_snapshot={
-                "array": arr.copy(),
-                "comparing": [],
-                "swapping": [],
-                "sorted": list(range(n)),
-                "current_pass": performance_metrics["iterations"],
-                "total_passes": n - 1,
-                "performance": performance_metrics.copy()
-            },
+            data_snapshot=state,
             highlight=list(range(n)),
-            description=f"排序完成！结果：{arr}"
+            description=f"排序完成！结果：{arr.tolist()}"
         )
         
         # 返回最终结果数据（会被create_result包装）
         return {
-            "sorted_array": arr,
+            "sorted_array": arr.tolist(),
             "original_array": array,
             "comparisons": performance_metrics["comparisons"],
             "swaps": performance_metrics["swaps"],
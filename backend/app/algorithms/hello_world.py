@@ -9,7 +9,8 @@ from app.models.algorithm import AlgorithmMetadata
     category="basic",
     description="最简单的算法示例：计算1+1并展示步骤",
     complexity_time="O(1)",
-    complexity_space="O(1)"
+    complexity_space="O(1)",
+    deterministic=True
 )
 class HelloWorldAlgorithm(BaseAlgorithm):
     """Hello World算法：展示1+1的计算过程"""
@@ -0,0 +1,130 @@
+"""
+石头分配问题的解缓存
+结果只取决于 (k_boxes, n_stones, p_parts)，缓存最少步数对应的移动序列，
+命中时直接按移动序列重建路径与步骤，无需重新搜索。
+内存中为LRU缓存，配置目录后同时写入SQLite，多个工作进程与预计算脚本共享
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.settings import settings
+
+CacheKey = Tuple[int, int, int]  # (k_boxes, n_stones, p_parts)
+
+DB_FILENAME = "stone_solutions.sqlite3"
+
+
+class SolutionCache:
+    """内存LRU + 可选SQLite的解缓存，值为实际格子坐标下的移动编码列表"""
+
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._memory: "OrderedDict[CacheKey, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                # WAL模式下多个工作进程可以同时读，写入时不阻塞读
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS stone_solutions ("
+                    "k_boxes INTEGER, n_stones INTEGER, p_parts INTEGER, "
+                    "min_steps INTEGER, moves TEXT, "
+                    "PRIMARY KEY (k_boxes, n_stones, p_parts))"
+                )
+
+    @property
+    def path(self) -> Optional[str]:
+        """SQLite文件路径，未配置目录时为None"""
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, DB_FILENAME)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接，退出时提交并关闭"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: CacheKey, moves: List[int]):
+        with self._lock:
+            self._memory[key] = moves
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, k_boxes: int, n_stones: int, p_parts: int) -> Optional[List[int]]:
+        """查询缓存的移动序列，未命中返回None"""
+        key = (k_boxes, n_stones, p_parts)
+        with self._lock:
+            moves = self._memory.get(key)
+            if moves is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return moves
+
+        if self.directory:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT moves FROM stone_solutions "
+                    "WHERE k_boxes = ? AND n_stones = ? AND p_parts = ?", key
+                ).fetchone()
+            if row is not None:
+                moves = json.loads(row[0])
+                self._remember(key, moves)
+                with self._lock:
+                    self.hits += 1
+                return moves
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, k_boxes: int, n_stones: int, p_parts: int, moves: List[int]):
+        """保存一个最优解的移动序列"""
+        key = (k_boxes, n_stones, p_parts)
+        self._remember(key, list(moves))
+        if self.directory:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO stone_solutions VALUES (?, ?, ?, ?, ?)",
+                    key + (len(moves), json.dumps(list(moves)))
+                )
+
+    def stored_keys(self) -> Iterator[CacheKey]:
+        """磁盘中已保存的参数组合"""
+        if not self.directory:
+            return iter(list(self._memory))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT k_boxes, n_stones, p_parts FROM stone_solutions"
+            ).fetchall()
+        return iter([tuple(row) for row in rows])
+
+    def clear(self):
+        """清空内存缓存（磁盘数据保留）"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            return {"entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+
+# 全局解缓存实例
+stone_solution_cache = SolutionCache(
+    max_entries=settings.solution_cache_size,
+    directory=settings.solution_cache_dir or settings.shared_cache_dir
+)
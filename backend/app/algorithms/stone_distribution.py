@@ -3,11 +3,24 @@
 通过BFS找到将石头P等分到指定格子的最少步数
 """
 import time
-from typing import List, Dict, Any, Tuple, Set
-from collections import deque
+from typing import List, Dict, Any, Optional
 from app.core.base_algorithm import BaseAlgorithm
+from app.core.exceptions import AlgorithmInputError
 from app.core.registry import algorithm_register
 from app.models.algorithm import AlgorithmMetadata
+from app.algorithms.stone_search import (
+    SEARCH_BIDIRECTIONAL,
+    SEARCH_ENGINES,
+    DIRECTION_BACKWARD,
+    DEFAULT_MAX_STATES,
+    MIN_MAX_STATES,
+    MAX_MAX_STATES,
+    SearchResult,
+    path_to_moves,
+    replay_moves,
+    solve
+)
+from app.algorithms.stone_cache import stone_solution_cache
 
 
 @algorithm_register(
@@ -16,11 +29,18 @@ from app.models.algorithm import AlgorithmMetadata
     category="数学优化",
     description="通过最少步数将K个格子中的N个石头P等分到指定格子中",
     complexity_time="O(状态数 × 转移数)",
-    complexity_space="O(状态数)"
+    complexity_space="O(状态数)",
+    executor="process",
+    deterministic=True,
+    time_limit=60.0,
+    memory_limit_mb=1024
 )
 class StoneDistributionAlgorithm(BaseAlgorithm):
     """石头分配算法类"""
     
+    # 搜索进度步骤可被采样丢弃，解的每一步移动始终保留
+    key_actions = frozenset({"initialize", "move", "complete", "no_solution"})
+    
     def get_metadata(self) -> AlgorithmMetadata:
         """获取算法元数据"""
         return AlgorithmMetadata(
@@ -59,6 +79,24 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
                     "default": 3,
                     "description": "等分数量P"
                 },
+                "search_mode": {
+                    "type": "string",
+                    "enum": list(SEARCH_ENGINES),
+                    "default": SEARCH_BIDIRECTIONAL,
+                    "description": "搜索方式：bfs前向广度优先，bidirectional双向BFS，astar启发式A*"
+                },
+                "max_states": {
+                    "type": "integer",
+                    "minimum": MIN_MAX_STATES,
+                    "maximum": MAX_MAX_STATES,
+                    "default": DEFAULT_MAX_STATES,
+                    "description": "最多探索的状态数"
+                },
+                "use_cache": {
+                    "type": "boolean",
+                    "default": True,
+                    "description": "使用已缓存的最优解，命中时不再搜索"
+                },
             },
             "required": ["k_boxes", "n_stones", "p_parts"]
         }
@@ -72,15 +110,24 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
         k_boxes = config.get("k_boxes", 9)
         n_stones = config.get("n_stones", 90)
         p_parts = config.get("p_parts", 3)
+        search_mode = config.get("search_mode", SEARCH_BIDIRECTIONAL)
+        max_states = config.get("max_states", DEFAULT_MAX_STATES)
+        use_cache = config.get("use_cache", True)
         initial_box = 0  # 始终从第0个格子开始
         
         # 验证输入
         if n_stones % p_parts != 0:
-            raise ValueError(f"石头数量{n_stones}无法{p_parts}等分")
+            raise AlgorithmInputError(f"石头数量{n_stones}无法{p_parts}等分")
         
         if p_parts > k_boxes:
-            raise ValueError(f"等分数{p_parts}不能大于格子数{k_boxes}")
+            raise AlgorithmInputError(f"等分数{p_parts}不能大于格子数{k_boxes}")
+        
+        if search_mode not in SEARCH_ENGINES:
+            raise AlgorithmInputError(f"未知的搜索模式: {search_mode}")
         
+        if not isinstance(max_states, int) or isinstance(max_states, bool):
+            raise AlgorithmInputError("max_states必须是整数")
+        max_states = max(MIN_MAX_STATES, min(max_states, MAX_MAX_STATES))
         
         target_stones_per_part = n_stones // p_parts
         
@@ -107,16 +154,23 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
             description=f"初始状态: 格子{initial_box}有{n_stones}个石头，目标: 前{p_parts}个格子各有{target_stones_per_part}个石头"
         )
         
-        # BFS搜索最优解
-        result = self._bfs_solve(initial_state, target_state, k_boxes)
+        # 优先使用缓存的最优解，未命中时搜索
+        search = None
+        if use_cache:
+            search = self._cached_solve(initial_state, k_boxes, n_stones, p_parts, search_mode)
+        if search is None:
+            search = self._search_solve(initial_state, target_state, k_boxes, search_mode, max_states)
+            if use_cache and search.found:
+                stone_solution_cache.put(k_boxes, n_stones, p_parts, path_to_moves(search.path, k_boxes))
         
-        if result is None:
+        if not search.found:
             self.add_step(
                 action="no_solution",
                 data_snapshot={
                     "current_state": initial_state.copy(),
                     "target_state": target_state.copy(),
                     "step_count": -1,
+                    "states_explored": search.states_explored,
                     "message": "算法无解或搜索空间过大"
                 },
                 highlight=[],
@@ -127,19 +181,21 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
                 "path": [],
                 "initial_state": initial_state,
                 "target_state": target_state,
-                "message": "算法无解或搜索空间过大"
+                "message": "算法无解或搜索空间过大",
+                "search_stats": search.stats()
             }
         
-        steps, path = result
+        path = search.path
+        steps = len(path)
         
-        # 记录解的路径
+        # 记录解的路径（路径中每一步的状态都是独立的列表，目标状态不再修改，快照直接共享）
         for i, (action_type, from_box, to_box, amount, state) in enumerate(path):
             action_desc = "移动一半" if action_type == "half" else "移动全部"
             self.add_step(
                 action="move",
                 data_snapshot={
-                    "current_state": state.copy(),
-                    "target_state": target_state.copy(),
+                    "current_state": state,
+                    "target_state": target_state,
                     "step_count": i + 1,
                     "action_type": action_type,
                     "from_box": from_box,
@@ -153,10 +209,11 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
         self.add_step(
             action="complete",
             data_snapshot={
-                "current_state": path[-1][4].copy() if path else target_state.copy(),
-                "target_state": target_state.copy(),
+                "current_state": path[-1][4] if path else target_state,
+                "target_state": target_state,
                 "step_count": steps,
-                "solution_found": True
+                "solution_found": True,
+                "states_explored": search.states_explored
             },
             highlight=list(range(p_parts)),
             description=f"找到最优解！最少需要{steps}步完成{p_parts}等分"
@@ -169,81 +226,48 @@ class StoneDistributionAlgorithm(BaseAlgorithm):
             "target_state": target_state,
             "k_boxes": k_boxes,
             "n_stones": n_stones,
-            "p_parts": p_parts
+            "p_parts": p_parts,
+            "search_stats": search.stats()
         }
     
-    def _bfs_solve(self, initial_state: List[int], target_state: List[int], 
-                   k_boxes: int) -> Tuple[int, List]:
-        """使用BFS搜索最优解"""
-        
-        def state_to_tuple(state):
-            return tuple(state)
-        
-        def is_target(state):
-            return state == target_state
-        
-        def generate_moves(state):
-            """生成所有可能的移动"""
-            moves = []
-            for i in range(k_boxes):
-                if state[i] > 0:
-                    for j in range(k_boxes):
-                        if i != j:
-                            # 操作1: 移动一半石头
-                            if state[i] >= 2:
-                                half = state[i] // 2
-                                new_state = state.copy()
-                                new_state[i] -= half
-                                new_state[j] += half
-                                moves.append(("half", i, j, half, new_state))
-                            
-                            # 操作2: 移动全部石头
-                            all_stones = state[i]
-                            new_state = state.copy()
-                            new_state[i] = 0
-                            new_state[j] += all_stones
-                            moves.append(("all", i, j, all_stones, new_state))
-            return moves
-        
-        # BFS
-        queue = deque([(initial_state, 0, [])])  # (state, steps, path)
-        visited = {state_to_tuple(initial_state)}
-        states_explored = 0
-        
-        while queue and states_explored < 100000:  # 防止无限搜索
-            current_state, steps, path = queue.popleft()
-            states_explored += 1
-            
-            if is_target(current_state):
-                return steps, path
-            
-            
-            # 定期记录搜索进度
-            if states_explored % 1000 == 0:
-                self.add_step(
-                    action="searching",
-                    data_snapshot={
-                        "current_state": current_state.copy(),
-                        "target_state": target_state,
-                        "step_count": steps,
-                        "states_explored": states_explored,
-                        "queue_size": len(queue)
-                    },
-                    highlight=[],
-                    description=f"搜索中... 已探索{states_explored}个状态，当前步数{steps}"
-                )
-            
-            # 生成所有可能的下一步
-            for move in generate_moves(current_state):
-                action_type, from_box, to_box, amount, new_state = move
-                state_tuple = state_to_tuple(new_state)
-                
-                if state_tuple not in visited:
-                    visited.add(state_tuple)
-                    new_path = path + [move]
-                    queue.append((new_state, steps + 1, new_path))
-        
-        return None  # 未找到解
+    def _cached_solve(self, initial_state: List[int], k_boxes: int, n_stones: int,
+                      p_parts: int, search_mode: str) -> Optional[SearchResult]:
+        """从解缓存中读取移动序列并重建路径，未命中返回None"""
+        started = time.perf_counter()
+        moves = stone_solution_cache.get(k_boxes, n_stones, p_parts)
+        if moves is None:
+            return None
+        path = replay_moves(initial_state, moves, k_boxes)
+        return SearchResult(search_mode, path, 0, time.perf_counter() - started, cached=True)
+    
+    def _search_solve(self, initial_state: List[int], target_state: List[int],
+                      k_boxes: int, search_mode: str, max_states: int) -> SearchResult:
+        """使用指定的搜索引擎求解，并定期记录搜索进度"""
+        
+        def on_progress(current_state, steps, states_explored, queue_size, direction):
+            if self.cancel_token is not None:
+                self.cancel_token.report_progress(states_explored, queue_size)
+            # 逆向搜索时状态来自目标一侧，步数是距目标的步数
+            if direction == DIRECTION_BACKWARD:
+                progress = f"逆向搜索，距目标{steps}步"
+            else:
+                progress = f"当前步数{steps}"
+            self.add_step(
+                action="searching",
+                data_snapshot={
+                    "current_state": current_state.copy(),
+                    "target_state": target_state,
+                    "step_count": steps,
+                    "direction": direction,
+                    "states_explored": states_explored,
+                    "queue_size": queue_size
+                },
+                highlight=[],
+                description=f"搜索中... 已探索{states_explored}个状态，{progress}"
+            )
+        
+        return solve(search_mode, initial_state, target_state, k_boxes, max_states, on_progress,
+                     cancel_token=self.cancel_token)
 
 
 # 注册算法
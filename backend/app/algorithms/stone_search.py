@@ -0,0 +1,486 @@
+"""
+石头分配问题的搜索引擎
+提供前向BFS、双向BFS和A*三种搜索方式，均保证找到最少步数的解
+"""
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.cancellation import CancellationToken
+from app.core.exceptions import AlgorithmInputError
+
+SEARCH_BFS = "bfs"
+SEARCH_BIDIRECTIONAL = "bidirectional"
+SEARCH_ASTAR = "astar"
+
+DEFAULT_MAX_STATES = 100000  # 防止无限搜索
+MIN_MAX_STATES = 1000
+MAX_MAX_STATES = 100000  # 服务端强制的探索上限，请求中的max_states会被截断到此范围
+PROGRESS_INTERVAL = 1000  # 每探索多少个状态汇报一次进度
+CANCEL_CHECK_INTERVAL = 1024  # 每探索多少个状态检查一次取消与截止时间
+# 逆向"all"操作的前驱数量与石头数成正比，双向搜索额外限制保存的状态总数
+MAX_STORED_FACTOR = 10
+
+DIRECTION_FORWARD = "forward"
+DIRECTION_BACKWARD = "backward"
+
+# 进度回调: (当前状态, 当前步数, 已探索状态数, 队列大小, 搜索方向)
+# 逆向搜索时当前状态来自目标一侧，步数为距目标的步数；状态为规范化后的等价状态
+ProgressCallback = Callable[[List[int], int, int, int, str], None]
+
+
+MOVE_HALF = 0
+MOVE_ALL = 1
+MOVE_NAMES = ("half", "all")
+
+# 状态压缩：每个格子占9位（最多511个石头），k <= 20时一个状态就是一个整数，
+# 可以直接作为集合/字典的键，比元组更省内存、哈希也更快
+BITS_PER_BOX = 9
+BOX_MASK = (1 << BITS_PER_BOX) - 1
+# 父指针表的值把前驱状态和移动编码合并为一个整数：(前驱状态 << MOVE_BITS) | 移动编码
+MOVE_BITS = 10
+MOVE_MASK = (1 << MOVE_BITS) - 1
+
+
+def pack_state(state: List[int]) -> int:
+    """把状态列表压缩为整数"""
+    packed = 0
+    for i, stones in enumerate(state):
+        if stones > BOX_MASK:
+            raise AlgorithmInputError(f"单个格子最多容纳{BOX_MASK}个石头")
+        packed |= stones << (i * BITS_PER_BOX)
+    return packed
+
+
+def unpack_state(packed: int, k_boxes: int) -> List[int]:
+    """把压缩的整数还原为状态列表，只在输出步骤时使用"""
+    return [(packed >> (i * BITS_PER_BOX)) & BOX_MASK for i in range(k_boxes)]
+
+
+def _shifts(k_boxes: int) -> List[int]:
+    return [i * BITS_PER_BOX for i in range(k_boxes)]
+
+
+def symmetric_start(target_state: List[int]) -> int:
+    """目标状态末尾连续为0的格子可以互换，返回这一段的起始下标（没有时为k）
+
+    石头分配问题中即为下标 >= p_parts 的格子
+    """
+    start = len(target_state)
+    while start > 0 and target_state[start - 1] == 0:
+        start -= 1
+    return start
+
+
+def canonical_order(state: List[int], symmetric_from: int) -> List[int]:
+    """规范状态中每个位置对应的实际格子：可互换的格子按石头数从多到少排列"""
+    tail = sorted(range(symmetric_from, len(state)), key=lambda i: -state[i])
+    return list(range(symmetric_from)) + tail
+
+
+def canonicalize(state: int, k_boxes: int, symmetric_from: int) -> int:
+    """把可互换格子按石头数从多到少排序，所有等价的排列对应同一个规范状态"""
+    if k_boxes - symmetric_from < 2:
+        return state
+    shift = symmetric_from * BITS_PER_BOX
+    tail = state >> shift
+    values = []
+    while tail:
+        values.append(tail & BOX_MASK)
+        tail >>= BITS_PER_BOX
+    values.sort()
+    for stones in values:
+        tail = (tail << BITS_PER_BOX) | stones
+    return (state & ((1 << shift) - 1)) | (tail << shift)
+
+
+def _canonical_move(move: int, state: int, k_boxes: int, symmetric_from: int) -> int:
+    """把state坐标下的移动换算到state的规范状态坐标下"""
+    kind, from_box, to_box = decode_move(move, k_boxes)
+    order = canonical_order(unpack_state(state, k_boxes), symmetric_from)
+    position = {box: index for index, box in enumerate(order)}
+    return encode_move(kind, position[from_box], position[to_box], k_boxes)
+
+
+def encode_move(kind: int, from_box: int, to_box: int, k_boxes: int) -> int:
+    """把一次移动编码为一个小整数，父指针表中每个状态只需保存一个移动记录"""
+    return (from_box * k_boxes + to_box) * 2 + kind
+
+
+def decode_move(move: int, k_boxes: int) -> Tuple[int, int, int]:
+    """解码移动，返回 (类型, 来源格子, 目标格子)"""
+    pair, kind = divmod(move, 2)
+    from_box, to_box = divmod(pair, k_boxes)
+    return kind, from_box, to_box
+
+
+def apply_move(state: List[int], move: int, k_boxes: int) -> Tuple[str, int, int, int, List[int]]:
+    """在state上执行一次移动，返回 (操作, 来源格子, 目标格子, 数量, 新状态)"""
+    kind, from_box, to_box = decode_move(move, k_boxes)
+    amount = state[from_box] // 2 if kind == MOVE_HALF else state[from_box]
+    new_state = state.copy()
+    new_state[from_box] -= amount
+    new_state[to_box] += amount
+    return MOVE_NAMES[kind], from_box, to_box, amount, new_state
+
+
+def forward_moves(state: int, k_boxes: int,
+                  symmetric_from: Optional[int] = None) -> List[Tuple[int, int]]:
+    """生成所有可能的移动，返回 (移动编码, 新状态)，状态均为压缩整数
+
+    移动a个石头从格子i到格子j就是 state - (a << shift_i) + (a << shift_j)。
+    给定symmetric_from时state应为规范状态：可互换格子中石头数相同的相邻格子只生成一次移动，
+    新状态也会规范化
+    """
+    if symmetric_from is None:
+        symmetric_from = k_boxes
+    shifts = _shifts(k_boxes)
+    boxes = [(state >> shift) & BOX_MASK for shift in shifts]
+    moves = []
+    for i, shift_i in enumerate(shifts):
+        stones = boxes[i]
+        if stones == 0:
+            continue
+        if i > symmetric_from and boxes[i - 1] == stones:
+            continue
+        half = stones >> 1
+        without_half = state - (half << shift_i)
+        without_all = state - (stones << shift_i)
+        touches_tail = i >= symmetric_from
+        base = i * k_boxes
+        for j, shift_j in enumerate(shifts):
+            if i == j:
+                continue
+            if j > symmetric_from and j - 1 != i and boxes[j - 1] == boxes[j]:
+                continue
+            code = (base + j) * 2
+            canonical = touches_tail or j >= symmetric_from
+            # 操作1: 移动一半石头
+            if half:
+                new_state = without_half + (half << shift_j)
+                if canonical:
+                    new_state = canonicalize(new_state, k_boxes, symmetric_from)
+                moves.append((code + MOVE_HALF, new_state))
+            # 操作2: 移动全部石头
+            new_state = without_all + (stones << shift_j)
+            if canonical:
+                new_state = canonicalize(new_state, k_boxes, symmetric_from)
+            moves.append((code + MOVE_ALL, new_state))
+    return moves
+
+
+def backward_moves(state: int, k_boxes: int) -> List[Tuple[int, int]]:
+    """生成所有能一步到达state的前驱状态，返回 (移动编码, 前驱状态)，状态均为压缩整数
+
+    half的逆操作: 移动后来源格子剩 a = ceil(x/2) 个，原有 x = 2a（移动a个）或 x = 2a-1（移动a-1个）
+    all的逆操作:  移动后来源格子为空，原有 m 个（1 <= m <= 目标格子现有数量）
+    前驱状态未规范化，移动编码是前驱自身坐标下的
+    """
+    shifts = _shifts(k_boxes)
+    boxes = [(state >> shift) & BOX_MASK for shift in shifts]
+    moves = []
+    for i, shift_i in enumerate(shifts):
+        remaining = boxes[i]
+        base = i * k_boxes
+        for j, shift_j in enumerate(shifts):
+            received = boxes[j]
+            if i == j or received == 0:
+                continue
+
+            if remaining > 0:
+                half = (base + j) * 2 + MOVE_HALF
+                # 原有2a个，移动了a个
+                if received >= remaining:
+                    moves.append((half, state + (remaining << shift_i) - (remaining << shift_j)))
+                # 原有2a-1个（至少2个），移动了a-1个
+                if remaining >= 2 and received >= remaining - 1:
+                    amount = remaining - 1
+                    moves.append((half, state + (amount << shift_i) - (amount << shift_j)))
+            else:
+                move_all = (base + j) * 2 + MOVE_ALL
+                one = (1 << shift_i) - (1 << shift_j)
+                prev_state = state
+                for _ in range(received):
+                    prev_state += one
+                    moves.append((move_all, prev_state))
+    return moves
+
+
+def heuristic(state: int, target_state: int, k_boxes: int) -> int:
+    """可采纳启发函数：每次移动最多改变两个格子，因此至少还需 ceil(不同格子数 / 2) 步"""
+    diff = state ^ target_state
+    mismatched = 0
+    while diff:
+        if diff & BOX_MASK:
+            mismatched += 1
+        diff >>= BITS_PER_BOX
+    return (mismatched + 1) // 2
+
+
+def _forward_moves_to(parents: Dict[int, Optional[int]], state: int) -> List[int]:
+    """沿前向父指针回溯到起点，返回按执行顺序排列的移动编码"""
+    moves = []
+    link = parents[state]
+    while link is not None:
+        moves.append(link & MOVE_MASK)
+        link = parents[link >> MOVE_BITS]
+    moves.reverse()
+    return moves
+
+
+def _backward_moves_from(parents: Dict[int, Optional[int]], state: int) -> List[int]:
+    """沿后向指针前进到目标，返回按执行顺序排列的移动编码"""
+    moves = []
+    link = parents[state]
+    while link is not None:
+        moves.append(link & MOVE_MASK)
+        link = parents[link >> MOVE_BITS]
+    return moves
+
+
+def _replay(initial_state: List[int], moves: List[int], k_boxes: int,
+            symmetric_from: int) -> List:
+    """从初始状态重放移动序列，只在找到解后重建一次完整路径
+
+    移动编码都是规范状态坐标下的，重放时按当前实际状态的规范顺序换算回实际格子
+    """
+    path = []
+    state = initial_state
+    for move in moves:
+        kind, from_box, to_box = decode_move(move, k_boxes)
+        order = canonical_order(state, symmetric_from)
+        step = apply_move(state, encode_move(kind, order[from_box], order[to_box], k_boxes), k_boxes)
+        path.append(step)
+        state = step[4]
+    return path
+
+
+def path_to_moves(path: List, k_boxes: int) -> List[int]:
+    """把路径 (操作, 来源格子, 目标格子, 数量, 状态) 转换为实际格子坐标下的移动编码"""
+    return [encode_move(MOVE_NAMES.index(action_type), from_box, to_box, k_boxes)
+            for action_type, from_box, to_box, _, _ in path]
+
+
+def replay_moves(initial_state: List[int], moves: List[int], k_boxes: int) -> List:
+    """按实际格子坐标下的移动编码重建路径，无需搜索"""
+    return _replay(initial_state, moves, k_boxes, k_boxes)
+
+
+def bfs_search(initial_state: List[int], target_state: List[int], k_boxes: int,
+               max_states: int, on_progress: Optional[ProgressCallback] = None,
+               symmetric_from: Optional[int] = None,
+               cancel_token: Optional[CancellationToken] = None):
+    """前向BFS，按层扩展，用父指针表代替在队列节点中携带路径"""
+    if symmetric_from is None:
+        symmetric_from = symmetric_start(target_state)
+    start = canonicalize(pack_state(initial_state), k_boxes, symmetric_from)
+    goal = canonicalize(pack_state(target_state), k_boxes, symmetric_from)
+    frontier = [start]  # 当前层的状态，层号即步数，无需为每个状态保存步数
+    parents = {start: None}  # 状态 -> (前驱状态 << MOVE_BITS) | 移动编码，同时作为visited集合
+    states_explored = 0
+    steps = 0
+
+    while frontier:
+        next_frontier = []
+        for index, current_state in enumerate(frontier):
+            if states_explored >= max_states:
+                return None, states_explored
+            states_explored += 1
+            if cancel_token is not None and states_explored % CANCEL_CHECK_INTERVAL == 0:
+                cancel_token.check()
+
+            if current_state == goal:
+                return _replay(initial_state, _forward_moves_to(parents, goal), k_boxes, symmetric_from), states_explored
+
+            # 定期记录搜索进度
+            if on_progress is not None and states_explored % PROGRESS_INTERVAL == 0:
+                on_progress(unpack_state(current_state, k_boxes), steps, states_explored,
+                            len(frontier) - index - 1 + len(next_frontier), DIRECTION_FORWARD)
+
+            # 生成所有可能的下一步
+            link = current_state << MOVE_BITS
+            for move, new_state in forward_moves(current_state, k_boxes, symmetric_from):
+                if new_state not in parents:
+                    parents[new_state] = link | move
+                    next_frontier.append(new_state)
+
+        frontier = next_frontier
+        steps += 1
+
+    return None, states_explored
+
+
+def bidirectional_search(initial_state: List[int], target_state: List[int], k_boxes: int,
+                         max_states: int, on_progress: Optional[ProgressCallback] = None,
+                         symmetric_from: Optional[int] = None,
+                         cancel_token: Optional[CancellationToken] = None):
+    """双向BFS：从初始状态正向、从目标状态逆向按层交替扩展，两侧相遇即得最短路径
+
+    每次扩展较小的一侧的完整一层；在此之前两侧没有交集，
+    因此第一次相遇时得到的路径长度就是最短步数。
+    探索数在每个状态扩展前检查，保存的状态总数在生成时检查，
+    单层很宽或逆向前驱很多时也不会超出限制
+    """
+    if symmetric_from is None:
+        symmetric_from = symmetric_start(target_state)
+    start = canonicalize(pack_state(initial_state), k_boxes, symmetric_from)
+    goal = canonicalize(pack_state(target_state), k_boxes, symmetric_from)
+    if start == goal:
+        return [], 1
+
+    forward_parents = {start: None}   # 状态 -> (前驱状态 << MOVE_BITS) | 移动编码
+    backward_parents = {goal: None}   # 状态 -> (后继状态 << MOVE_BITS) | 移动编码
+    forward_frontier, backward_frontier = [start], [goal]
+    depths = {DIRECTION_FORWARD: 0, DIRECTION_BACKWARD: 0}
+    max_stored = max_states * MAX_STORED_FACTOR
+    states_explored = 0
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            direction = DIRECTION_FORWARD
+            frontier, parents, others = forward_frontier, forward_parents, backward_parents
+        else:
+            direction = DIRECTION_BACKWARD
+            frontier, parents, others = backward_frontier, backward_parents, forward_parents
+        # 逆向生成的前驱未规范化，插入前规范化并换算移动编码
+        backward = direction == DIRECTION_BACKWARD
+
+        next_frontier = []
+        for state in frontier:
+            if states_explored >= max_states:
+                return None, states_explored
+            states_explored += 1
+            if cancel_token is not None and states_explored % CANCEL_CHECK_INTERVAL == 0:
+                cancel_token.check()
+            if on_progress is not None and states_explored % PROGRESS_INTERVAL == 0:
+                on_progress(unpack_state(state, k_boxes), depths[direction], states_explored,
+                            len(forward_frontier) + len(backward_frontier), direction)
+
+            link = state << MOVE_BITS
+            if backward:
+                moves = backward_moves(state, k_boxes)
+            else:
+                moves = forward_moves(state, k_boxes, symmetric_from)
+            for move, new_state in moves:
+                if backward:
+                    raw_state = new_state
+                    new_state = canonicalize(raw_state, k_boxes, symmetric_from)
+                if new_state in parents:
+                    continue
+                if len(parents) + len(others) >= max_stored:
+                    return None, states_explored
+                if backward and raw_state != new_state:
+                    # 逆向移动从前驱出发，换算到前驱规范状态的坐标下
+                    move = _canonical_move(move, raw_state, k_boxes, symmetric_from)
+                parents[new_state] = link | move
+                if new_state in others:
+                    solution = (_forward_moves_to(forward_parents, new_state) +
+                                _backward_moves_from(backward_parents, new_state))
+                    return _replay(initial_state, solution, k_boxes, symmetric_from), states_explored
+                next_frontier.append(new_state)
+
+        if direction == DIRECTION_FORWARD:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+        depths[direction] += 1
+
+    return None, states_explored
+
+
+def astar_search(initial_state: List[int], target_state: List[int], k_boxes: int,
+                 max_states: int, on_progress: Optional[ProgressCallback] = None,
+                 symmetric_from: Optional[int] = None,
+                 cancel_token: Optional[CancellationToken] = None):
+    """A*搜索：启发函数可采纳且一致，第一次弹出目标时即为最优解"""
+    if symmetric_from is None:
+        symmetric_from = symmetric_start(target_state)
+    start = canonicalize(pack_state(initial_state), k_boxes, symmetric_from)
+    goal = canonicalize(pack_state(target_state), k_boxes, symmetric_from)
+    counter = 0
+    # (f, -g, 序号, 状态)：f相同时优先扩展更深的节点
+    open_heap = [(heuristic(start, goal, k_boxes), 0, counter, start)]
+    best_steps = {start: 0}
+    parents = {start: None}  # 状态 -> (前驱状态 << MOVE_BITS) | 移动编码
+    closed = set()
+    states_explored = 0
+
+    while open_heap and states_explored < max_states:
+        _, neg_steps, _, state = heapq.heappop(open_heap)
+        if state in closed:
+            continue
+        closed.add(state)
+        states_explored += 1
+        steps = -neg_steps
+        if cancel_token is not None and states_explored % CANCEL_CHECK_INTERVAL == 0:
+            cancel_token.check()
+
+        if state == goal:
+            return _replay(initial_state, _forward_moves_to(parents, goal), k_boxes, symmetric_from), states_explored
+
+        if on_progress is not None and states_explored % PROGRESS_INTERVAL == 0:
+            on_progress(unpack_state(state, k_boxes), steps, states_explored,
+                        len(open_heap), DIRECTION_FORWARD)
+
+        link = state << MOVE_BITS
+        new_steps = steps + 1
+        for move, new_state in forward_moves(state, k_boxes, symmetric_from):
+            if new_state not in closed and new_steps < best_steps.get(new_state, new_steps + 1):
+                best_steps[new_state] = new_steps
+                parents[new_state] = link | move
+                counter += 1
+                heapq.heappush(open_heap, (
+                    new_steps + heuristic(new_state, goal, k_boxes), -new_steps, counter, new_state
+                ))
+
+    return None, states_explored
+
+
+SEARCH_ENGINES = {
+    SEARCH_BFS: bfs_search,
+    SEARCH_BIDIRECTIONAL: bidirectional_search,
+    SEARCH_ASTAR: astar_search,
+}
+
+
+class SearchResult:
+    """一次搜索的结果与统计"""
+
+    def __init__(self, mode: str, path: Optional[List], states_explored: int, wall_time: float,
+                 cached: bool = False):
+        self.mode = mode
+        self.path = path
+        self.states_explored = states_explored
+        self.wall_time = wall_time
+        self.cached = cached  # 路径来自解缓存，没有执行搜索
+
+    @property
+    def found(self) -> bool:
+        return self.path is not None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "search_mode": self.mode,
+            "states_explored": self.states_explored,
+            "wall_time": self.wall_time,
+            "cached": self.cached,
+        }
+
+
+def solve(mode: str, initial_state: List[int], target_state: List[int], k_boxes: int,
+          max_states: int = DEFAULT_MAX_STATES,
+          on_progress: Optional[ProgressCallback] = None,
+          symmetry: bool = True,
+          cancel_token: Optional[CancellationToken] = None) -> SearchResult:
+    """使用指定的搜索引擎求解，symmetry为True时合并可互换格子的等价状态
+
+    cancel_token: 每探索CANCEL_CHECK_INTERVAL个状态检查一次，已取消或超时时抛出异常
+    """
+    if mode not in SEARCH_ENGINES:
+        raise AlgorithmInputError(f"未知的搜索模式: {mode}")
+
+    started = time.perf_counter()
+    symmetric_from = symmetric_start(target_state) if symmetry else k_boxes
+    path, states_explored = SEARCH_ENGINES[mode](
+        initial_state, target_state, k_boxes, max_states, on_progress, symmetric_from, cancel_token
+    )
+    return SearchResult(mode, path, states_explored, time.perf_counter() - started)
@@ -1,24 +1,50 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+import asyncio
+import time
+from fastapi import APIRouter, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Dict, Any, Optional
+from app.api.execution import (
+    execution_http_error,
+    require_stepwise_trace,
+    run_until_disconnect,
+    wait_until_disconnect
+)
+from app.core.base_algorithm import BaseAlgorithm
+from app.core.cancellation import CancellationToken
+from app.core.executor import (
+    EXECUTOR_THREAD,
+    ExecutorBusy,
+    algorithm_executor,
+    execute_prepared,
+    execution_outcome,
+    prepare_algorithm
+)
+from app.core.metrics import coalesced_executions, observe_execution, result_cache_lookups
 from app.core.registry import algorithm_registry
+from app.core.result_cache import CachedResult, etag_matches, request_key, result_cache
+from app.core.serialization import dumps_json, encode, negotiate
+from app.core.single_flight import SingleFlight
+from app.core.streaming import StepStream, StreamClosed
 from app.models.algorithm import (
     AlgorithmListResponse, 
     AlgorithmExecuteRequest, 
+    BatchExecuteRequest,
     AlgorithmResult,
-    AlgorithmConfig
+    AlgorithmConfig,
+    AlgorithmMetadata
 )
 
 router = APIRouter()
 
+# 确定性算法进行中的执行：相同请求共享一次执行与序列化后的响应体
+execute_flights = SingleFlight()
+
 @router.get("/algorithms", response_model=AlgorithmListResponse)
 async def list_algorithms():
     """获取所有可用算法列表"""
     try:
-        algorithms = algorithm_registry.list_algorithms()
-        return AlgorithmListResponse(
-            algorithms=algorithms,
-            total=len(algorithms)
-        )
+        return _json_response(algorithm_registry.list_body())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,40 +52,238 @@ async def list_algorithms():
 async def get_algorithm_config(algorithm_name: str):
     """获取指定算法的配置模式"""
     try:
-        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
-        return AlgorithmConfig(
-            name=algorithm_name,
-            config_schema=algorithm.get_config_schema()
-        )
+        return _json_response(algorithm_registry.config_body(algorithm_name))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _json_response(body: bytes) -> Response:
+    """直接返回已序列化的JSON，跳过response_model的校验与序列化（模型仅用于生成API文档）"""
+    return Response(content=body, media_type="application/json")
+
 @router.post("/algorithms/{algorithm_name}/execute", response_model=AlgorithmResult)
-async def execute_algorithm(algorithm_name: str, request: AlgorithmExecuteRequest):
-    """执行指定算法"""
+async def execute_algorithm(algorithm_name: str, request: AlgorithmExecuteRequest, http_request: Request,
+                            if_none_match: Optional[str] = Header(None),
+                            accept: Optional[str] = Header(None)):
+    """执行指定算法
+    
+    结果直接编码为JSON字节返回（Accept为application/msgpack时返回MessagePack），
+    不经过response_model的校验；response_model仅用于生成API文档。
+    确定性算法的响应会被缓存：相同请求直接返回缓存的响应体，
+    If-None-Match与缓存的ETag一致时返回304；缓存未命中时相同请求的并发调用共享一次执行。
+    执行超过时间预算返回504，超过内存预算返回413，客户端断开时取消执行
+    （共享的执行在所有等待的客户端都断开后才取消）
+    """
+    media_type = negotiate(accept)
     try:
-        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
-        algorithm.reset_steps()
+        deterministic = algorithm_registry.get_options(algorithm_name).get("deterministic", False)
+        if not deterministic:
+            # 在执行池中运行，避免阻塞事件循环
+            result = await run_until_disconnect(http_request, algorithm_name, request)
+            body, media_type = encode(result, media_type)
+            return Response(content=body, media_type=media_type)
         
-        # 执行算法
-        final_result = algorithm.execute(request.data, request.config)
+        key = request_key(algorithm_name, request, media_type)
+        cached = await result_cache.get_async(key)
+        result_cache_lookups.inc(algorithm_name, "miss" if cached is None else "hit")
+        if cached is not None:
+            return _cached_response(cached, if_none_match, media_type)
         
-        # 返回结果
-        return algorithm.create_result(final_result)
+        async def execute():
+            result = await algorithm_executor.run(algorithm_name, request)
+            body, encoded_type = encode(result, media_type)
+            return await result_cache.put_async(key, body), encoded_type
         
+        (cached, media_type), shared = await wait_until_disconnect(
+            http_request, execute_flights.do(key, execute)
+        )
+        if shared:
+            coalesced_executions.inc(algorithm_name)
+        return _cached_response(cached, None, media_type)
+        
+    except Exception as e:
+        raise execution_http_error(e)
+
+def _cached_response(cached: CachedResult, if_none_match: Optional[str], media_type: str) -> Response:
+    """返回缓存的响应体，客户端已持有相同版本时返回304"""
+    headers = {"ETag": cached.etag, "Vary": "Accept"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=media_type, headers=headers)
+
+def _run_streaming(algorithm: BaseAlgorithm, request: AlgorithmExecuteRequest, stream: StepStream,
+                   token: CancellationToken):
+    """在工作线程中执行算法，步骤产生后立即写入流"""
+    name = algorithm.get_metadata().name
+    started = time.perf_counter()
+    try:
+        stream.put({
+            "type": "start",
+            "algorithm_name": name,
+            "trace_format": request.trace_format,
+            "keyframe_interval": request.keyframe_interval
+        })
+        prepare_algorithm(algorithm, request, token)
+        algorithm.set_step_sink(lambda step: stream.put({"type": "step", "step": step}))
+        
+        result = execute_prepared(algorithm, request)
+        stream.put({
+            "type": "result",
+            **{key: value for key, value in result.__dict__.items() if key not in ("steps", "trace")}
+        })
+        observe_execution(name, started, "ok", result.performance_metrics.get("step_count"))
+    except StreamClosed:
+        observe_execution(name, started, "cancelled")
+    except Exception as e:
+        observe_execution(name, started, execution_outcome(e))
+        try:
+            stream.put({"type": "error", "detail": f"Algorithm execution failed: {str(e)}"})
+        except StreamClosed:
+            pass
+    finally:
+        stream.finish()
+
+def _start_streaming(algorithm: BaseAlgorithm, request: AlgorithmExecuteRequest,
+                     token: CancellationToken) -> StepStream:
+    """创建步骤流并在线程池中启动算法（步骤回调无法跨进程，流式执行始终使用线程池）"""
+    stream = StepStream(asyncio.get_running_loop())
+    algorithm_executor.start(EXECUTOR_THREAD, _run_streaming, algorithm, request, stream, token)
+    return stream
+
+def _encode_line(message: Dict[str, Any]) -> bytes:
+    return dumps_json(message) + b"\n"
+
+@router.post("/algorithms/{algorithm_name}/execute/stream")
+async def execute_algorithm_stream(algorithm_name: str, request: AlgorithmExecuteRequest):
+    """流式执行指定算法，以NDJSON逐行返回步骤，最后一行为结果"""
+    require_stepwise_trace(request)
+    try:
+        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
+        token = algorithm_executor.create_token(algorithm_name, request)
+        algorithm_executor.check_capacity(EXECUTOR_THREAD)
+    except ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Algorithm execution failed: {str(e)}")
+    
+    async def body():
+        # 在响应体开始发送时才启动算法：客户端提前断开时不会占用执行池
+        try:
+            stream = _start_streaming(algorithm, request, token)
+        except ExecutorBusy as e:
+            yield _encode_line({"type": "error", "detail": str(e)})
+            return
+        try:
+            async for batch in stream.batches():
+                yield b"".join(_encode_line(message) for message in batch)
+        finally:
+            # 客户端断开时同时取消算法，不必等到下一次写入流
+            token.cancel()
+            stream.close()
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+def _batch_item_result(result: AlgorithmResult, include_steps: bool) -> Dict[str, Any]:
+    """批量执行中一项的结果，默认只包含最终结果与性能指标"""
+    item = {
+        "final_result": result.final_result,
+        "performance_metrics": result.performance_metrics,
+        "execution_time": result.execution_time
+    }
+    if include_steps:
+        item["steps"] = result.steps
+        item["trace"] = result.trace
+    return item
+
+@router.post("/algorithms/{algorithm_name}/execute/batch")
+async def execute_algorithm_batch(algorithm_name: str, batch: BatchExecuteRequest):
+    """批量执行：把多组输入分发到执行池，按完成顺序以NDJSON逐行返回每项结果，最后一行为汇总
+    
+    每项结果带有输入的index；单项失败不影响其他项，失败项的status为对应的HTTP状态码。
+    同时执行的项数不超过执行池的工作数，为其他请求保留排队位置
+    """
+    try:
+        mode = algorithm_registry.get_options(algorithm_name).get("executor", EXECUTOR_THREAD)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    workers = algorithm_executor.workers[mode]
+    concurrency = min(batch.concurrency or workers, workers)
+    
+    async def run_item(index: int, request: AlgorithmExecuteRequest, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                result = await algorithm_executor.run(algorithm_name, request, keep_steps=batch.include_steps)
+            except Exception as e:
+                error = execution_http_error(e)
+                return {"type": "item", "index": index, "status": error.status_code, "detail": error.detail}
+        return {"type": "item", "index": index, "status": 200,
+                "result": _batch_item_result(result, batch.include_steps)}
+    
+    async def body():
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.create_task(run_item(index, batch.item_request(item), semaphore))
+            for index, item in enumerate(batch.items)
+        ]
+        succeeded = 0
+        try:
+            for completed in asyncio.as_completed(tasks):
+                message = await completed
+                succeeded += message["status"] == 200
+                yield _encode_line(message)
+            yield _encode_line({
+                "type": "done",
+                "total": len(tasks),
+                "succeeded": succeeded,
+                "failed": len(tasks) - succeeded,
+                "wall_time": time.perf_counter() - started
+            })
+        finally:
+            # 客户端断开时取消未完成的项（执行中的项通过取消令牌停止）
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@router.websocket("/ws/algorithms/{algorithm_name}/stream")
+async def execute_algorithm_ws(websocket: WebSocket, algorithm_name: str):
+    """通过WebSocket流式执行算法：客户端发送一条执行请求，服务端逐条推送步骤与结果"""
+    await websocket.accept()
+    try:
+        request = AlgorithmExecuteRequest(**await websocket.receive_json())
+        require_stepwise_trace(request)
+        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
+        token = algorithm_executor.create_token(algorithm_name, request)
+        stream = _start_streaming(algorithm, request, token)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close()
+        return
+    except (ValueError, ValidationError, ExecutorBusy) as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close()
+        return
+    except WebSocketDisconnect:
+        return
+    
+    try:
+        async for batch in stream.batches():
+            for message in batch:
+                await websocket.send_text(dumps_json(message).decode("utf-8"))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        token.cancel()
+        stream.close()
 
-@router.get("/algorithms/{algorithm_name}/metadata")
+@router.get("/algorithms/{algorithm_name}/metadata", response_model=AlgorithmMetadata)
 async def get_algorithm_metadata(algorithm_name: str):
     """获取算法元数据"""
     try:
-        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
-        return algorithm.get_metadata()
+        return _json_response(algorithm_registry.metadata_body(algorithm_name))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
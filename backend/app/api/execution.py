@@ -0,0 +1,83 @@
+"""
+执行接口的公共逻辑
+把执行异常映射为HTTP错误，并在客户端断开时取消执行或停止等待共享的执行
+"""
+import asyncio
+from typing import Awaitable, TypeVar
+from fastapi import HTTPException, Request
+from app.core.cancellation import CancellationToken
+from app.core.exceptions import (
+    AlgorithmInputError,
+    ExecutionCancelled,
+    ExecutionTimeout,
+    MemoryBudgetExceeded
+)
+from app.core.executor import ExecutorBusy, algorithm_executor
+from app.core.trace import TRACE_FORMAT_COLUMNAR
+from app.models.algorithm import AlgorithmExecuteRequest, AlgorithmResult
+
+# 客户端已断开（沿用nginx的499），只出现在日志与指标中
+STATUS_CLIENT_CLOSED = 499
+
+T = TypeVar("T")
+
+def execution_http_error(error: Exception) -> HTTPException:
+    """把执行中抛出的异常映射为HTTP错误"""
+    if isinstance(error, ExecutorBusy):
+        return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+    if isinstance(error, AlgorithmInputError):
+        return HTTPException(status_code=400, detail=str(error))
+    if isinstance(error, ExecutionTimeout):
+        return HTTPException(status_code=504, detail=str(error))
+    if isinstance(error, MemoryBudgetExceeded):
+        return HTTPException(status_code=413, detail=str(error))
+    if isinstance(error, ExecutionCancelled):
+        return HTTPException(status_code=STATUS_CLIENT_CLOSED, detail=str(error))
+    if isinstance(error, ValueError):
+        return HTTPException(status_code=404, detail=str(error))
+    return HTTPException(status_code=500, detail=f"Algorithm execution failed: {str(error)}")
+
+def require_stepwise_trace(request: AlgorithmExecuteRequest):
+    """流式执行与服务端保存的运行逐步读取步骤，列式轨迹只能整体解码，不适用"""
+    if request.trace_format == TRACE_FORMAT_COLUMNAR:
+        raise HTTPException(status_code=400, detail="trace_format columnar只能用于一次性返回完整轨迹")
+
+async def _wait_disconnect(http_request: Request):
+    """请求体已读完，之后收到的消息只可能是http.disconnect"""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def _cancel_on_disconnect(http_request: Request, token: CancellationToken):
+    await _wait_disconnect(http_request)
+    token.cancel()
+
+async def run_until_disconnect(http_request: Request, algorithm_name: str,
+                               request: AlgorithmExecuteRequest) -> AlgorithmResult:
+    """执行算法，客户端在执行完成前断开时取消执行"""
+    token = algorithm_executor.create_token(algorithm_name, request)
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, token))
+    try:
+        return await algorithm_executor.run(algorithm_name, request, token)
+    finally:
+        watcher.cancel()
+
+async def wait_until_disconnect(http_request: Request, awaitable: Awaitable[T]) -> T:
+    """等待awaitable，客户端先断开时取消等待并抛出ExecutionCancelled
+
+    用于等待多个请求共享的执行：断开的请求只停止等待，执行由共享它的其他请求决定是否继续
+    """
+    waiter = asyncio.ensure_future(awaitable)
+    watcher = asyncio.create_task(_wait_disconnect(http_request))
+    try:
+        await asyncio.wait({waiter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        waiter.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not waiter.done():
+        waiter.cancel()
+        raise ExecutionCancelled("Client disconnected")
+    return waiter.result()
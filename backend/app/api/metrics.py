@@ -0,0 +1,48 @@
+"""
+指标接口
+以Prometheus文本格式输出请求、执行指标，以及执行池、结果缓存、运行存储与异步运行队列的当前状态
+"""
+from fastapi import APIRouter, Response
+from app.core.executor import algorithm_executor
+from app.core.jobs import job_queue
+from app.core.metrics import metrics_registry
+from app.core.result_cache import result_cache
+from app.core.run_store import run_store
+
+router = APIRouter()
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _executor_metrics():
+    stats = algorithm_executor.stats()
+    for key, documentation in (("workers", "Executor pool size"),
+                               ("pending", "Executions running or queued"),
+                               ("queued", "Executions waiting for a free worker")):
+        yield (f"executor_{key}", "gauge", documentation,
+               [({"pool": mode}, values[key]) for mode, values in stats.items()])
+
+def _result_cache_metrics():
+    stats = result_cache.stats()
+    yield "result_cache_entries", "gauge", "Cached execute responses", [({}, stats["entries"])]
+    yield "result_cache_hits_total", "counter", "Result cache hits", [({}, stats["hits"])]
+    yield "result_cache_misses_total", "counter", "Result cache misses", [({}, stats["misses"])]
+
+def _run_store_metrics():
+    stats = run_store.stats()
+    yield "run_store_runs", "gauge", "Runs kept in the run store", [({}, stats["runs"])]
+    yield "run_store_steps", "gauge", "Steps kept in the run store", [({}, stats["steps"])]
+
+def _job_metrics():
+    stats = job_queue.stats()
+    yield ("jobs", "gauge", "Asynchronous runs kept in the job queue",
+           [({"status": status}, count) for status, count in stats.items()])
+
+metrics_registry.add_collector(_executor_metrics)
+metrics_registry.add_collector(_result_cache_metrics)
+metrics_registry.add_collector(_run_store_metrics)
+metrics_registry.add_collector(_job_metrics)
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus格式的进程内指标"""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,148 @@
+"""
+运行结果接口
+执行结果保存在服务端，前端按窗口或单步随机读取步骤；
+POST /runs提交异步运行并立即返回运行ID，通过轮询或WebSocket获取进度与结果
+"""
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from app.api.execution import execution_http_error, require_stepwise_trace, run_until_disconnect
+from app.core.jobs import FINISHED_STATES, JOB_SUCCEEDED, job_queue
+from app.core.run_store import MAX_STEP_WINDOW, run_store
+from app.core.serialization import dumps_json
+from app.core.settings import settings
+from app.models.algorithm import (
+    AlgorithmExecuteRequest,
+    AlgorithmStep,
+    RunCreateRequest,
+    RunStatus,
+    RunSummary,
+    StepWindow
+)
+
+router = APIRouter()
+
+def _json_response(payload) -> Response:
+    return Response(content=dumps_json(payload), media_type="application/json")
+
+@router.post("/algorithms/{algorithm_name}/runs", response_model=RunSummary)
+async def create_run(algorithm_name: str, request: AlgorithmExecuteRequest, http_request: Request):
+    """执行算法并在服务端保存结果，返回运行概要（不含步骤）"""
+    require_stepwise_trace(request)
+    try:
+        result = await run_until_disconnect(http_request, algorithm_name, request)
+    except Exception as e:
+        raise execution_http_error(e)
+    
+    # 配置了共享存储时保存需要序列化整个结果，不在事件循环中进行
+    run = await run_in_threadpool(run_store.add, algorithm_name, result)
+    return _json_response(run.summary())
+
+@router.post("/runs", response_model=RunStatus, status_code=202)
+async def submit_run(request: RunCreateRequest):
+    """提交异步运行，立即返回运行ID与状态；确定性算法的相同请求返回已有的运行"""
+    require_stepwise_trace(request)
+    try:
+        job, deduplicated = await job_queue.submit(
+            request.algorithm_name, AlgorithmExecuteRequest(**request.dict(exclude={"algorithm_name"}))
+        )
+    except Exception as e:
+        raise execution_http_error(e)
+    
+    body = await job_queue.status(job.job_id)
+    body["deduplicated"] = deduplicated
+    return Response(content=dumps_json(body), status_code=202, media_type="application/json")
+
+async def _run_status(run_id: str):
+    """异步运行的状态，同步创建的运行视为已成功，都不存在时返回None"""
+    status = await job_queue.status(run_id)
+    if status is not None:
+        return status
+    try:
+        run = await run_in_threadpool(run_store.get, run_id)
+        return {**run.summary(), "status": JOB_SUCCEEDED}
+    except ValueError:
+        return None
+
+@router.get("/runs/{run_id}", response_model=RunStatus)
+async def get_run(run_id: str):
+    """获取运行状态：排队中与执行中时包含进度，完成后包含运行概要"""
+    status = await _run_status(run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    return _json_response(status)
+
+@router.websocket("/ws/runs/{run_id}")
+async def watch_run(websocket: WebSocket, run_id: str):
+    """订阅运行状态：状态或进度变化时推送，运行结束后推送最终状态并关闭"""
+    await websocket.accept()
+    sent = None
+    try:
+        while True:
+            status = await _run_status(run_id)
+            if status is None:
+                await websocket.send_json({"type": "error", "detail": f"Run {run_id} not found"})
+                break
+            message = dumps_json(status)
+            if message != sent:
+                await websocket.send_text(message.decode("utf-8"))
+                sent = message
+            if status["status"] in FINISHED_STATES:
+                break
+            await job_queue.wait(run_id, settings.job_progress_interval)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+async def _stored_run(run_id: str):
+    """已完成的运行，异步运行尚未成功时返回409；运行可能需要从共享存储读取并反序列化，在线程池中进行"""
+    try:
+        return await run_in_threadpool(run_store.get, run_id)
+    except ValueError as e:
+        status = await job_queue.status(run_id)
+        if status is not None and status["status"] != JOB_SUCCEEDED:
+            raise HTTPException(status_code=409, detail=f"Run {run_id} is {status['status']}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/runs/{run_id}/steps", response_model=StepWindow)
+async def get_run_steps(run_id: str,
+                        start: int = Query(0, alias="from", ge=0),
+                        stop: int = Query(None, alias="to", ge=0)):
+    """读取[from, to)范围内的步骤，单次最多返回MAX_STEP_WINDOW步"""
+    run = await _stored_run(run_id)
+    
+    if stop is None:
+        stop = start + MAX_STEP_WINDOW
+    if stop < start:
+        raise HTTPException(status_code=400, detail="to不能小于from")
+    stop = min(stop, start + MAX_STEP_WINDOW, run.step_count)
+    start = min(start, stop)
+    
+    return _json_response({
+        "run_id": run_id,
+        "start": start,
+        "stop": stop,
+        "total": run.step_count,
+        "steps": run.steps(start, stop),
+    })
+
+@router.get("/runs/{run_id}/steps/{index}", response_model=AlgorithmStep)
+async def get_run_step(run_id: str, index: int):
+    """随机读取单个步骤"""
+    run = await _stored_run(run_id)
+    
+    if index < 0 or index >= run.step_count:
+        raise HTTPException(status_code=404, detail=f"Step {index} out of range")
+    return _json_response(run.steps(index, index + 1)[0])
+
+@router.delete("/runs/{run_id}")
+async def delete_run(run_id: str):
+    """删除运行，释放服务端内存；异步运行尚未结束时同时取消，被多个相同请求复用时在最后一次删除时才删除"""
+    if not job_queue.release(run_id):
+        return {"run_id": run_id, "deleted": False}
+    cancelled = await job_queue.cancel(run_id)
+    try:
+        await run_in_threadpool(run_store.delete, run_id)
+    except ValueError as e:
+        if not cancelled:
+            raise HTTPException(status_code=404, detail=str(e))
+    return {"run_id": run_id, "deleted": True}
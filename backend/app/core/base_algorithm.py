@@ -1,16 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Union
 import time
 from datetime import datetime
-from app.models.algorithm import AlgorithmStep, AlgorithmResult, AlgorithmMetadata
+from app.models.algorithm import AlgorithmResult, AlgorithmMetadata
+from app.core.cancellation import CancellationToken
+from app.core.profiling import ExecutionProfiler
+from app.core.serialization import dumps_json
+from app.core.step_log import StepLog
+from app.core.tracked_state import StateView, TrackedState
+from app.core.trace import (
+    TRACE_FORMAT_FULL,
+    TRACE_FORMAT_DELTA,
+    TRACE_FORMAT_COLUMNAR,
+    DEFAULT_KEYFRAME_INTERVAL,
+    ColumnarTraceEncoder,
+    DeltaTraceEncoder
+)
 
 class BaseAlgorithm(ABC):
     """算法基类，所有算法实现都需要继承此类"""
     
+    # 关键步骤：步骤预算与采样不会丢弃这些动作
+    key_actions: FrozenSet[str] = frozenset({"initialize", "complete"})
+    
     def __init__(self):
-        self.steps: List[AlgorithmStep] = []
+        self.steps = StepLog()
         self.step_counter = 0
         self.start_time = 0.0
+        self.cpu_start_time = 0.0
+        self.profiler: Optional[ExecutionProfiler] = None
+        self.cancel_token: Optional[CancellationToken] = None
+        self.trace_encoder: Optional[Union[DeltaTraceEncoder, ColumnarTraceEncoder]] = None
+        self.step_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.max_steps: Optional[int] = None
+        self.sample_every = 1
+        self._reset_sampling()
         
     @abstractmethod
     def get_metadata(self) -> AlgorithmMetadata:
@@ -29,40 +53,191 @@ class BaseAlgorithm(ABC):
     
     def reset_steps(self):
         """重置步骤记录"""
-        self.steps = []
+        self.steps = StepLog()
         self.step_counter = 0
-        self.start_time = time.time()
+        self.restart_clock()
+        if self.trace_encoder is not None:
+            self.trace_encoder.reset()
+        if self.profiler is not None:
+            self.profiler = ExecutionProfiler()
+        self._reset_sampling()
+    
+    def _reset_sampling(self):
+        self.recorded_steps = 0
+        self._stride = self.sample_every
+        self._countdown = 1
+        self._next_thinning = None if self.max_steps is None else max(1, self.max_steps // 2)
+    
+    def set_step_budget(self, max_steps: Optional[int] = None, sample_every: int = 1):
+        """设置步骤预算
+        
+        sample_every: 非关键步骤每N步记录一次
+        max_steps: 记录的步骤总数上限；记录数每用掉剩余预算的一半，采样间隔加倍，
+                   预算用完后只保留关键步骤，因此无论输入多大轨迹长度都有上界
+        """
+        if max_steps is not None and max_steps < 1:
+            raise ValueError("max_steps必须大于0")
+        if sample_every < 1:
+            raise ValueError("sample_every必须大于0")
+        self.max_steps = max_steps
+        self.sample_every = sample_every
+        self._reset_sampling()
+    
+    def _keep_step(self, action: str) -> bool:
+        """按预算与采样间隔决定是否记录当前步骤"""
+        if action in self.key_actions:
+            return True
+        if self.max_steps is not None and self.recorded_steps >= self.max_steps:
+            return False
+        
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        self._countdown = self._stride
         
-    def add_step(self, action: str, data_snapshot: Dict[str, Any], 
+        if self._next_thinning is not None and self.recorded_steps + 1 >= self._next_thinning:
+            self._stride *= 2
+            remaining = self.max_steps - self._next_thinning
+            self._next_thinning += max(1, remaining // 2)
+        return True
+    
+    def restart_clock(self):
+        """从此刻起计算执行时间与CPU时间"""
+        self.start_time = time.perf_counter()
+        self.cpu_start_time = time.thread_time()
+    
+    def set_trace_format(self, trace_format: str = TRACE_FORMAT_FULL,
+                         keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """设置步骤轨迹格式：full为每步完整快照，delta为关键帧+增量，columnar为列式打包"""
+        if trace_format == TRACE_FORMAT_FULL:
+            self.trace_encoder = None
+        elif trace_format == TRACE_FORMAT_DELTA:
+            self.trace_encoder = DeltaTraceEncoder(keyframe_interval)
+        elif trace_format == TRACE_FORMAT_COLUMNAR:
+            self.trace_encoder = ColumnarTraceEncoder()
+        else:
+            raise ValueError(f"Unsupported trace format: {trace_format}")
+    
+    def set_profiling(self, enabled: bool):
+        """开启后统计峰值内存、记录步骤耗时与轨迹大小（execute需在self.profiler上下文中运行）"""
+        self.profiler = ExecutionProfiler() if enabled else None
+    
+    def set_cancel_token(self, token: Optional[CancellationToken]):
+        """设置取消令牌：add_step会检查它，长时间不产生步骤的循环应自行调用token.check()"""
+        self.cancel_token = token
+    
+    def set_step_sink(self, sink: Optional[Callable[[Dict[str, Any]], None]]):
+        """设置步骤输出回调：设置后每个步骤产生时立即交给sink，不再保存在内存中"""
+        self.step_sink = sink
+        
+    def add_step(self, action: str,
+                 data_snapshot: Union[Dict[str, Any], Callable[[], Dict[str, Any]], TrackedState, StateView],
                  highlight: List[int] = None, description: str = ""):
-        """添加算法执行步骤"""
+        """添加算法执行步骤
+        
+        data_snapshot可以是返回快照的函数，步骤被采样丢弃时不会构建快照；
+        也可以是TrackedState（或with_fields返回的视图），快照或增量由记录的修改生成，未修改的字段不会复制；
+        设置了取消令牌时，已取消或超时会在此抛出异常
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+        if self.profiler is None:
+            self._record_step(action, data_snapshot, highlight, description)
+            return
+        started = time.perf_counter()
+        self._record_step(action, data_snapshot, highlight, description)
+        self.profiler.time_step(started)
+    
+    def _record_step(self, action: str,
+                     data_snapshot: Union[Dict[str, Any], Callable[[], Dict[str, Any]], TrackedState, StateView],
+                     highlight: Optional[List[int]], description: str):
+        if not self._keep_step(action):
+            self.step_counter += 1
+            return
+        
+        delta = None
+        if isinstance(data_snapshot, (TrackedState, StateView)):
+            # 增量轨迹直接使用修改记录，只有关键帧才生成快照
+            state, extra = data_snapshot.state, data_snapshot.extra
+            if isinstance(self.trace_encoder, DeltaTraceEncoder) and not self.trace_encoder.keyframe_due():
+                delta = state.take_delta(extra)
+                data_snapshot = None
+            else:
+                data_snapshot = state.snapshot(extra)
+                state.mark_recorded(extra)
+        elif callable(data_snapshot):
+            data_snapshot = data_snapshot()
         if highlight is None:
             highlight = []
-            
-        step = AlgorithmStep(
-            step_id=self.step_counter,
-            action=action,
-            data_snapshot=data_snapshot,
-            highlight=highlight,
-            description=description,
-            timestamp=time.time() - self.start_time
-        )
-        self.steps.append(step)
+        
+        timestamp = time.perf_counter() - self.start_time
+        
+        if self.trace_encoder is not None:
+            if self.step_sink is not None:
+                self.step_sink(self.trace_encoder.encode(
+                    self.step_counter, action, data_snapshot, highlight, description, timestamp, delta
+                ))
+            elif delta is not None:
+                self.trace_encoder.add(
+                    self.step_counter, action, data_snapshot, highlight, description, timestamp, delta
+                )
+            else:
+                self.trace_encoder.add(
+                    self.step_counter, action, data_snapshot, highlight, description, timestamp
+                )
+        elif self.step_sink is not None:
+            self.step_sink({
+                "step_id": self.step_counter,
+                "action": action,
+                "data_snapshot": data_snapshot,
+                "highlight": highlight,
+                "description": description,
+                "timestamp": timestamp
+            })
+        else:
+            self.steps.append(self.step_counter, action, data_snapshot, highlight, description, timestamp)
         self.step_counter += 1
+        self.recorded_steps += 1
         
     def create_result(self, final_result: Any) -> AlgorithmResult:
         """创建算法执行结果"""
-        execution_time = time.time() - self.start_time
+        execution_time = time.perf_counter() - self.start_time
+        cpu_time = time.thread_time() - self.cpu_start_time
+        trace = self.trace_encoder.to_dict() if self.trace_encoder is not None else None
+        
+        performance_metrics = {
+            "execution_time": execution_time,
+            "cpu_time": cpu_time,
+            "step_count": self.recorded_steps,
+            "steps_generated": self.step_counter
+        }
+        if self.profiler is not None:
+            performance_metrics.update(self._profile_metrics(execution_time, trace))
         
-        return AlgorithmResult(
+        # 步骤保持为StepLog，不逐条校验；在接口边界由序列化器转换
+        return AlgorithmResult.construct(
             algorithm_name=self.get_metadata().name,
             steps=self.steps,
+            trace=trace,
             final_result=final_result,
-            performance_metrics={
-                "execution_time": execution_time,
-                "step_count": len(self.steps),
-                "memory_usage": "N/A"  # 可以后续扩展
-            },
+            performance_metrics=performance_metrics,
             execution_time=execution_time,
             created_at=datetime.now()
-        )
\ No newline at end of file
+        )
+    
+    def _profile_metrics(self, execution_time: float, trace: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """剖析指标：峰值内存（字节）、记录步骤与算法逻辑各自的耗时、轨迹序列化后的字节数"""
+        step_time = self.profiler.step_time
+        # 步骤已交给sink（流式执行）时不在内存中，无法统计轨迹大小
+        if trace is not None:
+            trace_bytes = len(dumps_json(trace))
+        elif self.step_sink is None:
+            trace_bytes = len(dumps_json(self.steps))
+        else:
+            trace_bytes = None
+        return {
+            "memory_usage": self.profiler.peak_memory,
+            "step_time": step_time,
+            "logic_time": max(0.0, execution_time - step_time),
+            "trace_bytes": trace_bytes
+        }
@@ -0,0 +1,151 @@
+"""
+协作式取消
+CancellationToken携带截止时间与取消标志，由add_step与搜索循环定期检查；
+进程池中的执行通过共享内存中的标志位取消，截止时间使用time.time()以便跨进程比较；
+长时间运行的搜索通过令牌报告进度，进程池中的执行写入共享内存中的进度数组
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.core.exceptions import ExecutionCancelled, ExecutionTimeout, MemoryBudgetExceeded
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 进程池子进程中由initializer设置的共享取消标志数组与进度数组
+_shared_flags = None
+_shared_progress = None
+
+# 进度字段，共享进度数组中每个标志位占用len(PROGRESS_FIELDS)个位置
+PROGRESS_FIELDS = ("states_explored", "queue_size")
+
+
+def install_shared_flags(flags, progress=None):
+    """进程池子进程的initializer：保存共享取消标志与进度数组"""
+    global _shared_flags, _shared_progress
+    _shared_flags = flags
+    _shared_progress = progress
+
+
+class CancellationToken:
+    """一次执行的取消令牌
+
+    deadline: 截止时间（time.time()），为None时不限时
+    memory_limit: 内存预算（字节），只对进程池中的执行生效
+    slot: 共享取消标志中的位置，在进程池中执行时由执行器分配
+    """
+
+    def __init__(self, deadline: Optional[float] = None, memory_limit: Optional[int] = None):
+        self.deadline = deadline
+        self.memory_limit = memory_limit
+        self.slot: Optional[int] = None
+        self._flags = None
+        self._progress = None
+        self._reported = [0] * len(PROGRESS_FIELDS)
+        self._cancelled = False
+
+    def __getstate__(self):
+        # 共享内存数组不可序列化，子进程中使用initializer安装的数组
+        state = self.__dict__.copy()
+        state["_flags"] = None
+        state["_progress"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._flags = _shared_flags
+        self._progress = _shared_progress
+
+    def bind_slot(self, flags, slot: int, progress=None):
+        """绑定共享取消标志与进度数组，用于取消在进程池中执行的任务并读取其进度"""
+        self._flags = flags
+        self.slot = slot
+        flags[slot] = 1 if self._cancelled else 0
+        self._progress = progress
+        if progress is not None:
+            base = slot * len(PROGRESS_FIELDS)
+            progress[base:base + len(PROGRESS_FIELDS)] = self._reported
+
+    def release_slot(self):
+        if self._flags is not None and self.slot is not None:
+            self._flags[self.slot] = 0
+        # 保留最后一次报告的进度
+        self._reported = self._progress_values()
+        self._flags = None
+        self._progress = None
+        self.slot = None
+
+    def _progress_values(self):
+        if self._progress is not None and self.slot is not None:
+            base = self.slot * len(PROGRESS_FIELDS)
+            return self._progress[base:base + len(PROGRESS_FIELDS)]
+        return list(self._reported)
+
+    def report_progress(self, states_explored: int, queue_size: int):
+        """报告搜索进度：已探索的状态数与待扩展的队列大小"""
+        if self._progress is not None and self.slot is not None:
+            base = self.slot * len(PROGRESS_FIELDS)
+            self._progress[base] = states_explored
+            self._progress[base + 1] = queue_size
+        else:
+            self._reported = [states_explored, queue_size]
+
+    @property
+    def progress(self) -> Dict[str, int]:
+        """最近一次报告的进度，未报告时各项为0"""
+        return dict(zip(PROGRESS_FIELDS, self._progress_values()))
+
+    def cancel(self):
+        self._cancelled = True
+        if self._flags is not None and self.slot is not None:
+            self._flags[self.slot] = 1
+
+    @property
+    def cancelled(self) -> bool:
+        if self._cancelled:
+            return True
+        return self._flags is not None and self.slot is not None and bool(self._flags[self.slot])
+
+    def check(self):
+        """已取消时抛出ExecutionCancelled，超过截止时间时抛出ExecutionTimeout"""
+        if self.cancelled:
+            raise ExecutionCancelled("Execution cancelled")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise ExecutionTimeout("Execution exceeded its time limit")
+
+
+def _address_space() -> Optional[int]:
+    """当前进程的虚拟内存大小（字节），只支持Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def memory_budget(limit: Optional[int]):
+    """在进程池子进程中限制本次执行可新增的虚拟内存，超出时抛出MemoryBudgetExceeded
+
+    通过RLIMIT_AS实现，会限制整个进程，因此只在进程池子进程中生效，在服务进程中不做限制
+    """
+    current = _address_space() if limit and resource is not None and _shared_flags is not None else None
+    if current is None:
+        yield
+        return
+
+    previous = resource.getrlimit(resource.RLIMIT_AS)
+    soft = current + limit
+    if previous[1] != resource.RLIM_INFINITY:
+        soft = min(soft, previous[1])
+    resource.setrlimit(resource.RLIMIT_AS, (soft, previous[1]))
+    try:
+        yield
+    except MemoryError:
+        raise MemoryBudgetExceeded("Execution exceeded its memory limit") from None
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, previous)
@@ -0,0 +1,247 @@
+"""
+响应压缩
+按Accept-Encoding协商gzip / br / zstd（br与zstd仅在安装了brotli、zstandard时可用），
+完整响应体小于阈值时不压缩；流式响应（NDJSON）逐块压缩并立即刷新，步骤仍能即时到达客户端
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# 值得压缩的响应类型（前缀匹配）
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/msgpack",
+                      "application/javascript")
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _gzip(data: bytes) -> bytes:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def available_encodings() -> Dict[str, Tuple]:
+    """当前环境可用的编码：名称 -> (整体压缩函数, 流式压缩器类)"""
+    encodings = {"gzip": (_gzip, _GzipStream)}
+    if brotli is not None:
+        encodings["br"] = (lambda data: brotli.compress(data, quality=BROTLI_QUALITY), _BrotliStream)
+    if zstandard is not None:
+        encodings["zstd"] = (zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress, _ZstdStream)
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str], preferred: Sequence[str]) -> Optional[str]:
+    """按客户端q值选择编码，q值相同时按服务端偏好顺序；没有可用编码时返回None"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for name in preferred:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """按Accept-Encoding压缩HTTP响应
+
+    带ETag的响应（缓存的确定性结果）压缩后改为弱ETag，并按(ETag, 编码)缓存压缩结果，
+    缓存命中时不重复压缩
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = ("zstd", "br", "gzip"),
+                 cache_size: int = 64):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encodings()
+        self.encodings = [name for name in encodings if name in self.encoders]
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, encoding, send).run(scope, receive)
+
+    def compress(self, encoding: str, body: bytes, etag: Optional[str]) -> bytes:
+        """压缩完整响应体，带ETag时使用缓存"""
+        if etag is None:
+            return self.encoders[encoding][0](body)
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        compressed = self.encoders[encoding][0](body)
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _set_header(headers: List[Tuple[bytes, bytes]], name: bytes, value: str):
+    headers[:] = [(key, old) for key, old in headers if key.lower() != name]
+    headers.append((name, value.encode("latin-1")))
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]):
+    vary = _header(headers, b"vary")
+    _set_header(headers, b"vary", f"{vary}, Accept-Encoding" if vary else "Accept-Encoding")
+
+
+class _CompressedResponse:
+    """单个响应的压缩状态：推迟发送响应头，直到知道响应体是否完整、是否值得压缩"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.stream = None
+        self.passthrough = False
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.wrapped_send)
+
+    def _compressible(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if self.start["status"] in (204, 304) or _header(headers, b"content-encoding"):
+            return False
+        content_type = _header(headers, b"content-type") or ""
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressed_headers(self, body_length: Optional[int], encoded: bool = True) -> List[Tuple[bytes, bytes]]:
+        headers = list(self.start.get("headers", []))
+        if encoded:
+            _set_header(headers, b"content-encoding", self.encoding)
+        _add_vary(headers)
+        etag = _header(headers, b"etag")
+        if etag and not etag.startswith("W/"):
+            # 压缩后的字节与原ETag不再逐字节一致，If-None-Match按弱比较仍能命中
+            _set_header(headers, b"etag", "W/" + etag)
+        if not encoded:
+            return headers
+        headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+        if body_length is not None:
+            headers.append((b"content-length", str(body_length).encode("latin-1")))
+        return headers
+
+    async def wrapped_send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = list(message.get("headers", []))
+            if not self._compressible(headers):
+                self.passthrough = True
+                if message["status"] == 304:
+                    # 与压缩后的200响应保持相同的弱ETag
+                    message = {**message, "headers": self._compressed_headers(None, encoded=False)}
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None and not more_body:
+            # 完整响应体：小于阈值时原样发送
+            if len(body) < self.middleware.minimum_size:
+                headers = list(self.start.get("headers", []))
+                _add_vary(headers)
+                await self.send({**self.start, "headers": headers})
+                await self.send(message)
+                return
+            etag = _header(self.start.get("headers", []), b"etag")
+            compressed = self.middleware.compress(self.encoding, body, etag)
+            await self.send({**self.start, "headers": self._compressed_headers(len(compressed))})
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.stream is None:
+            # 流式响应：长度未知，逐块压缩并刷新
+            self.stream = self.middleware.encoders[self.encoding][1]()
+            await self.send({**self.start, "headers": self._compressed_headers(None)})
+
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
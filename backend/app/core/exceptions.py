@@ -0,0 +1,18 @@
+class AlgorithmInputError(ValueError):
+    """算法输入数据或配置不合法（对应HTTP 400），区别于算法不存在（404）"""
+    pass
+
+
+class ExecutionCancelled(Exception):
+    """执行被取消（如客户端已断开）"""
+    pass
+
+
+class ExecutionTimeout(ExecutionCancelled):
+    """执行超过时间预算"""
+    pass
+
+
+class MemoryBudgetExceeded(ExecutionCancelled):
+    """执行超过内存预算"""
+    pass
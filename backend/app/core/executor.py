@@ -0,0 +1,264 @@
+"""
+算法执行器
+把CPU密集的算法执行移出事件循环：轻量算法在线程池中执行，
+重计算算法在进程池中执行，按注册信息中的executor选项选择
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from app.core.base_algorithm import BaseAlgorithm
+from app.core.cancellation import PROGRESS_FIELDS, CancellationToken, install_shared_flags, memory_budget
+from app.core.exceptions import (
+    AlgorithmInputError,
+    ExecutionCancelled,
+    ExecutionTimeout,
+    MemoryBudgetExceeded
+)
+from app.core.metrics import observe_execution
+from app.core.registry import algorithm_registry
+from app.core.settings import settings
+from app.core.trace import TRACE_FORMAT_FULL
+from app.models.algorithm import AlgorithmExecuteRequest, AlgorithmResult
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+
+class ExecutorBusy(Exception):
+    """执行队列已满"""
+    pass
+
+
+def prepare_algorithm(algorithm: BaseAlgorithm, request: AlgorithmExecuteRequest,
+                      token: Optional[CancellationToken] = None):
+    """按请求设置轨迹格式、步骤预算、剖析与取消令牌，并重置步骤记录"""
+    max_steps = min(request.max_steps or settings.max_trace_steps, settings.max_trace_steps)
+    algorithm.set_trace_format(request.trace_format, request.keyframe_interval)
+    algorithm.set_step_budget(max_steps, request.sample_every)
+    algorithm.set_profiling(request.profile or settings.profile_executions)
+    algorithm.set_cancel_token(token)
+    algorithm.reset_steps()
+
+
+def execute_prepared(algorithm: BaseAlgorithm, request: AlgorithmExecuteRequest) -> AlgorithmResult:
+    """执行已准备好的算法并创建结果，开启剖析时在剖析上下文中执行"""
+    if algorithm.profiler is None:
+        final_result = algorithm.execute(request.data, request.config)
+    else:
+        with algorithm.profiler:
+            # 等待其他剖析执行结束的时间不计入执行时间
+            algorithm.restart_clock()
+            final_result = algorithm.execute(request.data, request.config)
+    return algorithm.create_result(final_result)
+
+
+def _discard_step(step: Dict[str, Any]):
+    pass
+
+
+def run_algorithm(algorithm_name: str, request: AlgorithmExecuteRequest,
+                  token: Optional[CancellationToken] = None, keep_steps: bool = True) -> AlgorithmResult:
+    """执行一次算法并返回结果
+
+    作为模块级函数以便在进程池中序列化调用；
+    以spawn方式启动的子进程注册器为空，需要先发现算法。
+    keep_steps为False时步骤产生后即丢弃，结果中不含步骤（用于只需要汇总的批量执行），
+    此时不编码轨迹，请求的trace_format（包括只能整体编码的columnar）不起作用
+    """
+    try:
+        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
+    except ValueError:
+        algorithm_registry.discover_algorithms()
+        algorithm = algorithm_registry.get_algorithm_instance(algorithm_name)
+
+    prepare_algorithm(algorithm, request, token)
+    if not keep_steps:
+        algorithm.set_trace_format(TRACE_FORMAT_FULL)
+        algorithm.set_step_sink(_discard_step)
+    with memory_budget(token.memory_limit if token is not None else None):
+        return execute_prepared(algorithm, request)
+
+
+def execution_outcome(error: Exception) -> str:
+    """执行失败原因，用作指标标签"""
+    if isinstance(error, ExecutorBusy):
+        return "rejected"
+    if isinstance(error, AlgorithmInputError):
+        return "invalid_input"
+    if isinstance(error, ExecutionTimeout):
+        return "timeout"
+    if isinstance(error, MemoryBudgetExceeded):
+        return "memory_exceeded"
+    if isinstance(error, ExecutionCancelled):
+        return "cancelled"
+    return "error"
+
+
+class AlgorithmExecutor:
+    """带并发与排队上限的执行器"""
+
+    def __init__(self, thread_workers: int, process_workers: int, max_queue: int,
+                 process_start_method: str = "spawn"):
+        self.workers = {
+            EXECUTOR_THREAD: thread_workers,
+            EXECUTOR_PROCESS: process_workers,
+        }
+        self.max_queue = max_queue
+        self.process_start_method = process_start_method
+        self._pools: Dict[str, Executor] = {}
+        self._pending = {EXECUTOR_THREAD: 0, EXECUTOR_PROCESS: 0}
+        # 进程池任务的共享取消标志与进度：每个执行中或排队的任务占用一位
+        self._cancel_flags = None
+        self._progress = None
+        self._free_slots: List[int] = []
+
+    def create_pools(self):
+        """启动时创建执行池，避免在已有工作线程的进程中再创建进程池"""
+        for mode in self.workers:
+            self._get_pool(mode)
+
+    def _get_pool(self, mode: str) -> Executor:
+        """获取执行池，不存在时创建"""
+        if mode not in self._pools:
+            if mode == EXECUTOR_PROCESS:
+                # 默认使用spawn：子进程不继承父进程中的线程与锁状态
+                context = multiprocessing.get_context(self.process_start_method)
+                if self._cancel_flags is None:
+                    slots = self.workers[mode] + self.max_queue
+                    self._cancel_flags = context.Array("b", slots, lock=False)
+                    self._progress = context.Array("q", slots * len(PROGRESS_FIELDS), lock=False)
+                    self._free_slots = list(range(slots))
+                self._pools[mode] = ProcessPoolExecutor(
+                    max_workers=self.workers[mode],
+                    mp_context=context,
+                    initializer=install_shared_flags,
+                    initargs=(self._cancel_flags, self._progress)
+                )
+            elif mode == EXECUTOR_THREAD:
+                self._pools[mode] = ThreadPoolExecutor(
+                    max_workers=self.workers[mode], thread_name_prefix="algorithm"
+                )
+            else:
+                raise ValueError(f"Unknown executor: {mode}")
+        return self._pools[mode]
+
+    def check_capacity(self, mode: str):
+        """排队数已达上限时抛出ExecutorBusy"""
+        if self._pending[mode] >= self.workers[mode] + self.max_queue:
+            raise ExecutorBusy(f"Too many pending {mode} executions")
+
+    def start(self, mode: str, func: Callable, *args: Any) -> "asyncio.Future":
+        """在指定执行池中启动func并返回future，排队数超过上限时抛出ExecutorBusy"""
+        self.check_capacity(mode)
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(mode)
+        try:
+            future = loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # 进程池在空闲时已损坏，重建后重新提交
+            self._discard_pool(mode, pool)
+            pool = self._get_pool(mode)
+            future = loop.run_in_executor(pool, func, *args)
+
+        self._pending[mode] += 1
+
+        def on_done(done: "asyncio.Future"):
+            self._pending[mode] -= 1
+            # 子进程异常退出（如被OOM终止）后进程池不可再用，丢弃以便下次重建
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self._discard_pool(mode, pool)
+
+        future.add_done_callback(on_done)
+        return future
+
+    def _discard_pool(self, mode: str, pool: Executor):
+        """丢弃已损坏的执行池"""
+        if self._pools.get(mode) is pool:
+            del self._pools[mode]
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, mode: str, func: Callable, *args: Any) -> Any:
+        """在指定执行池中运行func并等待结果"""
+        return await self.start(mode, func, *args)
+
+    def create_token(self, algorithm_name: str, request: AlgorithmExecuteRequest) -> CancellationToken:
+        """按算法注册的预算与请求的timeout创建取消令牌，截止时间从此刻起算（含排队时间）"""
+        options = algorithm_registry.get_options(algorithm_name)
+        limits = [settings.execution_time_limit, options.get("time_limit"), request.timeout]
+        time_limit = min(limit for limit in limits if limit is not None)
+        memory_limit_mb = options.get("memory_limit_mb")
+        return CancellationToken(
+            deadline=time.time() + time_limit,
+            memory_limit=memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        )
+
+    def _bind_slot(self, token: CancellationToken):
+        self._get_pool(EXECUTOR_PROCESS)
+        token.bind_slot(self._cancel_flags, self._free_slots.pop(), self._progress)
+
+    def _release_slot(self, token: CancellationToken):
+        if token.slot is not None:
+            self._free_slots.append(token.slot)
+            token.release_slot()
+
+    async def run(self, algorithm_name: str, request: AlgorithmExecuteRequest,
+                  token: Optional[CancellationToken] = None, keep_steps: bool = True) -> AlgorithmResult:
+        """按算法注册的executor选项执行算法，并记录执行次数、耗时（含排队）与步骤数
+
+        等待被取消时（如客户端断开）通过token通知执行中的算法停止
+        """
+        mode = algorithm_registry.get_options(algorithm_name).get("executor", EXECUTOR_THREAD)
+        if token is None:
+            token = self.create_token(algorithm_name, request)
+        started = time.perf_counter()
+        try:
+            self.check_capacity(mode)
+            if mode == EXECUTOR_PROCESS:
+                self._bind_slot(token)
+            try:
+                future = self.start(mode, run_algorithm, algorithm_name, request, token, keep_steps)
+            except Exception:
+                self._release_slot(token)
+                raise
+            # 任务真正结束后才释放标志位，取消等待时子进程仍可读到取消标志
+            future.add_done_callback(lambda _: self._release_slot(token))
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                token.cancel()
+                observe_execution(algorithm_name, started, "cancelled")
+                raise
+        except Exception as e:
+            observe_execution(algorithm_name, started, execution_outcome(e))
+            raise
+        observe_execution(algorithm_name, started, "ok", result.performance_metrics.get("step_count"))
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各执行池的并发与排队情况"""
+        return {
+            mode: {
+                "workers": self.workers[mode],
+                "pending": pending,
+                "queued": max(0, pending - self.workers[mode]),
+            }
+            for mode, pending in self._pending.items()
+        }
+
+    def shutdown(self, wait: bool = False):
+        """关闭所有执行池"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        self._pools = {}
+
+
+# 全局执行器实例
+algorithm_executor = AlgorithmExecutor(
+    thread_workers=settings.thread_workers,
+    process_workers=settings.process_workers,
+    max_queue=settings.max_queue,
+    process_start_method=settings.process_start_method
+)
@@ -0,0 +1,320 @@
+"""
+异步运行的任务队列
+POST /runs立即返回运行ID，运行在进程内的队列中排队，由后台工作协程交给执行器执行，
+不再占用HTTP连接；客户端轮询或通过WebSocket订阅状态与进度（已探索的状态数、搜索队列大小），
+完成后结果保存在运行存储中，状态与结果在完成后保留ttl秒。
+确定性算法的相同请求复用排队中、执行中或已完成的运行。
+配置了共享存储时运行状态同时写入SQLite，请求落到其他工作进程时也能查询；
+运行状态的SQLite读写在单独的线程中按提交顺序执行，结果的保存与读取在线程池中进行，都不阻塞事件循环
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.cancellation import CancellationToken
+from app.core.executor import ExecutorBusy, algorithm_executor, execution_outcome
+from app.core.registry import algorithm_registry
+from app.core.result_cache import request_key
+from app.core.run_store import new_run_id, run_store
+from app.core.serialization import dumps_json
+from app.core.settings import settings
+from app.core.shared_store import JOB_NAMESPACE, SharedStore, shared_store
+from app.models.algorithm import AlgorithmExecuteRequest
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+# 执行池已满时重新提交的间隔（秒）
+BUSY_RETRY_INTERVAL = 0.5
+# 执行中的运行写入共享存储的间隔（秒）
+PUBLISH_INTERVAL = 1.0
+
+
+class Job:
+    """一次异步运行"""
+
+    def __init__(self, job_id: str, algorithm_name: str, request: AlgorithmExecuteRequest,
+                 key: Optional[str]):
+        self.job_id = job_id
+        self.algorithm_name = algorithm_name
+        self.request = request
+        self.key = key
+        self.status = JOB_QUEUED
+        self.submitted_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.expires_at: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+        self.summary: Optional[Dict[str, Any]] = None
+        self.token: Optional[CancellationToken] = None
+        self.references = 1  # 复用此运行的提交数，全部释放后才删除
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobQueue:
+    """进程内的运行队列，workers个工作协程按提交顺序执行"""
+
+    def __init__(self, workers: int = 2, max_queued: int = 256, ttl: float = 3600.0,
+                 store: Optional[SharedStore] = None):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.store = store
+        self._jobs: Dict[str, Job] = {}  # 按提交顺序
+        self._keys: Dict[str, str] = {}  # 请求键 -> 运行ID
+        self._queue: Optional["asyncio.Queue[Job]"] = None
+        self._tasks: List[asyncio.Task] = []
+        # 运行状态在共享存储中的读写都交给这一个线程：不阻塞事件循环，
+        # 同一运行较早的状态也不会覆盖较晚的状态（线程在第一次提交时才创建，预加载后fork是安全的）
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+
+    def start(self):
+        """在当前事件循环中启动工作协程"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """停止工作协程，执行中的运行被取消，排队中的运行标记为已取消"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            if not job.finished:
+                self._finish(job, JOB_CANCELLED, "cancelled", "Server shutting down")
+        # 等待已提交的状态写入完成
+        await self._call(lambda: None)
+        self._tasks = []
+        self._queue = None
+
+    def _call(self, func, *args) -> "asyncio.Future":
+        """在存储线程中执行func，返回可等待的结果"""
+        return asyncio.wrap_future(self._io.submit(func, *args))
+
+    async def submit(self, algorithm_name: str, request: AlgorithmExecuteRequest) -> Tuple[Job, bool]:
+        """提交运行，返回(运行, 是否复用了相同请求的运行)
+
+        算法不存在时抛出ValueError，排队的运行数已达上限时抛出ExecutorBusy
+        """
+        self.start()
+        self.purge()
+        key = None
+        if algorithm_registry.get_options(algorithm_name).get("deterministic", False):
+            key = request_key(algorithm_name, request)
+            existing = self._jobs.get(self._keys.get(key))
+            if existing is not None and await self._reusable(existing):
+                existing.references += 1
+                return existing, True
+
+        if self.queued_count() >= self.max_queued:
+            raise ExecutorBusy("Too many queued runs")
+        job = Job(new_run_id(), algorithm_name, request, key)
+        self._jobs[job.job_id] = job
+        if key is not None:
+            self._keys[key] = job.job_id
+        self._queue.put_nowait(job)
+        self._publish(job)
+        return job, False
+
+    async def _reusable(self, job: Job) -> bool:
+        """失败、取消或结果已被运行存储淘汰的运行不再复用"""
+        if job.status in (JOB_FAILED, JOB_CANCELLED):
+            return False
+        if job.status == JOB_SUCCEEDED:
+            try:
+                await asyncio.to_thread(run_store.get, job.job_id)
+            except ValueError:
+                return False
+        return job.job_id in self._jobs
+
+    def queued_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JOB_QUEUED)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """本进程中的运行"""
+        return self._jobs.get(job_id)
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """运行状态，本进程中没有时从共享存储读取，都没有时返回None"""
+        self.purge()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return self._status(job)
+        if self.store is not None:
+            value = await self._call(self.store.get, JOB_NAMESPACE, job_id)
+            if value is not None:
+                return json.loads(value)
+        return None
+
+    def _status(self, job: Job) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "run_id": job.job_id,
+            "algorithm_name": job.algorithm_name,
+            "status": job.status,
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "progress": job.token.progress if job.token is not None else {},
+        }
+        if job.status == JOB_QUEUED:
+            body["queue_position"] = self._position(job)
+        if job.outcome is not None:
+            body["outcome"] = job.outcome
+            body["error"] = job.error
+        if job.summary is not None:
+            body.update(job.summary)
+        return body
+
+    def _position(self, job: Job) -> int:
+        """排在前面的运行数"""
+        position = 0
+        for other in self._jobs.values():
+            if other is job:
+                break
+            position += other.status == JOB_QUEUED
+        return position
+
+    async def wait(self, job_id: str, timeout: float):
+        """等待运行结束，最多等待timeout秒；运行不在本进程中时只等待timeout秒"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def release(self, job_id: str) -> bool:
+        """释放一次提交，返回运行是否可以删除（其他复用它的提交都已释放）"""
+        job = self._jobs.get(job_id)
+        if job is not None and job.references > 1:
+            job.references -= 1
+            return False
+        return True
+
+    async def cancel(self, job_id: str) -> bool:
+        """取消运行并删除其状态（结果由调用方从运行存储中删除），返回运行是否存在"""
+        job = self._discard(job_id)
+        deleted = self.store is not None and await self._call(self.store.delete, JOB_NAMESPACE, job_id)
+        return job is not None or deleted
+
+    def _discard(self, job_id: str) -> Optional[Job]:
+        """从本进程中移除运行，未结束时取消"""
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            if job.token is not None:
+                job.token.cancel()
+            if not job.finished:
+                self._finish(job, JOB_CANCELLED, "cancelled", "Run cancelled")
+            if job.key is not None and self._keys.get(job.key) == job_id:
+                del self._keys[job.key]
+        return job
+
+    def purge(self):
+        """删除超过保留时间的运行及其结果"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.expires_at is not None and job.expires_at <= now]
+        for job_id in expired:
+            self._discard(job_id)
+            self._io.submit(self._delete_stored, job_id)
+
+    def _delete_stored(self, job_id: str):
+        """删除运行在共享存储中的状态与运行存储中的结果（在存储线程中执行）"""
+        if self.store is not None:
+            self.store.delete(JOB_NAMESPACE, job_id)
+        try:
+            run_store.delete(job_id)
+        except ValueError:
+            pass
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status == JOB_QUEUED:
+                await self._run(job)
+
+    async def _run(self, job: Job):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now()
+        # 截止时间从开始执行时起算，排队时间不计入
+        job.token = algorithm_executor.create_token(job.algorithm_name, job.request)
+        self._publish(job)
+        try:
+            result = await self._execute(job)
+            if job.job_id in self._jobs:
+                run = await asyncio.to_thread(run_store.add, job.algorithm_name, result, job.job_id, self.ttl)
+                job.summary = run.summary()
+                self._finish(job, JOB_SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, JOB_CANCELLED, "cancelled", "Server shutting down")
+            raise
+        except Exception as e:
+            outcome = execution_outcome(e)
+            status = JOB_CANCELLED if outcome == "cancelled" else JOB_FAILED
+            self._finish(job, status, outcome, str(e))
+
+    async def _execute(self, job: Job):
+        """执行运行，执行池已满时等待后重新提交；配置了共享存储时定期写入进度"""
+        while True:
+            future = asyncio.ensure_future(
+                algorithm_executor.run(job.algorithm_name, job.request, job.token)
+            )
+            try:
+                while True:
+                    done, _ = await asyncio.wait({future}, timeout=PUBLISH_INTERVAL)
+                    if done:
+                        break
+                    self._publish(job)
+            finally:
+                if not future.done():
+                    future.cancel()
+            try:
+                return future.result()
+            except ExecutorBusy:
+                await asyncio.sleep(BUSY_RETRY_INTERVAL)
+
+    def _finish(self, job: Job, status: str, outcome: Optional[str] = None, error: Optional[str] = None):
+        if job.finished:
+            return
+        job.status = status
+        job.outcome = outcome
+        job.error = error
+        job.finished_at = datetime.now()
+        job.expires_at = time.time() + self.ttl
+        job.done.set()
+        self._publish(job)
+
+    def _publish(self, job: Job):
+        """把运行状态交给存储线程写入共享存储，不等待写入完成"""
+        if self.store is not None and job.job_id in self._jobs:
+            self._io.submit(self.store.set, JOB_NAMESPACE, job.job_id, dumps_json(self._status(job)), self.ttl)
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的运行数"""
+        counts = {state: 0 for state in (JOB_QUEUED, JOB_RUNNING) + FINISHED_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+
+# 全局运行队列实例
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_queued=settings.job_max_queued,
+    ttl=settings.job_ttl,
+    store=shared_store
+)
@@ -0,0 +1,85 @@
+"""
+算法清单
+记录每个算法模块注册的算法名、执行选项、元数据与配置模式，并缓存到磁盘。
+模块文件的mtime或大小变化时只重新导入该模块生成条目；
+服务启动时按清单注册算法，不导入算法代码，首次执行时才导入对应模块
+"""
+import importlib
+import json
+import os
+import pkgutil
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def iter_module_files(package_name: str, package_dir: str) -> Iterator[Tuple[str, str]]:
+    """遍历包目录下的所有模块（含子包），返回(模块名, 源文件路径)，不导入模块"""
+    for _, name, ispkg in pkgutil.iter_modules([package_dir], package_name + "."):
+        short_name = name.rsplit(".", 1)[1]
+        if ispkg:
+            subdir = os.path.join(package_dir, short_name)
+            yield name, os.path.join(subdir, "__init__.py")
+            yield from iter_module_files(name, subdir)
+        else:
+            yield name, os.path.join(package_dir, short_name + ".py")
+
+
+def file_stamp(path: str) -> Optional[List[int]]:
+    """源文件的(mtime_ns, size)，文件不存在（如编译扩展模块）时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """读取磁盘上的清单，不存在、损坏或版本不符时返回空清单"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("modules", {})
+
+
+def save_manifest(path: str, modules: Dict[str, Any]):
+    """写入清单（先写临时文件再替换，多个进程同时写入时不会读到半个文件）；目录不可写时跳过"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Failed to write algorithm manifest {path}: {e}")
+
+
+def update_manifest(registry, package_name: str, package_dir: str, path: str) -> Dict[str, Any]:
+    """返回包内每个模块的清单条目，只导入新增或已修改的模块
+
+    registry.module_entries(module_name)返回模块导入后注册的算法条目
+    """
+    cached = load_manifest(path)
+    modules: Dict[str, Any] = {}
+    changed = False
+
+    for module_name, source in iter_module_files(package_name, package_dir):
+        stamp = file_stamp(source)
+        entry = cached.get(module_name)
+        if stamp is None or entry is None or entry.get("stamp") != stamp:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                print(f"Failed to import {module_name}: {e}")
+                continue
+            entry = {"stamp": stamp, "algorithms": registry.module_entries(module_name)}
+            changed = True
+        modules[module_name] = entry
+
+    if changed or set(cached) != set(modules):
+        save_manifest(path, modules)
+    return modules
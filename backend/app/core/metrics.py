@@ -0,0 +1,227 @@
+"""
+进程内指标
+计数器与直方图保存在内存中，/metrics接口按Prometheus文本格式输出；
+执行池、结果缓存等的当前状态在输出时由采集函数读取
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.core.registry import algorithm_registry
+
+LabelValues = Tuple[str, ...]
+# 采集函数返回 (指标名, 类型, 说明, [(标签字典, 值)])
+Sample = Tuple[Dict[str, str], float]
+Collected = Tuple[str, str, str, List[Sample]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """按标签累加的计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Histogram:
+    """按标签分桶统计的直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签：[各桶计数..., 总和, 总数]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            state = self._values.get(labels)
+            return int(state[-1]) if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(state[-1])}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(float(state[-2]))}")
+            lines.append(f"{self.name}_count{label_text} {int(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Collected]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Collected]]):
+        """注册在输出时读取当前状态的采集函数"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, type_name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} "
+                                 f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表与指标
+metrics_registry = MetricsRegistry()
+
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route, algorithm and status",
+    ("method", "route", "algorithm", "status"))
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and algorithm",
+    ("method", "route", "algorithm"))
+http_response_bytes = metrics_registry.counter(
+    "http_response_bytes_total", "HTTP response body bytes by route and algorithm",
+    ("method", "route", "algorithm"))
+algorithm_executions = metrics_registry.counter(
+    "algorithm_executions_total", "Algorithm executions by algorithm and outcome",
+    ("algorithm", "outcome"))
+algorithm_execute_duration = metrics_registry.histogram(
+    "algorithm_execute_duration_seconds", "Algorithm execution latency including queue wait",
+    ("algorithm",))
+algorithm_steps = metrics_registry.counter(
+    "algorithm_steps_total", "Algorithm steps recorded", ("algorithm",))
+result_cache_lookups = metrics_registry.counter(
+    "result_cache_lookups_total", "Result cache lookups by algorithm and result", ("algorithm", "result"))
+coalesced_executions = metrics_registry.counter(
+    "coalesced_executions_total", "Execute requests that joined an identical in-flight execution",
+    ("algorithm",))
+
+
+def observe_execution(algorithm: str, started: float, outcome: str, steps: Optional[int] = None):
+    """记录一次算法执行；started为time.perf_counter()的起始值"""
+    algorithm_executions.inc(algorithm, outcome)
+    algorithm_execute_duration.observe(time.perf_counter() - started, algorithm)
+    if steps:
+        algorithm_steps.inc(algorithm, amount=steps)
+
+
+class MetricsMiddleware:
+    """记录每个HTTP请求的次数、延迟与响应字节数
+
+    route标签使用路由模板（如/api/algorithms/{algorithm_name}/execute）而不是实际路径，
+    algorithm标签取自路径参数algorithm_name，未注册的算法名（无论响应状态码）记为unknown，
+    避免标签数量随请求无限增长
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            algorithm = scope.get("path_params", {}).get("algorithm_name", "")
+            if algorithm and not algorithm_registry.has_algorithm(algorithm):
+                # 未注册的算法名不作为标签值（请求体校验失败时返回422而不是404）
+                algorithm = "unknown"
+            method = scope["method"]
+            http_requests.inc(method, route_path, algorithm, str(status))
+            http_request_duration.observe(time.perf_counter() - started, method, route_path, algorithm)
+            http_response_bytes.inc(method, route_path, algorithm, amount=body_bytes)
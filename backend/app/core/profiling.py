@@ -0,0 +1,51 @@
+"""
+执行剖析
+统计单次执行的峰值内存（tracemalloc）与记录步骤所用时间；
+tracemalloc开销较大，只在请求或全局配置开启剖析时启用
+"""
+import threading
+import time
+import tracemalloc
+from typing import Optional
+
+# tracemalloc是进程级的：start/stop与reset_peak影响所有线程，
+# 同一进程中的剖析执行互斥进行，避免互相重置峰值或提前停止追踪
+_profile_lock = threading.Lock()
+
+
+class ExecutionProfiler:
+    """单次执行的剖析数据，作为上下文管理器包裹算法的execute
+
+    峰值内存为执行期间新增的已追踪内存峰值。同一进程中的剖析执行依次进行（线程池中并发的剖析请求会排队），
+    但tracemalloc统计整个进程的分配：线程池中同时运行的未剖析执行的分配也会计入峰值；
+    进程池中的执行每个子进程一次只运行一个，峰值只包含本次执行
+    """
+
+    def __init__(self):
+        self.step_time = 0.0
+        self.peak_memory: Optional[int] = None
+        self._baseline = 0
+        self._owns_tracing = False
+
+    def __enter__(self) -> "ExecutionProfiler":
+        _profile_lock.acquire()
+        # 只停止由剖析开启的追踪（如PYTHONTRACEMALLOC开启的追踪保持不变）
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak_memory = max(0, peak - self._baseline)
+            if self._owns_tracing:
+                tracemalloc.stop()
+        finally:
+            _profile_lock.release()
+
+    def time_step(self, started: float):
+        """累计一次add_step的耗时"""
+        self.step_time += time.perf_counter() - started
@@ -1,72 +1,199 @@
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Optional, Type
 import importlib
-import pkgutil
+import os
 from app.core.base_algorithm import BaseAlgorithm
-from app.models.algorithm import AlgorithmMetadata
+from app.core.manifest import update_manifest
+from app.core.settings import settings
+from app.models.algorithm import AlgorithmConfig, AlgorithmListResponse, AlgorithmMetadata
 
 class AlgorithmRegistry:
-    """算法注册器"""
+    """算法注册器
+    
+    元数据与配置模式在注册时读取一次，并缓存序列化后的JSON，
+    列表、配置、元数据接口直接返回缓存的字节，不再为每次请求创建算法实例。
+    按清单发现的算法只记录所在模块，首次获取算法类时才导入
+    """
     
     def __init__(self):
         self._algorithms: Dict[str, Type[BaseAlgorithm]] = {}
+        self._modules: Dict[str, str] = {}
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._metadata: Dict[str, AlgorithmMetadata] = {}
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._metadata_bodies: Dict[str, bytes] = {}
+        self._config_bodies: Dict[str, bytes] = {}
+        self._list_body: Optional[bytes] = None
+        
+    def register(self, name: str, algorithm_class: Type[BaseAlgorithm], options: Dict[str, Any] = None,
+                 metadata: Optional[AlgorithmMetadata] = None):
+        """注册算法
         
-    def register(self, name: str, algorithm_class: Type[BaseAlgorithm]):
-        """注册算法"""
+        metadata为装饰器声明的元数据，未声明的字段（如author）取自算法的get_metadata
+        """
         if not issubclass(algorithm_class, BaseAlgorithm):
             raise ValueError(f"Algorithm {name} must inherit from BaseAlgorithm")
+        
+        instance = algorithm_class()
+        full_metadata = instance.get_metadata()
+        if metadata is not None:
+            declared = {key: value for key, value in metadata.dict().items() if value is not None}
+            full_metadata = full_metadata.copy(update=declared)
+        
         self._algorithms[name] = algorithm_class
+        self._store(name, options, full_metadata, instance.get_config_schema())
+    
+    def register_lazy(self, name: str, module: str, options: Dict[str, Any],
+                      metadata: AlgorithmMetadata, schema: Dict[str, Any]):
+        """按清单注册尚未导入的算法，首次获取算法类时导入module"""
+        if name in self._algorithms:
+            return
+        self._modules[name] = module
+        self._store(name, options, metadata, schema)
+    
+    def _store(self, name: str, options: Dict[str, Any], full_metadata: AlgorithmMetadata,
+               schema: Dict[str, Any]):
+        """缓存算法的执行选项、元数据、配置模式及其JSON"""
+        self._options[name] = options or {}
+        self._metadata[name] = full_metadata
+        self._schemas[name] = schema
+        self._metadata_bodies[name] = _to_bytes(full_metadata)
+        self._config_bodies[name] = _to_bytes(AlgorithmConfig(name=name, config_schema=schema))
+        self._list_body = None
+        
+    def _require(self, name: str):
+        """算法未注册时抛出ValueError（不导入算法模块）"""
+        if name not in self._metadata:
+            raise ValueError(f"Algorithm {name} not found")
+    
+    def has_algorithm(self, name: str) -> bool:
+        """算法是否已注册（不导入算法模块）"""
+        return name in self._metadata
+    
+    def get_options(self, name: str) -> Dict[str, Any]:
+        """获取算法的执行选项（executor等）"""
+        self._require(name)
+        return self._options[name]
         
     def get_algorithm(self, name: str) -> Type[BaseAlgorithm]:
-        """获取算法类"""
+        """获取算法类，按清单注册的算法在此时导入模块"""
         if name not in self._algorithms:
-            raise ValueError(f"Algorithm {name} not found")
+            self._require(name)
+            importlib.import_module(self._modules[name])
+            if name not in self._algorithms:
+                raise ValueError(f"Algorithm {name} not found in {self._modules[name]}")
         return self._algorithms[name]
         
     def get_algorithm_instance(self, name: str) -> BaseAlgorithm:
         """获取算法实例"""
         algorithm_class = self.get_algorithm(name)
         return algorithm_class()
+    
+    def get_metadata(self, name: str) -> AlgorithmMetadata:
+        """获取注册时缓存的元数据"""
+        self._require(name)
+        return self._metadata[name]
+    
+    def get_config_schema(self, name: str) -> Dict[str, Any]:
+        """获取注册时缓存的配置模式"""
+        self._require(name)
+        return self._schemas[name]
         
     def list_algorithms(self) -> List[AlgorithmMetadata]:
         """获取所有算法的元数据"""
-        metadata_list = []
-        for name, algorithm_class in self._algorithms.items():
-            instance = algorithm_class()
-            metadata_list.append(instance.get_metadata())
-        return metadata_list
+        return list(self._metadata.values())
+    
+    def list_body(self) -> bytes:
+        """算法列表响应的JSON字节，注册新算法后重新生成"""
+        if self._list_body is None:
+            algorithms = self.list_algorithms()
+            self._list_body = _to_bytes(AlgorithmListResponse(algorithms=algorithms, total=len(algorithms)))
+        return self._list_body
+    
+    def metadata_body(self, name: str) -> bytes:
+        """算法元数据响应的JSON字节"""
+        self._require(name)
+        return self._metadata_bodies[name]
+    
+    def config_body(self, name: str) -> bytes:
+        """算法配置响应的JSON字节"""
+        self._require(name)
+        return self._config_bodies[name]
+        
+    def module_entries(self, module: str) -> List[Dict[str, Any]]:
+        """模块中已注册算法的清单条目"""
+        return [
+            {
+                "name": name,
+                "options": self._options[name],
+                "metadata": self._metadata[name].dict(),
+                "config_schema": self._schemas[name],
+            }
+            for name, algorithm_class in self._algorithms.items()
+            if algorithm_class.__module__ == module
+        ]
+        
+    def preload(self):
+        """导入所有按清单注册的算法模块（多工作进程部署时在fork前调用，工作进程共享已导入的模块）"""
+        for name in list(self._metadata):
+            self.get_algorithm(name)
         
     def discover_algorithms(self):
-        """自动发现并注册算法"""
+        """按清单发现并注册算法
+        
+        清单缓存在磁盘上（默认为算法包的__pycache__/algorithm_manifest.json），
+        只有新增或修改过的模块会被导入，其余算法在首次执行时才导入
+        """
         try:
-            # 导入算法模块
             import app.algorithms
-            
-            # 递归导入所有子模块
-            def import_submodules(package):
-                for _, name, ispkg in pkgutil.iter_modules(package.__path__, package.__name__ + "."):
-                    try:
-                        importlib.import_module(name)
-                        if ispkg:
-                            submodule = importlib.import_module(name)
-                            import_submodules(submodule)
-                    except Exception as e:
-                        print(f"Failed to import {name}: {e}")
-            
-            import_submodules(app.algorithms)
-            print(f"Discovered {len(self._algorithms)} algorithms")
-            
         except ImportError:
             print("No algorithms package found")
+            return
+        
+        package_dir = os.path.dirname(app.algorithms.__file__)
+        path = settings.manifest_path or os.path.join(package_dir, "__pycache__", "algorithm_manifest.json")
+        modules = update_manifest(self, app.algorithms.__name__, package_dir, path)
+        for module, entry in modules.items():
+            for item in entry["algorithms"]:
+                self.register_lazy(
+                    item["name"], module, item["options"],
+                    AlgorithmMetadata(**item["metadata"]), item["config_schema"]
+                )
+        print(f"Discovered {len(self._metadata)} algorithms")
+
+def _to_bytes(model) -> bytes:
+    return model.json(ensure_ascii=False).encode("utf-8")
 
 # 全局注册器实例
 algorithm_registry = AlgorithmRegistry()
 
 def algorithm_register(name: str, display_name: str, category: str, description: str, 
-                      complexity_time: str = None, complexity_space: str = None):
-    """算法注册装饰器"""
+                      complexity_time: str = None, complexity_space: str = None,
+                      executor: str = "thread", deterministic: bool = False,
+                      time_limit: Optional[float] = None, memory_limit_mb: Optional[int] = None):
+    """算法注册装饰器
+    
+    executor: 执行方式，"thread"适合轻量算法，"process"适合CPU密集的搜索类算法
+    deterministic: 结果只取决于(data, config)时设为True，执行接口会缓存其响应
+    time_limit: 单次执行的时间预算（秒），为空时使用全局的execution_time_limit
+    memory_limit_mb: 单次执行可新增的内存预算（MB），只对进程池中执行的算法生效
+    """
+    metadata = AlgorithmMetadata(
+        name=name,
+        display_name=display_name,
+        category=category,
+        description=description,
+        complexity_time=complexity_time,
+        complexity_space=complexity_space
+    )
+    
     def decorator(cls: Type[BaseAlgorithm]):
         # 注册到全局注册器
-        algorithm_registry.register(name, cls)
+        algorithm_registry.register(
+            name, cls,
+            {"executor": executor, "deterministic": deterministic,
+             "time_limit": time_limit, "memory_limit_mb": memory_limit_mb},
+            metadata
+        )
         return cls
     
     return decorator
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+确定性算法的结果缓存
+对注册时声明deterministic=True的算法，相同请求直接返回已序列化的响应体，
+并通过ETag / If-None-Match支持304，既不重新执行也不重新序列化；
+配置了共享存储时同时写入SQLite，其他工作进程的内存缓存未命中时从中读取
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+from app.core.settings import settings
+from app.core.shared_store import RESULT_NAMESPACE, SharedStore, shared_store
+from app.models.algorithm import AlgorithmExecuteRequest
+
+
+class CachedResult(NamedTuple):
+    """缓存条目：ETag、序列化后的响应体、过期时间"""
+    etag: str
+    body: bytes
+    expires_at: float
+
+
+def request_key(algorithm_name: str, request: AlgorithmExecuteRequest,
+                media_type: str = "application/json") -> str:
+    """请求的规范哈希：字典键排序，与字段顺序和空白无关；不同响应格式分别缓存"""
+    canonical = json.dumps(
+        {"algorithm": algorithm_name, "request": request.dict(), "media_type": media_type},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """按条目数限制的LRU缓存，条目超过ttl秒后失效；store为可选的跨进程共享存储"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, store: Optional[SharedStore] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """获取未过期的条目"""
+        entry = self._get_local(key)
+        return entry if entry is not None else self._get_shared(key)
+
+    async def get_async(self, key: str) -> Optional[CachedResult]:
+        """同get，内存缓存未命中时在线程中读取共享存储，不阻塞事件循环"""
+        entry = self._get_local(key)
+        if entry is not None:
+            return entry
+        if self.store is None:
+            return self._get_shared(key)
+        return await asyncio.to_thread(self._get_shared, key)
+
+    def _get_local(self, key: str) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def _get_shared(self, key: str) -> Optional[CachedResult]:
+        entry = self._load_shared(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry
+
+    def _load_shared(self, key: str) -> Optional[CachedResult]:
+        """从共享存储读取其他工作进程缓存的响应体，值为 ETag + 换行 + 响应体"""
+        if self.store is None:
+            return None
+        stored = self.store.get_entry(RESULT_NAMESPACE, key)
+        if stored is None:
+            return None
+        value, remaining = stored
+        etag, _, body = value.partition(b"\n")
+        ttl = self.ttl if remaining is None else min(remaining, self.ttl)
+        return CachedResult(etag.decode("ascii"), body, time.monotonic() + ttl)
+
+    def _remember(self, key: str, entry: CachedResult):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, body: bytes) -> CachedResult:
+        """保存序列化后的响应体，返回带ETag的条目（配置了共享存储时会写SQLite，异步代码中用put_async）"""
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = CachedResult(etag, body, time.monotonic() + self.ttl)
+        with self._lock:
+            self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(RESULT_NAMESPACE, key, etag.encode("ascii") + b"\n" + body, self.ttl)
+        return entry
+
+    async def put_async(self, key: str, body: bytes) -> CachedResult:
+        """同put，配置了共享存储时在线程中写入，不阻塞事件循环"""
+        if self.store is None:
+            return self.put(key, body)
+        return await asyncio.to_thread(self.put, key, body)
+
+    def clear(self):
+        """清空缓存（包括共享存储中的条目）并重置命中统计"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.store is not None:
+            self.store.clear(RESULT_NAMESPACE)
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断If-None-Match是否包含etag（支持逗号分隔的多个值、弱校验前缀和*）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+# 全局结果缓存实例
+result_cache = ResultCache(
+    max_entries=settings.result_cache_size,
+    ttl=settings.result_cache_ttl,
+    store=shared_store
+)
@@ -0,0 +1,130 @@
+"""
+执行结果存储
+执行结果以运行ID保存在服务端，前端按窗口或单步随机读取步骤，
+无需一次性下载完整轨迹；按运行数与总步骤数限制内存，超出时淘汰最久未访问的运行。
+配置了共享存储时运行同时写入SQLite，请求落到其他工作进程时从中载入
+"""
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.core.settings import settings
+from app.core.shared_store import RUN_NAMESPACE, SharedStore, shared_store
+from app.core.trace import TRACE_FORMAT_DELTA, TRACE_FORMAT_FULL, decode_range
+from app.models.algorithm import AlgorithmResult
+
+# 单次请求最多返回的步骤数
+MAX_STEP_WINDOW = 1000
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+class StoredRun:
+    """一次已完成的执行"""
+
+    def __init__(self, run_id: str, algorithm_name: str, result: AlgorithmResult):
+        self.run_id = run_id
+        self.algorithm_name = algorithm_name
+        self.result = result
+        if result.trace is not None:
+            self.trace_format = TRACE_FORMAT_DELTA
+            self.step_count = result.trace["step_count"]
+        else:
+            self.trace_format = TRACE_FORMAT_FULL
+            self.step_count = len(result.steps)
+
+    def summary(self) -> Dict[str, Any]:
+        """运行概要，不含步骤"""
+        return {
+            "run_id": self.run_id,
+            "algorithm_name": self.algorithm_name,
+            "step_count": self.step_count,
+            "trace_format": self.trace_format,
+            "final_result": self.result.final_result,
+            "performance_metrics": self.result.performance_metrics,
+            "execution_time": self.result.execution_time,
+            "created_at": self.result.created_at,
+        }
+
+    def steps(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """读取[start, stop)范围内的完整步骤，增量轨迹在此解码"""
+        stop = min(stop, self.step_count)
+        if self.result.trace is not None:
+            return decode_range(self.result.trace, start, stop)
+        steps = self.result.steps
+        return [steps[index].to_dict() for index in range(max(0, start), stop)]
+
+
+class RunStore:
+    """带LRU淘汰的运行存储；store为可选的跨进程共享存储"""
+
+    def __init__(self, max_runs: int = 64, max_steps: int = 2000000, store: Optional[SharedStore] = None):
+        self.max_runs = max_runs
+        self.max_steps = max_steps
+        self.store = store
+        self._runs: "OrderedDict[str, StoredRun]" = OrderedDict()
+        self._total_steps = 0
+        self._lock = threading.Lock()
+
+    def add(self, algorithm_name: str, result: AlgorithmResult,
+            run_id: Optional[str] = None, ttl: Optional[float] = None) -> StoredRun:
+        """保存执行结果，未指定run_id时分配运行ID；ttl只作用于共享存储中的副本"""
+        run = StoredRun(run_id or new_run_id(), algorithm_name, result)
+        self._remember(run)
+        if self.store is not None:
+            self.store.set(RUN_NAMESPACE, run.run_id,
+                           pickle.dumps((algorithm_name, result), protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        return run
+
+    def _remember(self, run: StoredRun):
+        with self._lock:
+            self._runs[run.run_id] = run
+            self._total_steps += run.step_count
+            # 至少保留刚加入的运行
+            while len(self._runs) > 1 and (len(self._runs) > self.max_runs or
+                                           self._total_steps > self.max_steps):
+                _, evicted = self._runs.popitem(last=False)
+                self._total_steps -= evicted.step_count
+
+    def get(self, run_id: str) -> StoredRun:
+        """获取运行，不存在或已被淘汰时抛出ValueError"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                self._runs.move_to_end(run_id)
+                return run
+        
+        # 运行可能由其他工作进程保存（值由本服务写入，可以安全地反序列化）
+        value = self.store.get(RUN_NAMESPACE, run_id) if self.store is not None else None
+        if value is None:
+            raise ValueError(f"Run {run_id} not found")
+        algorithm_name, result = pickle.loads(value)
+        run = StoredRun(run_id, algorithm_name, result)
+        self._remember(run)
+        return run
+
+    def delete(self, run_id: str):
+        """删除运行"""
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is not None:
+                self._total_steps -= run.step_count
+        deleted = self.store is not None and self.store.delete(RUN_NAMESPACE, run_id)
+        if run is None and not deleted:
+            raise ValueError(f"Run {run_id} not found")
+
+    def stats(self) -> Dict[str, int]:
+        """存储占用情况"""
+        with self._lock:
+            return {"runs": len(self._runs), "steps": self._total_steps}
+
+
+# 全局运行存储实例
+run_store = RunStore(
+    max_runs=settings.run_store_max_runs,
+    max_steps=settings.run_store_max_steps,
+    store=shared_store
+)
@@ -0,0 +1,63 @@
+"""
+响应序列化
+执行结果直接编码为JSON字节（有orjson时使用orjson），不经过response_model的校验与jsonable_encoder；
+客户端在Accept中声明application/msgpack且安装了msgpack时返回MessagePack
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+from pydantic import BaseModel
+from app.core.step_log import StepLog
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装orjson时退回标准库
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MEDIA_TYPE_JSON = "application/json"
+MEDIA_TYPE_MSGPACK = "application/msgpack"
+
+
+def _default(obj: Any) -> Any:
+    """编码器无法直接处理的类型：pydantic模型取字段字典，集合转为列表，其余转为字符串"""
+    if isinstance(obj, StepLog):
+        return obj.to_dicts()
+    if isinstance(obj, BaseModel):
+        # v1模型的__dict__就是字段值，嵌套模型由编码器继续回调本函数
+        return obj.__dict__
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """编码为JSON字节"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(obj: Any) -> bytes:
+    """编码为MessagePack字节"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """根据Accept选择响应格式，不支持时使用JSON"""
+    if msgpack is not None and accept and MEDIA_TYPE_MSGPACK in accept:
+        return MEDIA_TYPE_MSGPACK
+    return MEDIA_TYPE_JSON
+
+
+def encode(obj: Any, media_type: str = MEDIA_TYPE_JSON) -> Tuple[bytes, str]:
+    """按指定格式编码，返回 (字节, media_type)"""
+    if media_type == MEDIA_TYPE_MSGPACK:
+        return dumps_msgpack(obj), MEDIA_TYPE_MSGPACK
+    return dumps_json(obj), MEDIA_TYPE_JSON
@@ -0,0 +1,61 @@
+import os
+from typing import List, Optional
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    """后端运行配置，可通过ALGO_前缀的环境变量覆盖"""
+
+    # 执行器：轻量算法使用线程池，CPU密集算法使用进程池
+    thread_workers: int = 4
+    # 每个工作进程的进程池大小；多工作进程部署（app.server）未设置时按CPU核心数除以工作进程数
+    process_workers: int = max(1, os.cpu_count() or 1)
+    # 每个执行池允许排队等待的最大请求数，超出后返回503
+    max_queue: int = 32
+    # 进程池启动方式，spawn最安全；fork启动更快但要求父进程中没有其他线程
+    process_start_method: str = "spawn"
+
+    # 单次执行的默认时间预算（秒），同时是算法与请求可设置的上限
+    execution_time_limit: float = 120.0
+
+    # 算法清单文件路径，为空时使用算法包的__pycache__/algorithm_manifest.json
+    manifest_path: Optional[str] = None
+
+    # 单次执行最多记录的步骤数，请求中的max_steps会被截断到此值
+    max_trace_steps: int = 100000
+
+    # 为所有执行开启剖析（峰值内存、记录步骤耗时、轨迹大小），也可以在请求中按次开启
+    profile_executions: bool = False
+
+    # 响应压缩：小于该字节数的完整响应不压缩；按偏好顺序协商编码，br与zstd需要安装brotli、zstandard
+    compression_min_size: int = 1024
+    compression_encodings: List[str] = ["zstd", "br", "gzip"]
+
+    # 多工作进程共享的缓存目录：设置后结果缓存与保存的运行同时写入该目录下的SQLite，
+    # 石头分配的解缓存未单独配置目录时也使用它；多工作进程启动时默认为backend/.cache
+    shared_cache_dir: Optional[str] = None
+
+    # 确定性算法的结果缓存：最多缓存的响应数与有效期（秒）
+    result_cache_size: int = 256
+    result_cache_ttl: float = 300.0
+
+    # 服务端保存的执行结果：最多保存的运行数与步骤总数，超出时淘汰最久未访问的运行
+    run_store_max_runs: int = 64
+    run_store_max_steps: int = 2000000
+
+    # 异步运行（POST /runs）：同时执行的运行数、最多排队的运行数、
+    # 完成后保留状态与结果的时间（秒），以及WebSocket推送进度的间隔（秒）
+    job_workers: int = 2
+    job_max_queued: int = 256
+    job_ttl: float = 3600.0
+    job_progress_interval: float = 0.5
+
+    # 石头分配问题的解缓存：内存LRU条目数，以及可选的磁盘缓存目录（为空时只使用内存缓存）
+    solution_cache_size: int = 1024
+    solution_cache_dir: Optional[str] = None
+
+    class Config:
+        env_prefix = "ALGO_"
+
+
+settings = Settings()
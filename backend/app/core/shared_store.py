@@ -0,0 +1,129 @@
+"""
+多工作进程共享的缓存存储
+基于SQLite（WAL模式）的键值存储，按命名空间区分用途，条目可带有效期；
+多个uvicorn工作进程打开同一个文件，结果缓存与保存的运行在工作进程之间共享
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from app.core.settings import settings
+
+DB_FILENAME = "shared_cache.sqlite3"
+
+# 每写入多少次清理一次过期与超出上限的条目
+PURGE_EVERY = 64
+
+
+class SharedStore:
+    """按命名空间存放字节值的键值存储
+
+    每个线程使用自己的连接（连接不能跨线程，也不能跨fork使用）；
+    每个命名空间最多保留max_entries条，超出时删除最早写入的条目
+    """
+
+    def __init__(self, directory: str, max_entries: Optional[Dict[str, int]] = None):
+        self.directory = directory
+        self.path = os.path.join(directory, DB_FILENAME)
+        self.max_entries = dict(max_entries or {})
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "namespace TEXT, key TEXT, value BLOB, expires_at REAL, stored_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_stored ON entries (namespace, stored_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """当前线程的连接，fork后的子进程重新打开"""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            # WAL模式下多个工作进程可以同时读，写入时不阻塞读；NORMAL同步级别下提交不必每次fsync
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def get_entry(self, namespace: str, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        """读取未过期的条目，返回(值, 剩余有效期秒数或None)，不存在时返回None"""
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), None if row[1] is None else row[1] - now
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """读取未过期的值，不存在时返回None"""
+        entry = self.get_entry(namespace, key)
+        return None if entry is None else entry[0]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        """写入值，ttl为有效期（秒），为None时不过期"""
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, value, None if ttl is None else now + ttl, now)
+        )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """删除条目，返回条目是否存在"""
+        cursor = self._connection().execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def clear(self, namespace: str):
+        """删除命名空间中的所有条目"""
+        self._connection().execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def count(self, namespace: str) -> int:
+        """命名空间中的条目数（含尚未清理的过期条目）"""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def purge(self):
+        """删除过期条目，以及各命名空间超出上限的最早条目"""
+        conn = self._connection()
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        for namespace, limit in self.max_entries.items():
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key NOT IN ("
+                "SELECT key FROM entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT ?)",
+                (namespace, namespace, limit)
+            )
+
+
+RESULT_NAMESPACE = "result"
+RUN_NAMESPACE = "run"
+JOB_NAMESPACE = "job"
+
+
+def create_shared_store() -> Optional[SharedStore]:
+    """按配置创建共享存储，未配置目录时返回None（单进程部署只使用内存缓存）"""
+    if not settings.shared_cache_dir:
+        return None
+    return SharedStore(settings.shared_cache_dir, {
+        RESULT_NAMESPACE: settings.result_cache_size,
+        RUN_NAMESPACE: settings.run_store_max_runs,
+        JOB_NAMESPACE: settings.job_max_queued + settings.run_store_max_runs,
+    })
+
+
+# 全局共享存储实例
+shared_store = create_shared_store()
@@ -0,0 +1,59 @@
+"""
+进行中请求的合并（single-flight）
+相同键的并发调用共享一次执行：第一个调用启动执行，之后的调用等待同一个结果；
+执行不属于任何一个调用，某个调用方被取消（如客户端断开）时只是停止等待，
+所有调用方都离开后才取消执行
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """一次共享的执行及其等待者数"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按键合并进行中的异步调用"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """执行func或加入相同键进行中的执行，返回(结果, 是否复用了进行中的执行)
+
+        执行抛出的异常传给所有等待者；结果对象由所有等待者共享，调用方不应修改
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # 之后的相同调用启动新的执行，不加入正在取消的执行
+                call.task.cancel()
+                self._forget(key, call)
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """进行中的执行数"""
+        return len(self._calls)
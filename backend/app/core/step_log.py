@@ -0,0 +1,92 @@
+"""
+步骤记录
+算法执行过程中按列追加步骤：编号、动作编码、时间戳存放在紧凑数组中，动作名称只保存一份，
+只有在接口边界才转换为字典或pydantic模型，避免在算法热循环中为每一步做模型校验
+"""
+from array import array
+from typing import Any, Dict, Iterator, List
+
+
+class StepRecord:
+    """单个步骤的只读视图"""
+    __slots__ = ("step_id", "action", "data_snapshot", "highlight", "description", "timestamp")
+
+    def __init__(self, step_id: int, action: str, data_snapshot: Dict[str, Any],
+                 highlight: List[int], description: str, timestamp: float):
+        self.step_id = step_id
+        self.action = action
+        self.data_snapshot = data_snapshot
+        self.highlight = highlight
+        self.description = description
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StepLog:
+    """按列存储、只追加的步骤记录"""
+
+    def __init__(self):
+        self.actions: List[str] = []  # 动作名称表，下标即动作编码
+        self._action_codes: Dict[str, int] = {}
+        self.step_ids = array("q")
+        self.action_codes = array("H")
+        self.timestamps = array("d")
+        self.snapshots: List[Dict[str, Any]] = []
+        self.highlights: List[List[int]] = []
+        self.descriptions: List[str] = []
+
+    def append(self, step_id: int, action: str, data_snapshot: Dict[str, Any],
+               highlight: List[int], description: str, timestamp: float):
+        """追加一个步骤"""
+        code = self._action_codes.get(action)
+        if code is None:
+            code = self._action_codes[action] = len(self.actions)
+            self.actions.append(action)
+        self.step_ids.append(step_id)
+        self.action_codes.append(code)
+        self.timestamps.append(timestamp)
+        self.snapshots.append(data_snapshot)
+        self.highlights.append(highlight)
+        self.descriptions.append(description)
+
+    def __len__(self) -> int:
+        return len(self.step_ids)
+
+    def __getitem__(self, index: int) -> StepRecord:
+        return StepRecord(
+            self.step_ids[index],
+            self.actions[self.action_codes[index]],
+            self.snapshots[index],
+            self.highlights[index],
+            self.descriptions[index],
+            self.timestamps[index]
+        )
+
+    def __iter__(self) -> Iterator[StepRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为可直接JSON编码的字典列表"""
+        actions = self.actions
+        return [
+            {
+                "step_id": step_id,
+                "action": actions[code],
+                "data_snapshot": snapshot,
+                "highlight": highlight,
+                "description": description,
+                "timestamp": timestamp,
+            }
+            for step_id, code, snapshot, highlight, description, timestamp in zip(
+                self.step_ids, self.action_codes, self.snapshots,
+                self.highlights, self.descriptions, self.timestamps
+            )
+        ]
+
+    def to_models(self) -> List["AlgorithmStep"]:
+        """转换为pydantic模型列表"""
+        from app.models.algorithm import AlgorithmStep
+        return [AlgorithmStep(**step) for step in self.to_dicts()]
@@ -0,0 +1,88 @@
+"""
+步骤流式输出
+把算法在工作线程中产生的步骤桥接到异步消费者（NDJSON / WebSocket）
+"""
+import asyncio
+import queue
+from typing import Any, AsyncIterator, List
+
+# 流结束标记
+_END = object()
+
+
+class StreamClosed(Exception):
+    """消费者已断开，生产者应停止执行"""
+    pass
+
+
+class StepStream:
+    """线程安全的有界步骤流
+
+    生产者（算法线程）调用put，缓冲区满时阻塞，从而对算法形成背压；
+    消费者（事件循环）通过batches异步批量读取
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_buffer: int = 1024,
+                 max_batch: int = 256):
+        self._loop = loop
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_buffer)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.max_batch = max_batch
+
+    def _notify(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # 事件循环已关闭
+            self._closed = True
+
+    def put(self, item: Any):
+        """写入一条消息（在生产者线程中调用）"""
+        while True:
+            if self._closed:
+                raise StreamClosed()
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._notify()
+
+    def finish(self):
+        """标记流结束（在生产者线程中调用）"""
+        try:
+            self.put(_END)
+        except StreamClosed:
+            pass
+
+    def close(self):
+        """消费者断开时调用，通知生产者停止"""
+        self._closed = True
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def batches(self) -> AsyncIterator[List[Any]]:
+        """异步批量读取消息，直到流结束"""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+
+            batch: List[Any] = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    if batch:
+                        yield batch
+                    return
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
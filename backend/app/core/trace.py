@@ -0,0 +1,418 @@
+"""
+步骤轨迹编码
+关键帧 + 增量(delta)的紧凑轨迹格式：每隔N步保存一次完整快照，
+其余步骤只记录相对上一步发生变化的键或数组下标；
+列式(columnar)格式：同一字段在所有步骤中的值存为一列，数值列打包为base64编码的定长数组，
+字符串列使用去重的字符串表，键名只出现一次
+"""
+import base64
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+from app.core.step_log import StepLog
+
+TRACE_FORMAT_FULL = "full"
+TRACE_FORMAT_DELTA = "delta"
+TRACE_FORMAT_COLUMNAR = "columnar"
+
+DEFAULT_KEYFRAME_INTERVAL = 50
+
+
+def diff_snapshot(prev: Dict[str, Any], curr: Dict[str, Any]) -> Dict[str, Any]:
+    """计算两个快照之间的增量
+
+    返回格式:
+        set:   整体替换的键值
+        patch: 等长列表的下标修改 [[index, value], ...]，或嵌套字典的增量
+        unset: 被删除的键
+    没有变化的部分不会出现在结果中
+    """
+    delta: Dict[str, Any] = {}
+    changed: Dict[str, Any] = {}
+    patched: Dict[str, Any] = {}
+
+    for key, value in curr.items():
+        if key not in prev:
+            changed[key] = value
+            continue
+
+        old = prev[key]
+        if old is value or old == value:
+            continue
+
+        if isinstance(old, list) and isinstance(value, list) and len(old) == len(value):
+            changes = [[i, v] for i, (o, v) in enumerate(zip(old, value)) if o != v]
+            # 变化过多时直接整体替换更紧凑
+            if len(changes) * 2 < len(value):
+                patched[key] = changes
+            else:
+                changed[key] = value
+        elif isinstance(old, dict) and isinstance(value, dict):
+            patched[key] = diff_snapshot(old, value)
+        else:
+            changed[key] = value
+
+    removed = [key for key in prev if key not in curr]
+
+    if changed:
+        delta["set"] = changed
+    if patched:
+        delta["patch"] = patched
+    if removed:
+        delta["unset"] = removed
+    return delta
+
+
+def apply_delta(snapshot: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """将增量应用到快照上，返回新的快照（不修改原快照）"""
+    result = dict(snapshot)
+
+    for key in delta.get("unset", []):
+        result.pop(key, None)
+
+    for key, value in delta.get("set", {}).items():
+        result[key] = value
+
+    for key, changes in delta.get("patch", {}).items():
+        old = result[key]
+        if isinstance(old, dict):
+            result[key] = apply_delta(old, changes)
+        else:
+            patched = list(old)
+            for index, value in changes:
+                patched[index] = value
+            result[key] = patched
+
+    return result
+
+
+class DeltaTraceEncoder:
+    """增量轨迹编码器
+
+    在算法执行过程中逐步编码步骤，只保留关键帧与增量，
+    内存占用随变化量增长，而不是随快照大小 × 步骤数增长
+    """
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval必须大于0")
+        self.keyframe_interval = keyframe_interval
+        self.reset()
+
+    def reset(self):
+        """清空已编码的步骤"""
+        self.entries: List[Dict[str, Any]] = []
+        self._prev_snapshot: Optional[Dict[str, Any]] = None
+        self._encoded = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keyframe_due(self) -> bool:
+        """下一个步骤是否按间隔保存为关键帧"""
+        return self._encoded % self.keyframe_interval == 0
+
+    def encode(self, step_id: int, action: str, data_snapshot: Optional[Dict[str, Any]],
+               highlight: List[int], description: str, timestamp: float,
+               delta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """编码一个步骤并返回编码结果，不保存（用于流式输出）
+
+        调用方已知相对上一步的增量（如TrackedState的修改记录）时传入delta，此时data_snapshot可以为None；
+        关键帧到期时必须传入data_snapshot
+        """
+        entry = {
+            "step_id": step_id,
+            "action": action,
+            "highlight": highlight,
+            "description": description,
+            "timestamp": timestamp,
+        }
+
+        if delta is not None and not self.keyframe_due():
+            entry["delta"] = delta
+            # 之后若传入普通快照，没有可比较的上一步快照，保存为关键帧
+            data_snapshot = None
+        elif self._prev_snapshot is None or self.keyframe_due():
+            entry["keyframe"] = data_snapshot
+        else:
+            entry["delta"] = diff_snapshot(self._prev_snapshot, data_snapshot)
+
+        self._prev_snapshot = data_snapshot
+        self._encoded += 1
+        return entry
+
+    def add(self, step_id: int, action: str, data_snapshot: Optional[Dict[str, Any]],
+            highlight: List[int], description: str, timestamp: float,
+            delta: Optional[Dict[str, Any]] = None):
+        """编码一个步骤并保存"""
+        self.entries.append(self.encode(step_id, action, data_snapshot,
+                                        highlight, description, timestamp, delta))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可序列化的轨迹"""
+        return {
+            "format": TRACE_FORMAT_DELTA,
+            "keyframe_interval": self.keyframe_interval,
+            "step_count": len(self.entries),
+            "steps": self.entries,
+        }
+
+
+def decode_step(trace: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """从增量轨迹中重建第index步的完整步骤数据"""
+    entries = trace["steps"]
+    if index < 0 or index >= len(entries):
+        raise IndexError(f"Step {index} out of range")
+
+    # 找到不晚于index的最近关键帧
+    start = index
+    while "keyframe" not in entries[start]:
+        start -= 1
+
+    snapshot = entries[start]["keyframe"]
+    for entry in entries[start + 1:index + 1]:
+        snapshot = apply_delta(snapshot, entry["delta"])
+
+    step = {key: value for key, value in entries[index].items()
+            if key not in ("keyframe", "delta")}
+    step["data_snapshot"] = snapshot
+    return step
+
+
+def decode_range(trace: Dict[str, Any], start: int, stop: int) -> List[Dict[str, Any]]:
+    """从增量轨迹中重建[start, stop)范围内的完整步骤，只从最近的关键帧顺序解码一次"""
+    entries = trace["steps"]
+    start, stop = max(0, start), min(stop, len(entries))
+    if start >= stop:
+        return []
+
+    first = start
+    while "keyframe" not in entries[first]:
+        first -= 1
+
+    steps = []
+    snapshot: Dict[str, Any] = {}
+    for index in range(first, stop):
+        entry = entries[index]
+        if "keyframe" in entry:
+            snapshot = entry["keyframe"]
+        else:
+            snapshot = apply_delta(snapshot, entry["delta"])
+        if index >= start:
+            step = {key: value for key, value in entry.items() if key not in ("keyframe", "delta")}
+            step["data_snapshot"] = snapshot
+            steps.append(step)
+    return steps
+
+
+# 整数列按取值范围选用最窄的类型，其余数值列使用float64；均为小端字节序
+_INT_DTYPES = (("i1", "b", 1 << 7), ("i2", "h", 1 << 15), ("i4", "i", 1 << 31))
+_DTYPE_CODES = {"i1": "b", "i2": "h", "i4": "i", "f8": "d"}
+_MAX_SAFE_INTEGER = 1 << 53
+_MISSING = object()
+
+
+def _safe_numbers(values: List[Any], types) -> bool:
+    """整数超出float64能精确表示的范围时不能打包"""
+    if int not in types or not values:
+        return True
+    integers = [value for value in values if type(value) is int] if float in types else values
+    return -_MAX_SAFE_INTEGER <= min(integers) and max(integers) <= _MAX_SAFE_INTEGER
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _pack_numbers(values: List[Any]) -> Dict[str, Any]:
+    """打包数值列表，返回 {dtype, data}"""
+    dtype, code = "f8", "d"
+    if float not in set(map(type, values)):
+        low, high = (min(values), max(values)) if values else (0, 0)
+        for candidate, candidate_code, bound in _INT_DTYPES:
+            if -bound <= low and high < bound:
+                dtype, code = candidate, candidate_code
+                break
+    packed = array(code, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return {"dtype": dtype, "data": _b64(packed.tobytes())}
+
+
+def _unpack_numbers(packed: Dict[str, Any]) -> List[Any]:
+    values = array(_DTYPE_CODES[packed["dtype"]])
+    values.frombytes(base64.b64decode(packed["data"]))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+
+def _pack_bits(flags: List[bool]) -> str:
+    """布尔列表打包为位图（低位在前）"""
+    bits = bytearray((len(flags) + 7) // 8)
+    for index, flag in enumerate(flags):
+        if flag:
+            bits[index >> 3] |= 1 << (index & 7)
+    return _b64(bytes(bits))
+
+
+def _unpack_bits(data: str, count: int) -> List[bool]:
+    bits = base64.b64decode(data)
+    return [bool(bits[index >> 3] & (1 << (index & 7))) for index in range(count)]
+
+
+def _shared_rows(values: List[List[Any]]):
+    """数组列中重复的行较多时（如只有交换才改变的数组快照），返回(去重后的行, 每行的编号)"""
+    item_types = set()
+    for value in values:
+        item_types.update(map(type, value))
+    if item_types & {list, dict}:
+        return None
+    codes: Dict[Any, int] = {}
+    if len(item_types) <= 1:
+        indexes = [codes.setdefault(tuple(value), len(codes)) for value in values]
+        rows = [list(key) for key in codes]
+    else:
+        # 元素类型混合时键中带上类型，避免1、1.0与True被视为同一行
+        indexes = [codes.setdefault((tuple(map(type, value)), tuple(value)), len(codes)) for value in values]
+        rows = [list(key[1]) for key in codes]
+    if len(codes) * 2 > len(values):
+        return None
+    return rows, indexes
+
+
+def pack_column(values: List[Any]) -> Dict[str, Any]:
+    """把一列值打包为列式编码
+
+    number: 数值打包为定长数组；boolean: 位图；string: 字符串表 + 编码；
+    table: 重复较多的数组列，去重后的行 + 编码；list: 各行长度 + 展开后的元素列（可嵌套）；
+    object: 每个键一列；其余类型原样保存(json)。
+    字典中缺少某个键的行由present位图标记，数据中不占位置
+    """
+    column: Dict[str, Any] = {}
+    if any(value is _MISSING for value in values):
+        column["present"] = _pack_bits([value is not _MISSING for value in values])
+        values = [value for value in values if value is not _MISSING]
+
+    types = set(map(type, values))
+    if types <= {int, float} and _safe_numbers(values, types):
+        column.update(type="number", **_pack_numbers(values))
+    elif types == {bool}:
+        column.update(type="boolean", data=_pack_bits(values))
+    elif types == {str}:
+        codes: Dict[str, int] = {}
+        indexes = [codes.setdefault(value, len(codes)) for value in values]
+        # 大多数值互不相同（如步骤描述）时字符串表没有收益
+        if len(codes) * 2 <= len(values):
+            column.update(type="string", table=list(codes), codes=_pack_numbers(indexes))
+        else:
+            column.update(type="json", values=values)
+    elif types == {list}:
+        rows = _shared_rows(values)
+        if rows is not None:
+            table, indexes = rows
+            column.update(type="table", table=pack_column(table), codes=_pack_numbers(indexes))
+            return column
+        lengths = [len(value) for value in values]
+        column["type"] = "list"
+        if len(set(lengths)) == 1:
+            column["length"] = lengths[0]
+        else:
+            column["lengths"] = _pack_numbers(lengths)
+        column["items"] = pack_column([item for value in values for item in value])
+    elif types == {dict}:
+        keys: Dict[str, None] = {}
+        for value in values:
+            keys.update(dict.fromkeys(value))
+        column.update(type="object", columns={
+            key: pack_column([value.get(key, _MISSING) for value in values]) for key in keys
+        })
+    else:
+        column.update(type="json", values=values)
+    return column
+
+
+def unpack_column(column: Dict[str, Any], count: int) -> List[Any]:
+    """解码pack_column的结果，缺少的行为_MISSING"""
+    present = _unpack_bits(column["present"], count) if "present" in column else None
+    size = sum(present) if present is not None else count
+
+    kind = column["type"]
+    if kind == "number":
+        values = _unpack_numbers(column)
+    elif kind == "boolean":
+        values = _unpack_bits(column["data"], size)
+    elif kind == "string":
+        table = column["table"]
+        values = [table[code] for code in _unpack_numbers(column["codes"])]
+    elif kind == "table":
+        codes = _unpack_numbers(column["codes"])
+        table = unpack_column(column["table"], max(codes) + 1 if codes else 0)
+        values = [list(table[code]) for code in codes]
+    elif kind == "list":
+        lengths = _unpack_numbers(column["lengths"]) if "lengths" in column else [column["length"]] * size
+        items = unpack_column(column["items"], sum(lengths))
+        values, offset = [], 0
+        for length in lengths:
+            values.append(items[offset:offset + length])
+            offset += length
+    elif kind == "object":
+        fields = {key: unpack_column(sub, size) for key, sub in column["columns"].items()}
+        values = [
+            {key: field[index] for key, field in fields.items() if field[index] is not _MISSING}
+            for index in range(size)
+        ]
+    else:
+        values = column["values"]
+
+    if present is None:
+        return values
+    iterator = iter(values)
+    return [next(iterator) if flag else _MISSING for flag in present]
+
+
+class ColumnarTraceEncoder:
+    """列式轨迹编码器
+
+    执行过程中按列追加步骤，导出时把每个字段打包为一列；
+    只用于一次性返回完整轨迹，不支持逐步流式输出
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清空已记录的步骤"""
+        self.log = StepLog()
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    def add(self, step_id: int, action: str, data_snapshot: Dict[str, Any],
+            highlight: List[int], description: str, timestamp: float):
+        """记录一个步骤"""
+        self.log.append(step_id, action, data_snapshot, highlight, description, timestamp)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为列式轨迹"""
+        log = self.log
+        return {
+            "format": TRACE_FORMAT_COLUMNAR,
+            "step_count": len(log),
+            "columns": {
+                "step_id": pack_column(log.step_ids.tolist()),
+                "action": {"type": "string", "table": list(log.actions),
+                           "codes": _pack_numbers(log.action_codes.tolist())},
+                "timestamp": pack_column(log.timestamps.tolist()),
+                "highlight": pack_column(log.highlights),
+                "description": pack_column(log.descriptions),
+                "data_snapshot": pack_column(log.snapshots),
+            },
+        }
+
+
+def decode_columnar(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """把列式轨迹还原为完整步骤列表"""
+    count = trace["step_count"]
+    fields = {key: unpack_column(column, count) for key, column in trace["columns"].items()}
+    return [{key: field[index] for key, field in fields.items()} for index in range(count)]
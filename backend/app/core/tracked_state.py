@@ -0,0 +1,288 @@
+"""
+可追踪的算法状态
+算法直接修改TrackedList / TrackedDict，修改（下标赋值、交换、计数递增）被记录下来；
+记录步骤时框架才按需生成快照或增量：未修改的字段复用上一次的快照对象，
+增量轨迹直接由修改记录生成，不再逐步复制并比较整个数组
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set
+
+
+class TrackedList:
+    """记录修改下标的数组
+
+    snapshot()返回的列表在下一次修改前被所有步骤共享，调用方不能修改它
+    """
+
+    __slots__ = ("_items", "_dirty", "_resized", "_snapshot")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._items = list(items)
+        self._dirty: Set[int] = set()
+        self._resized = False
+        self._snapshot: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index: int, value: Any):
+        self._items[index] = value
+        self._dirty.add(index % len(self._items))
+        self._snapshot = None
+
+    def __repr__(self) -> str:
+        return f"TrackedList({self._items!r})"
+
+    def swap(self, i: int, j: int):
+        """交换两个位置的元素"""
+        items = self._items
+        items[i], items[j] = items[j], items[i]
+        self._dirty.update((i % len(items), j % len(items)))
+        self._snapshot = None
+
+    def append(self, value: Any):
+        self._items.append(value)
+        self._resized = True
+        self._snapshot = None
+
+    def pop(self, index: int = -1) -> Any:
+        value = self._items.pop(index)
+        self._resized = True
+        self._snapshot = None
+        return value
+
+    def tolist(self) -> List[Any]:
+        """当前内容的独立副本"""
+        return list(self._items)
+
+    def snapshot(self) -> List[Any]:
+        """当前内容的快照，未修改时返回同一个列表"""
+        if self._snapshot is None:
+            self._snapshot = list(self._items)
+        return self._snapshot
+
+    def clear_changes(self):
+        self._dirty = set()
+        self._resized = False
+
+    def take_changes(self) -> Optional[List[List[Any]]]:
+        """返回上次调用以来的下标修改[[index, value], ...]并清空记录；长度变化或修改过多时返回None（需整体替换）"""
+        dirty, resized = self._dirty, self._resized
+        if not dirty and not resized:
+            return []
+        self._dirty = set()
+        self._resized = False
+        if resized or (dirty and len(dirty) * 2 >= len(self._items)):
+            return None
+        items = self._items
+        return [[index, items[index]] for index in sorted(dirty)]
+
+
+class TrackedDict:
+    """记录修改键的字典，适合性能计数等少量标量字段"""
+
+    __slots__ = ("_data", "_dirty", "_removed", "_snapshot")
+
+    def __init__(self, data: Optional[Mapping[str, Any]] = None):
+        self._data: Dict[str, Any] = dict(data or {})
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self._data[key] = value
+        self._dirty.add(key)
+        self._removed.discard(key)
+        self._snapshot = None
+
+    def __delitem__(self, key: str):
+        del self._data[key]
+        self._dirty.discard(key)
+        self._removed.add(key)
+        self._snapshot = None
+
+    def __repr__(self) -> str:
+        return f"TrackedDict({self._data!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def incr(self, key: str, amount: int = 1) -> Any:
+        """计数递增，返回新值"""
+        value = self._data.get(key, 0) + amount
+        self[key] = value
+        return value
+
+    def todict(self) -> Dict[str, Any]:
+        """当前内容的独立副本"""
+        return dict(self._data)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前内容的快照，未修改时返回同一个字典"""
+        if self._snapshot is None:
+            self._snapshot = dict(self._data)
+        return self._snapshot
+
+    def clear_changes(self):
+        self._dirty = set()
+        self._removed = set()
+
+    def take_changes(self) -> Dict[str, Any]:
+        """返回上次调用以来的增量（diff_snapshot格式）并清空记录"""
+        delta: Dict[str, Any] = {}
+        if not self._dirty and not self._removed:
+            return delta
+        if self._dirty:
+            delta["set"] = {key: self._data[key] for key in self._dirty}
+        if self._removed:
+            delta["unset"] = list(self._removed)
+        self._dirty = set()
+        self._removed = set()
+        return delta
+
+
+_TRACKED = (TrackedList, TrackedDict)
+
+
+class TrackedState:
+    """一个算法的全部可视化状态
+
+    字段可以是TrackedList、TrackedDict或普通值；普通值通过state[name] = value整体替换，
+    赋值后不应再原地修改。把state直接传给add_step的data_snapshot即可：
+    完整轨迹按字段复用未修改的快照，增量轨迹只输出修改记录。
+    只属于某个步骤的字段（如比较结果）用state.with_fields(...)附加，不会带到之后的步骤。
+    同一次执行中应始终传入同一个TrackedState，增量相对于它上一次被记录的步骤
+    """
+
+    def __init__(self, **fields: Any):
+        self._fields: Dict[str, Any] = {}
+        self._tracked: Dict[str, Any] = {}  # 字段中的TrackedList / TrackedDict
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._last_extra: Dict[str, Any] = {}
+        for name, value in fields.items():
+            self[name] = value
+
+    @property
+    def state(self) -> "TrackedState":
+        return self
+
+    @property
+    def extra(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._fields
+
+    def __getitem__(self, name: str) -> Any:
+        return self._fields[name]
+
+    def __setitem__(self, name: str, value: Any):
+        fields = self._fields
+        if name in fields and not isinstance(value, _TRACKED):
+            old = fields[name]
+            if old is value or (not isinstance(old, _TRACKED) and old == value):
+                return
+        fields[name] = value
+        if isinstance(value, _TRACKED):
+            self._tracked[name] = value
+        else:
+            self._tracked.pop(name, None)
+        self._changed.add(name)
+        self._removed.discard(name)
+
+    def __delitem__(self, name: str):
+        del self._fields[name]
+        self._tracked.pop(name, None)
+        self._changed.discard(name)
+        self._removed.add(name)
+
+    def with_fields(self, **extra: Any) -> "StateView":
+        """附加只属于本步骤的字段，字段名不能与状态字段重复"""
+        return StateView(self, extra)
+
+    def snapshot(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """当前状态的快照，未修改的字段与之前的快照共享同一个对象"""
+        snapshot = dict(self._fields)
+        for name, value in self._tracked.items():
+            snapshot[name] = value.snapshot()
+        if extra:
+            snapshot.update(extra)
+        return snapshot
+
+    def take_delta(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """返回上次记录以来的增量（diff_snapshot格式）并清空修改记录"""
+        changed: Dict[str, Any] = {}
+        patched: Dict[str, Any] = {}
+        tracked = self._tracked
+        for name in self._changed:
+            value = self._fields[name]
+            if name in tracked:
+                value.clear_changes()
+                value = value.snapshot()
+            changed[name] = value
+        for name, value in tracked.items():
+            if name in changed:
+                continue
+            changes = value.take_changes()
+            if changes is None:
+                changed[name] = value.snapshot()
+            elif changes:
+                patched[name] = changes
+
+        removed = list(self._removed)
+        last_extra = self._last_extra
+        extra = extra or {}
+        for name, value in extra.items():
+            if name not in last_extra or last_extra[name] != value:
+                changed[name] = value
+        removed.extend(name for name in last_extra if name not in extra)
+
+        delta: Dict[str, Any] = {}
+        if changed:
+            delta["set"] = changed
+        if patched:
+            delta["patch"] = patched
+        if removed:
+            delta["unset"] = removed
+        if self._changed:
+            self._changed = set()
+        if self._removed:
+            self._removed = set()
+        self._last_extra = extra
+        return delta
+
+    def mark_recorded(self, extra: Optional[Dict[str, Any]] = None):
+        """步骤以完整快照记录后清空修改记录"""
+        for value in self._tracked.values():
+            value.clear_changes()
+        self._changed = set()
+        self._removed = set()
+        self._last_extra = extra or {}
+
+
+class StateView:
+    """TrackedState加上只属于一个步骤的字段，由TrackedState.with_fields创建"""
+
+    __slots__ = ("state", "extra")
+
+    def __init__(self, state: TrackedState, extra: Dict[str, Any]):
+        self.state = state
+        self.extra = extra
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import algorithms
+from app.api import algorithms, metrics, runs
+from app.core.compression import CompressionMiddleware
+from app.core.executor import algorithm_executor
+from app.core.jobs import job_queue
+from app.core.metrics import MetricsMiddleware
 from app.core.registry import algorithm_registry
+from app.core.settings import settings
 
 app = FastAPI(
     title="Algorithm Visualization API",
@@ -16,15 +21,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# 响应压缩：在指标中间件内层，响应字节数统计的是实际传输的压缩后字节
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    encodings=settings.compression_encodings,
+)
+
+# 请求指标中间件：记录每个路由与算法的请求数、延迟和响应字节数
+app.add_middleware(MetricsMiddleware)
+
 # 注册API路由
 app.include_router(algorithms.router, prefix="/api")
+app.include_router(runs.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup_event():
     """启动时自动发现并注册算法"""
     algorithm_registry.discover_algorithms()
+    algorithm_executor.create_pools()
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """停止异步运行队列并关闭算法执行池"""
+    await job_queue.stop()
+    algorithm_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -1,6 +1,10 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+from app.core.step_log import StepLog
+from app.core.trace import DEFAULT_KEYFRAME_INTERVAL
+
+MAX_BATCH_ITEMS = 1000  # 单次批量执行最多的输入组数
 
 class AlgorithmStep(BaseModel):
     """算法执行步骤"""
@@ -30,17 +34,89 @@ class AlgorithmResult(BaseModel):
     """算法执行结果"""
     algorithm_name: str
     steps: List[AlgorithmStep]
+    trace: Optional[Dict[str, Any]] = None  # trace_format为delta或columnar时的紧凑轨迹，此时steps为空
     final_result: Any
     performance_metrics: Dict[str, Any]
     execution_time: float
     created_at: datetime
+    
+    class Config:
+        # 执行过程中steps为按列存储的StepLog，序列化时再展开
+        json_encoders = {StepLog: StepLog.to_dicts}
+
+class ExecutionOptions(BaseModel):
+    """执行选项：轨迹格式、步骤预算、剖析与时间上限"""
+    trace_format: Literal["full", "delta", "columnar"] = "full"  # columnar只用于一次性返回完整轨迹
+    keyframe_interval: int = Field(DEFAULT_KEYFRAME_INTERVAL, ge=1, le=10000)
+    max_steps: Optional[int] = Field(None, ge=1)  # 记录的步骤上限，超过服务端上限时被截断
+    sample_every: int = Field(1, ge=1)  # 非关键步骤每N步记录一次
+    profile: bool = False  # 统计峰值内存、记录步骤耗时与轨迹大小
+    timeout: Optional[float] = Field(None, gt=0)  # 执行时间上限（秒），不超过算法的时间预算
 
-class AlgorithmExecuteRequest(BaseModel):
+class AlgorithmExecuteRequest(ExecutionOptions):
     """算法执行请求"""
     data: Dict[str, Any]
     config: Dict[str, Any] = Field(default_factory=dict)
 
+class BatchItem(BaseModel):
+    """批量执行中的一组输入"""
+    data: Dict[str, Any] = Field(default_factory=dict)
+    config: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchExecuteRequest(ExecutionOptions):
+    """批量执行请求：执行选项对所有输入生效"""
+    items: List[BatchItem] = Field(..., min_items=1, max_items=MAX_BATCH_ITEMS)
+    include_steps: bool = False  # 为False时每项只返回final_result与performance_metrics
+    concurrency: Optional[int] = Field(None, ge=1)  # 同时执行的项数，不超过执行池的工作数
+
+    def item_request(self, item: BatchItem) -> AlgorithmExecuteRequest:
+        options = self.dict(exclude={"items", "include_steps", "concurrency"})
+        return AlgorithmExecuteRequest(data=item.data, config=item.config, **options)
+
 class AlgorithmListResponse(BaseModel):
     """算法列表响应"""
     algorithms: List[AlgorithmMetadata]
-    total: int
\ No newline at end of file
+    total: int
+
+class RunSummary(BaseModel):
+    """服务端保存的运行概要"""
+    run_id: str
+    algorithm_name: str
+    step_count: int
+    trace_format: Literal["full", "delta"]
+    final_result: Any
+    performance_metrics: Dict[str, Any]
+    execution_time: float
+    created_at: datetime
+
+class RunCreateRequest(AlgorithmExecuteRequest):
+    """异步运行请求：算法名与执行请求"""
+    algorithm_name: str
+
+class RunStatus(BaseModel):
+    """运行状态：排队中与执行中时包含进度，完成后包含运行概要"""
+    run_id: str
+    algorithm_name: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    submitted_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_position: Optional[int] = None  # 排在前面的运行数，只在排队中时存在
+    progress: Dict[str, int] = Field(default_factory=dict)  # 已探索的状态数、搜索队列大小
+    outcome: Optional[str] = None  # 失败原因：invalid_input、timeout、memory_exceeded、cancelled、error
+    error: Optional[str] = None
+    deduplicated: Optional[bool] = None  # 创建时复用了相同请求的运行
+    step_count: Optional[int] = None
+    trace_format: Optional[Literal["full", "delta"]] = None
+    final_result: Any = None
+    performance_metrics: Optional[Dict[str, Any]] = None
+    execution_time: Optional[float] = None
+    created_at: Optional[datetime] = None
+
+class StepWindow(BaseModel):
+    """运行中[start, stop)范围内的步骤"""
+    run_id: str
+    start: int
+    stop: int
+    total: int
+    steps: List[AlgorithmStep]
@@ -0,0 +1,135 @@
+"""
+多工作进程部署
+主进程导入应用、预加载全部算法模块并绑定监听端口，然后fork出N个工作进程，
+已导入的模块与注册表通过写时复制在工作进程之间共享；每个工作进程在启动事件中创建自己的执行池。
+工作进程异常退出时主进程重新拉起，收到SIGINT / SIGTERM时通知所有工作进程退出。
+结果缓存、保存的运行与石头分配的解缓存通过共享缓存目录（ALGO_SHARED_CACHE_DIR）中的SQLite共享。
+每个工作进程有自己的进程池，未设置ALGO_PROCESS_WORKERS时按CPU核心数平分给各工作进程，
+避免N个工作进程各自创建CPU核心数个计算进程。
+
+用法: python -m app.server --workers 4 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+# 多工作进程时默认的共享缓存目录
+DEFAULT_SHARED_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+# 工作进程在启动后这么多秒内退出视为启动失败，重新拉起前等待
+RESTART_BACKOFF = 1.0
+
+
+def process_workers_per_worker(workers: int) -> int:
+    """每个工作进程的进程池大小：CPU核心数平分给各工作进程，至少为1"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def preload():
+    """导入应用并预加载所有算法模块（必须在fork之前、且不启动任何线程）"""
+    from app.main import app
+    from app.core.registry import algorithm_registry
+    algorithm_registry.discover_algorithms()
+    algorithm_registry.preload()
+    return app
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """创建所有工作进程共享的监听socket"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    """在工作进程中运行uvicorn，使用继承的监听socket"""
+    import uvicorn
+    # 恢复默认信号处理，由uvicorn安装自己的处理函数实现优雅退出
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers: int, host: str, port: int, log_level: str = "info"):
+    """预加载后fork出workers个工作进程，并在工作进程退出时重新拉起"""
+    if not hasattr(os, "fork"):
+        # 不支持fork的平台（Windows）退回uvicorn自带的多进程模式，各工作进程分别导入应用
+        import uvicorn
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers, log_level=log_level)
+        return
+
+    app = preload()
+    sock = bind_socket(host, port)
+    children: Dict[int, float] = {}  # pid -> 启动时间
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, log_level)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on {host}:{port} with {workers} workers (pids {sorted(children)})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started < RESTART_BACKOFF:
+            time.sleep(RESTART_BACKOFF)
+        spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多工作进程启动算法可视化后端")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数，默认每个CPU核心一个")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # 设置必须在导入应用之前完成：全局缓存实例在导入时按设置创建
+        os.environ.setdefault("ALGO_SHARED_CACHE_DIR", DEFAULT_SHARED_CACHE_DIR)
+        os.environ.setdefault("ALGO_PROCESS_WORKERS", str(process_workers_per_worker(args.workers)))
+    serve(max(1, args.workers), args.host, args.port, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
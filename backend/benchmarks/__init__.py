@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+覆盖步骤记录、算法执行、搜索、序列化与执行接口，结果保存为JSON基线用于发现性能回退
+
+用法（在backend目录下）: python -m benchmarks.run [--save] [--baseline PATH]
+"""
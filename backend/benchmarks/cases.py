@@ -0,0 +1,122 @@
+"""
+基准用例
+步骤记录开销、冒泡排序执行、石头分配搜索、结果序列化，以及进程内执行接口
+"""
+import random
+from typing import Callable, List
+
+from app.algorithms.bubble_sort import BubbleSortAlgorithm
+from app.algorithms.stone_search import (
+    SEARCH_ASTAR,
+    SEARCH_BFS,
+    SEARCH_BIDIRECTIONAL,
+    solve
+)
+from app.core.executor import run_algorithm
+from app.core.result_cache import result_cache
+from app.core.serialization import MEDIA_TYPE_JSON, MEDIA_TYPE_MSGPACK, encode, msgpack
+from app.core.trace import TRACE_FORMAT_DELTA, TRACE_FORMAT_FULL
+from app.models.algorithm import AlgorithmExecuteRequest
+from benchmarks.harness import Case
+
+ADD_STEP_COUNT = 10000
+BUBBLE_SIZES = (10, 50, 200)
+# (搜索方式, k_boxes, n_stones, p_parts)；bfs的状态数随规模增长最快，只取较小的组合
+STONE_GRID = (
+    (SEARCH_BFS, 6, 30, 3),
+    (SEARCH_BFS, 9, 90, 3),
+    (SEARCH_BIDIRECTIONAL, 6, 30, 3),
+    (SEARCH_BIDIRECTIONAL, 9, 90, 3),
+    (SEARCH_BIDIRECTIONAL, 12, 120, 3),
+    (SEARCH_ASTAR, 6, 30, 3),
+    (SEARCH_ASTAR, 9, 90, 3),
+    (SEARCH_ASTAR, 12, 120, 3),
+)
+STONE_MAX_STATES = 20000
+
+
+def random_array(size: int) -> List[int]:
+    """固定种子的随机数组，保证每次运行输入相同"""
+    rng = random.Random(size)
+    return [rng.randint(1, 1000) for _ in range(size)]
+
+
+def add_step_case(trace_format: str) -> Case:
+    def setup() -> Callable[[], None]:
+        algorithm = BubbleSortAlgorithm()
+        algorithm.set_trace_format(trace_format)
+        snapshot = {"array": list(range(20)), "comparing": [3, 4], "sorted": []}
+
+        def run():
+            algorithm.reset_steps()
+            for _ in range(ADD_STEP_COUNT):
+                algorithm.add_step("compare", snapshot, [3, 4], "比较")
+        return run
+    return Case(f"add_step[{trace_format}]", setup, ops=ADD_STEP_COUNT)
+
+
+def bubble_sort_case(size: int) -> Case:
+    def setup() -> Callable[[], None]:
+        algorithm = BubbleSortAlgorithm()
+        data = {"array": random_array(size)}
+
+        def run():
+            algorithm.reset_steps()
+            algorithm.execute(data, {})
+        return run
+    return Case(f"bubble_sort.execute[n={size}]", setup)
+
+
+def stone_case(mode: str, k_boxes: int, n_stones: int, p_parts: int) -> Case:
+    def setup() -> Callable[[], None]:
+        initial = [n_stones] + [0] * (k_boxes - 1)
+        target = [n_stones // p_parts if i < p_parts else 0 for i in range(k_boxes)]
+        return lambda: solve(mode, initial, target, k_boxes, STONE_MAX_STATES)
+    return Case(f"stone.solve[{mode},k={k_boxes},n={n_stones},p={p_parts}]", setup)
+
+
+def serialize_case(media_type: str, trace_format: str) -> Case:
+    def setup() -> Callable[[], None]:
+        request = AlgorithmExecuteRequest(data={"array": random_array(100)}, trace_format=trace_format)
+        result = run_algorithm("bubble_sort", request)
+        return lambda: encode(result, media_type)
+    return Case(f"serialize[{media_type.split('/')[1]},{trace_format},bubble n=100]", setup)
+
+
+def api_case(client, name: str, algorithm: str, payload: dict, cached: bool = False) -> Case:
+    """通过进程内ASGI客户端调用执行接口；cached为False时每次调用前清空结果缓存"""
+    def setup() -> Callable[[], None]:
+        url = f"/api/algorithms/{algorithm}/execute"
+
+        def run():
+            if not cached:
+                result_cache.clear()
+            response = client.post(url, json=payload)
+            response.raise_for_status()
+        return run
+    return Case(name, setup)
+
+
+def local_cases() -> List[Case]:
+    """不经过HTTP的用例"""
+    cases = [add_step_case(TRACE_FORMAT_FULL), add_step_case(TRACE_FORMAT_DELTA)]
+    cases += [bubble_sort_case(size) for size in BUBBLE_SIZES]
+    cases += [stone_case(*params) for params in STONE_GRID]
+    media_types = [MEDIA_TYPE_JSON] + ([MEDIA_TYPE_MSGPACK] if msgpack is not None else [])
+    cases += [
+        serialize_case(media_type, trace_format)
+        for media_type in media_types
+        for trace_format in (TRACE_FORMAT_FULL, TRACE_FORMAT_DELTA)
+    ]
+    return cases
+
+
+def api_cases(client) -> List[Case]:
+    """执行接口用例，client为已启动的fastapi.testclient.TestClient"""
+    bubble = {"data": {"array": random_array(50)}, "config": {}}
+    stone = {"data": {}, "config": {"k_boxes": 9, "n_stones": 90, "p_parts": 3, "use_cache": False}}
+    return [
+        api_case(client, "api.execute[bubble_sort n=50]", "bubble_sort", bubble),
+        api_case(client, "api.execute[bubble_sort n=50,cached]", "bubble_sort", bubble, cached=True),
+        api_case(client, "api.execute[stone_distribution 9/90/3,process]", "stone_distribution", stone),
+    ]
@@ -0,0 +1,142 @@
+"""
+基准测试框架
+每个用例重复执行若干轮，每轮调用number次，记录单次调用耗时的中位数、最小值与平均值；
+与JSON基线按中位数比较，超过阈值视为回退
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class Case:
+    """基准用例
+
+    setup在计时前调用一次，返回被计时的无参函数；
+    ops为每次调用包含的操作数（如记录的步骤数），用于换算单次操作耗时
+    """
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+    number: int = 1
+    ops: int = 1
+
+
+@dataclass
+class Comparison:
+    """一个用例与基线的比较结果"""
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    """运行一个用例，返回单次调用耗时（秒）的统计"""
+    func = case.setup()
+    func()  # 预热：首次调用的导入、缓存填充不计入
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(case.number):
+            func()
+        samples.append((time.perf_counter() - started) / case.number)
+    median = statistics.median(samples)
+    return {
+        "median": median,
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "per_op": median / case.ops,
+        "repeat": repeat,
+        "number": case.number,
+        "ops": case.ops,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """运行环境信息，基线只有在相同环境下比较才有意义"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """读取基线文件，不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}")
+    return baseline
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]], merge_with: Optional[Dict[str, Any]] = None):
+    """保存基线；只运行了部分用例时保留基线中其余用例的结果"""
+    merged = dict(merge_with["results"]) if merge_with else {}
+    merged.update(results)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": BASELINE_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(),
+            "results": merged,
+        }, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]) -> List[Comparison]:
+    """按中位数与基线比较，只比较两边都有的用例"""
+    return [
+        Comparison(name, baseline["results"][name]["median"], result["median"])
+        for name, result in results.items()
+        if name in baseline["results"]
+    ]
+
+
+def regressions(comparisons: List[Comparison], threshold: float) -> List[Comparison]:
+    """耗时超过基线(1 + threshold)倍的用例"""
+    return [item for item in comparisons if item.ratio > 1 + threshold]
+
+
+def format_seconds(seconds: float) -> str:
+    """按量级选择单位"""
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f}ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def print_report(results: Dict[str, Dict[str, Any]], comparisons: List[Comparison], threshold: float,
+                 out=sys.stdout):
+    """打印结果表，有基线时附带与基线的比值"""
+    by_name = {item.name: item for item in comparisons}
+    width = max((len(name) for name in results), default=10)
+    for name, result in results.items():
+        line = f"{name:<{width}}  median {format_seconds(result['median']):>9}  min {format_seconds(result['min']):>9}"
+        if result["ops"] > 1:
+            line += f"  per op {format_seconds(result['per_op']):>9}"
+        item = by_name.get(name)
+        if item is not None:
+            flag = "  REGRESSION" if item.ratio > 1 + threshold else ""
+            line += f"  x{item.ratio:.2f} vs baseline{flag}"
+        print(line, file=out)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+运行基准测试并与JSON基线比较
+
+用法（在backend目录下）:
+    python -m benchmarks.run --save            # 生成或更新基线
+    python -m benchmarks.run                   # 与基线比较，有回退时退出码为1
+    python -m benchmarks.run --filter stone    # 只运行名称包含stone的用例
+"""
+import argparse
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.cases import api_cases, local_cases
+from benchmarks.harness import (
+    compare,
+    environment,
+    load_baseline,
+    measure,
+    print_report,
+    regressions,
+    save_baseline
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="运行性能基准测试")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON基线文件路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果写入基线")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="中位数超过基线(1 + threshold)倍时视为回退")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复轮数")
+    parser.add_argument("--filter", default=None, help="只运行名称包含该字符串的用例")
+    parser.add_argument("--no-api", action="store_true", help="跳过执行接口用例")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline["environment"] != environment():
+        print(f"警告: 基线 {args.baseline} 来自不同的运行环境，比较结果仅供参考")
+
+    with TestClient(app) as client:
+        cases = local_cases() + ([] if args.no_api else api_cases(client))
+        if args.filter:
+            cases = [case for case in cases if args.filter in case.name]
+        results = {case.name: measure(case, args.repeat) for case in cases}
+
+    comparisons = compare(results, baseline) if baseline is not None else []
+    print_report(results, comparisons, args.threshold)
+
+    if args.save:
+        save_baseline(args.baseline, results, merge_with=baseline)
+        print(f"基线已保存到 {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"没有基线 {args.baseline}，使用 --save 生成")
+        return 0
+
+    regressed = regressions(comparisons, args.threshold)
+    if regressed:
+        print(f"{len(regressed)} 个用例性能回退超过 {args.threshold:.0%}: "
+              + ", ".join(item.name for item in regressed))
+        return 1
+    print(f"与基线相比没有超过 {args.threshold:.0%} 的回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+预计算石头分配问题的解缓存
+并行求解配置范围内的所有 (k_boxes, n_stones, p_parts) 组合，写入SQLite解缓存，
+服务启动时设置 ALGO_SOLUTION_CACHE_DIR 指向同一目录即可直接命中
+
+用法: python precompute_stone_solutions.py --cache-dir cache [--workers 8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from app.algorithms.stone_cache import SolutionCache
+from app.algorithms.stone_search import (
+    SEARCH_BIDIRECTIONAL,
+    SEARCH_ENGINES,
+    MAX_MAX_STATES,
+    path_to_moves,
+    solve
+)
+
+
+def parameter_grid(k_min: int, k_max: int, n_min: int, n_max: int,
+                   p_min: int, p_max: int) -> List[Tuple[int, int, int]]:
+    """与配置模式一致的合法参数组合：n能被p整除且p不大于k"""
+    grid = []
+    for k_boxes in range(k_min, k_max + 1):
+        for p_parts in range(p_min, min(p_max, k_boxes) + 1):
+            for n_stones in range(n_min, n_max + 1):
+                if n_stones % p_parts == 0:
+                    grid.append((k_boxes, n_stones, p_parts))
+    return grid
+
+
+def solve_one(k_boxes: int, n_stones: int, p_parts: int, mode: str,
+              max_states: int) -> Tuple[Tuple[int, int, int], Optional[List[int]], float]:
+    """求解一个参数组合，返回 (参数, 移动编码或None, 耗时)"""
+    initial_state = [n_stones] + [0] * (k_boxes - 1)
+    target_state = [n_stones // p_parts if i < p_parts else 0 for i in range(k_boxes)]
+    search = solve(mode, initial_state, target_state, k_boxes, max_states)
+    moves = path_to_moves(search.path, k_boxes) if search.found else None
+    return (k_boxes, n_stones, p_parts), moves, search.wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预计算石头分配问题的解缓存")
+    parser.add_argument("--cache-dir", required=True, help="SQLite解缓存目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--mode", choices=list(SEARCH_ENGINES), default=SEARCH_BIDIRECTIONAL,
+                        help="搜索方式")
+    parser.add_argument("--max-states", type=int, default=MAX_MAX_STATES, help="每个组合最多探索的状态数")
+    parser.add_argument("--k-min", type=int, default=3)
+    parser.add_argument("--k-max", type=int, default=20)
+    parser.add_argument("--n-min", type=int, default=3)
+    parser.add_argument("--n-max", type=int, default=300)
+    parser.add_argument("--p-min", type=int, default=2)
+    parser.add_argument("--p-max", type=int, default=10)
+    parser.add_argument("--force", action="store_true", help="重新计算已缓存的组合")
+    args = parser.parse_args()
+
+    cache = SolutionCache(directory=args.cache_dir)
+    grid = parameter_grid(args.k_min, args.k_max, args.n_min, args.n_max, args.p_min, args.p_max)
+    if not args.force:
+        done = set(cache.stored_keys())
+        grid = [key for key in grid if key not in done]
+
+    print(f"待计算 {len(grid)} 个参数组合，{args.workers} 个进程，缓存目录: {cache.path}")
+    started = time.perf_counter()
+    solved = unsolved = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(solve_one, k, n, p, args.mode, args.max_states) for k, n, p in grid]
+        for index, future in enumerate(as_completed(futures), 1):
+            (k_boxes, n_stones, p_parts), moves, wall_time = future.result()
+            if moves is None:
+                unsolved += 1
+                print(f"[{index}/{len(grid)}] k={k_boxes} n={n_stones} p={p_parts}: "
+                      f"在状态上限内未找到解 ({wall_time:.2f}s)")
+                continue
+            cache.put(k_boxes, n_stones, p_parts, moves)
+            solved += 1
+            if index % 100 == 0 or index == len(grid):
+                print(f"[{index}/{len(grid)}] 已缓存 {solved} 个解")
+
+    print(f"完成: 缓存 {solved} 个解，{unsolved} 个未找到解，耗时 {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
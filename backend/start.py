@@ -2,7 +2,9 @@
 """
 Algorithm Visualization Platform - 后端一键启动脚本
 克隆仓库后直接运行此脚本即可启动后端服务
+生产部署: python start.py --workers 4（多工作进程，不自动重载，工作进程之间共享缓存）
 """
+import argparse
 import sys
 import subprocess
 import os
@@ -82,8 +84,8 @@ def install_dependencies():
     print("✅ 依赖安装完成!")
     return True
 
-def start_server():
-    """启动服务器"""
+def start_server(host="0.0.0.0", port=8000, workers=None):
+    """启动服务器，workers为None时以开发模式（自动重载）运行"""
     print("🚀 正在启动FastAPI服务器...")
     
     # 确定虚拟环境中的Python路径
@@ -92,22 +94,47 @@ def start_server():
     else:  # Unix/Linux/Mac
         python_path = "venv/bin/python"
     
-    try:
-        # 启动服务器
-        subprocess.run([
+    if workers is None:
+        cmd = [
             python_path, "-m", "uvicorn", 
             "app.main:app", 
             "--reload", 
-            "--host", "0.0.0.0", 
-            "--port", "8000"
-        ])
+            "--host", host, 
+            "--port", str(port)
+        ]
+    else:
+        # 生产模式：预加载后fork多个工作进程，见app/server.py
+        cmd = [
+            python_path, "-m", "app.server",
+            "--workers", str(workers),
+            "--host", host,
+            "--port", str(port)
+        ]
+    
+    try:
+        # 启动服务器
+        subprocess.run(cmd)
     except KeyboardInterrupt:
         print("\n🛑 服务器已停止")
     except Exception as e:
         print(f"❌ 启动服务器失败: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="后端一键启动脚本")
+    parser.add_argument("--workers", type=int, help="以生产模式启动的工作进程数（不自动重载）")
+    parser.add_argument("--production", action="store_true", help="生产模式，未指定--workers时每个CPU核心一个工作进程")
+    parser.add_argument("--skip-install", action="store_true", help="复用已有的虚拟环境，不重新安装依赖")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    return parser.parse_args()
+
 def main():
     """主函数"""
+    args = parse_args()
+    workers = args.workers
+    if workers is None and args.production:
+        workers = os.cpu_count() or 1
+    
     print("=" * 60)
     print("🎯 Algorithm Visualization Platform - 后端启动")
     print("=" * 60)
@@ -125,26 +152,31 @@ def main():
         sys.exit(1)
     
     try:
-        # 1. 设置虚拟环境
-        if not setup_virtual_environment():
-            print("❌ 虚拟环境设置失败，退出")
-            sys.exit(1)
-        
-        # 2. 安装依赖
-        if not install_dependencies():
-            print("❌ 依赖安装失败，退出")
-            sys.exit(1)
+        if args.skip_install and Path("venv").exists():
+            print("⏭️  跳过依赖安装，使用已有的虚拟环境")
+        else:
+            # 1. 设置虚拟环境
+            if not setup_virtual_environment():
+                print("❌ 虚拟环境设置失败，退出")
+                sys.exit(1)
+            
+            # 2. 安装依赖
+            if not install_dependencies():
+                print("❌ 依赖安装失败，退出")
+                sys.exit(1)
         
         print("\n" + "=" * 60)
         print("🎉 设置完成! 正在启动服务器...")
-        print("🌐 服务器地址: http://localhost:8000")
-        print("📚 API文档: http://localhost:8000/docs")
-        print("⚡ 健康检查: http://localhost:8000/health")
+        print(f"🌐 服务器地址: http://localhost:{args.port}")
+        print(f"📚 API文档: http://localhost:{args.port}/docs")
+        print(f"⚡ 健康检查: http://localhost:{args.port}/health")
+        if workers is not None:
+            print(f"🧵 生产模式: {workers} 个工作进程")
         print("🛑 按 Ctrl+C 停止服务器")
         print("=" * 60 + "\n")
         
         # 3. 启动服务器
-        start_server()
+        start_server(args.host, args.port, workers)
         
     except KeyboardInterrupt:
         print("\n🛑 用户中断，退出")
@@ -1,7 +1,8 @@
 import { defineStore } from 'pinia'
-import { ref, computed } from 'vue'
-import type { AlgorithmMetadata, AlgorithmResult, AlgorithmStep } from '@/types/algorithm'
+import { ref, computed, watch } from 'vue'
+import type { AlgorithmMetadata, AlgorithmResult, AlgorithmStep, RunStatus } from '@/types/algorithm'
 import { algorithmApi } from '@/utils/api'
+import { rebuildStep } from '@/utils/trace'
 
 export const useAlgorithmStore = defineStore('algorithm', () => {
   // 状态
@@ -11,14 +12,41 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
   const currentStep = ref(0)
   const isPlaying = ref(false)
   const loading = ref(false)
+  const streaming = ref(false)  // 流式执行中，后续步骤仍在到达
   const error = ref<string | null>(null)
   const playbackSpeed = ref(300)  // 播放速度（毫秒）
   const playTimer = ref<NodeJS.Timeout | null>(null)
 
+  // 服务端保存的运行：步骤按窗口懒加载，只在本地缓存当前位置附近的步骤
+  const RUN_WINDOW = 200
+  const MAX_CACHED_STEPS = RUN_WINDOW * 10
+  const runId = ref<string | null>(null)
+  const runStepCount = ref(0)
+  const runSteps = ref(new Map<number, AlgorithmStep>())
+  const runStatus = ref<RunStatus | null>(null)  // 异步运行的状态与进度，执行中时更新
+  const pendingWindows = new Map<string, Promise<void>>()
+
   // 计算属性
   const steps = computed(() => currentResult.value?.steps || [])
-  const totalSteps = computed(() => steps.value.length)
-  const currentStepData = computed(() => steps.value[currentStep.value] || null)
+  // 只有增量轨迹需要按步重建；列式轨迹在api层已展开为steps
+  const trace = computed(() => {
+    const value = currentResult.value?.trace
+    return value && value.format === 'delta' ? value : null
+  })
+  const totalSteps = computed(() => {
+    if (runId.value) return runStepCount.value
+    return trace.value ? trace.value.step_count : steps.value.length
+  })
+  // 增量轨迹按需从最近的关键帧重建当前步骤
+  const currentStepData = computed(() => {
+    if (runId.value) {
+      return runSteps.value.get(currentStep.value) || null
+    }
+    if (trace.value) {
+      return rebuildStep(trace.value, currentStep.value)
+    }
+    return steps.value[currentStep.value] || null
+  })
   const hasNextStep = computed(() => currentStep.value < totalSteps.value - 1)
   const hasPrevStep = computed(() => currentStep.value > 0)
 
@@ -36,7 +64,55 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
     }
   }
 
+  // 加载包含index的步骤窗口，同一窗口的并发请求只发送一次
+  const ensureRunSteps = (index: number): Promise<void> => {
+    const id = runId.value
+    if (!id || index < 0 || index >= runStepCount.value || runSteps.value.has(index)) {
+      return Promise.resolve()
+    }
+    const start = Math.floor(index / RUN_WINDOW) * RUN_WINDOW
+    const key = `${id}:${start}`
+    let pending = pendingWindows.get(key)
+    if (!pending) {
+      pending = algorithmApi.getRunSteps(id, start, start + RUN_WINDOW)
+        .then((stepWindow) => {
+          if (runId.value !== id) return
+          // 只保留当前位置附近的窗口，限制前端内存
+          if (runSteps.value.size + stepWindow.steps.length > MAX_CACHED_STEPS) {
+            for (const cached of [...runSteps.value.keys()]) {
+              if (Math.abs(cached - currentStep.value) > RUN_WINDOW * 2) runSteps.value.delete(cached)
+            }
+          }
+          stepWindow.steps.forEach((step, offset) => runSteps.value.set(stepWindow.start + offset, step))
+        })
+        .catch((err) => {
+          error.value = err instanceof Error ? err.message : '加载步骤失败'
+        })
+        .finally(() => pendingWindows.delete(key))
+      pendingWindows.set(key, pending)
+    }
+    return pending
+  }
+
+  const clearRun = () => {
+    if (runId.value) {
+      // 释放服务端保存的上一次运行，失败（如已被淘汰）时忽略
+      algorithmApi.deleteRun(runId.value).catch(() => {})
+    }
+    runId.value = null
+    runStepCount.value = 0
+    runSteps.value = new Map()
+  }
+
+  // 切换步骤时加载所在窗口，接近窗口末尾时预取下一个窗口
+  watch(currentStep, (index) => {
+    if (!runId.value) return
+    ensureRunSteps(index)
+    if (index % RUN_WINDOW >= RUN_WINDOW / 2) ensureRunSteps(index + RUN_WINDOW)
+  })
+
   const selectAlgorithm = (algorithm: AlgorithmMetadata) => {
+    clearRun()
     currentAlgorithm.value = algorithm
     currentResult.value = null
     currentStep.value = 0
@@ -49,19 +125,89 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
     try {
       loading.value = true
       error.value = null
+      clearRun()
       
-      const result = await algorithmApi.executeAlgorithm(
-        currentAlgorithm.value.name,
-        { data, config }
-      )
+      // 以异步运行提交，长时间的搜索不受请求超时限制；结果保存在服务端，先只取概要和第一个步骤窗口
+      const submitted = await algorithmApi.submitRun({
+        algorithm_name: currentAlgorithm.value.name,
+        data,
+        config,
+        trace_format: 'delta',
+      })
+      runStatus.value = submitted
+      const run = await algorithmApi.watchRun(submitted.run_id, (status) => {
+        runStatus.value = status
+      })
+      if (run.status !== 'succeeded') {
+        throw new Error(run.error || `算法执行失败: ${run.status}`)
+      }
       
-      currentResult.value = result
+      runId.value = run.run_id
+      runStepCount.value = run.step_count ?? 0
+      currentResult.value = {
+        algorithm_name: run.algorithm_name,
+        steps: [],
+        final_result: run.final_result,
+        performance_metrics: run.performance_metrics ?? {},
+        execution_time: run.execution_time ?? 0,
+        created_at: run.created_at ?? '',
+      }
+      currentStep.value = 0
+      isPlaying.value = false
+      await ensureRunSteps(0)
+    } catch (err) {
+      error.value = err instanceof Error ? err.message : '算法执行失败'
+    } finally {
+      loading.value = false
+      runStatus.value = null
+    }
+  }
+
+  // 流式执行：步骤到达即可开始播放，无需等待算法结束
+  const executeAlgorithmStream = async (data: Record<string, any>, config: Record<string, any> = {}) => {
+    if (!currentAlgorithm.value) return
+
+    try {
+      loading.value = true
+      streaming.value = true
+      error.value = null
+      clearRun()
       currentStep.value = 0
       isPlaying.value = false
+
+      const result: AlgorithmResult = {
+        algorithm_name: currentAlgorithm.value.name,
+        steps: [],
+        final_result: null,
+        performance_metrics: {},
+        execution_time: 0,
+        created_at: '',
+      }
+      currentResult.value = result
+
+      await algorithmApi.executeAlgorithmStream(
+        currentAlgorithm.value.name,
+        { data, config, trace_format: 'full' },
+        (message) => {
+          if (message.type === 'step') {
+            currentResult.value?.steps.push(message.step as AlgorithmStep)
+            // 收到第一个步骤后即结束加载状态
+            loading.value = false
+          } else if (message.type === 'result' && currentResult.value) {
+            currentResult.value.final_result = message.final_result
+            currentResult.value.performance_metrics = message.performance_metrics
+            currentResult.value.execution_time = message.execution_time
+            currentResult.value.created_at = message.created_at
+          } else if (message.type === 'error') {
+            error.value = message.detail
+          }
+        }
+      )
     } catch (err) {
       error.value = err instanceof Error ? err.message : '算法执行失败'
     } finally {
       loading.value = false
+      streaming.value = false
     }
   }
 
@@ -93,9 +239,17 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
     isPlaying.value = true
     
     const playStep = () => {
-      if (hasNextStep.value && isPlaying.value) {
+      if (runId.value && hasNextStep.value && isPlaying.value && !runSteps.value.has(currentStep.value + 1)) {
+        // 下一步所在窗口尚未加载完成，加载后继续播放
+        ensureRunSteps(currentStep.value + 1).then(() => {
+          if (isPlaying.value) playTimer.value = setTimeout(playStep, playbackSpeed.value)
+        })
+      } else if (hasNextStep.value && isPlaying.value) {
         nextStep()
         playTimer.value = setTimeout(playStep, playbackSpeed.value)
+      } else if (streaming.value && isPlaying.value) {
+        // 播放追上了流式执行，等待后续步骤到达
+        playTimer.value = setTimeout(playStep, playbackSpeed.value)
       } else {
         isPlaying.value = false
         if (playTimer.value) {
@@ -133,13 +287,17 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
     currentStep,
     isPlaying,
     loading,
+    streaming,
     error,
     playbackSpeed,
     
     // 计算属性
     steps,
+    trace,
     totalSteps,
     currentStepData,
+    runId,
+    runStatus,
     hasNextStep,
     hasPrevStep,
     
@@ -147,6 +305,7 @@ export const useAlgorithmStore = defineStore('algorithm', () => {
     fetchAlgorithms,
     selectAlgorithm,
     executeAlgorithm,
+    executeAlgorithmStream,
     nextStep,
     prevStep,
     goToStep,
@@ -7,6 +7,53 @@ export interface AlgorithmStep {
   timestamp: number
 }
 
+export interface SnapshotDelta {
+  set?: Record<string, any>
+  patch?: Record<string, Array<[number, any]> | SnapshotDelta>
+  unset?: string[]
+}
+
+export interface TraceEntry {
+  step_id: number
+  action: string
+  highlight: number[]
+  description: string
+  timestamp: number
+  keyframe?: Record<string, any>
+  delta?: SnapshotDelta
+}
+
+export interface DeltaTrace {
+  format: 'delta'
+  keyframe_interval: number
+  step_count: number
+  steps: TraceEntry[]
+}
+
+// 列式轨迹：每个字段一列，数值列为base64编码的小端定长数组
+export interface PackedNumbers {
+  dtype: 'i1' | 'i2' | 'i4' | 'f8'
+  data: string
+}
+
+export type TraceColumn = { present?: string } & (
+  | ({ type: 'number' } & PackedNumbers)
+  | { type: 'boolean', data: string }
+  | { type: 'string', table: string[], codes: PackedNumbers }
+  | { type: 'table', table: TraceColumn, codes: PackedNumbers }
+  | { type: 'list', length?: number, lengths?: PackedNumbers, items: TraceColumn }
+  | { type: 'object', columns: Record<string, TraceColumn> }
+  | { type: 'json', values: any[] }
+)
+
+export interface ColumnarTrace {
+  format: 'columnar'
+  step_count: number
+  columns: Record<keyof AlgorithmStep, TraceColumn>
+}
+
+export type TraceFormat = 'full' | 'delta' | 'columnar'
+
 export interface AlgorithmMetadata {
   name: string
   display_name: string
@@ -20,6 +67,7 @@ export interface AlgorithmMetadata {
 export interface AlgorithmResult {
   algorithm_name: string
   steps: AlgorithmStep[]
+  trace?: DeltaTrace | ColumnarTrace | null
   final_result: any
   performance_metrics: Record<string, any>
   execution_time: number
@@ -34,4 +82,72 @@ export interface AlgorithmConfig {
 export interface AlgorithmExecuteRequest {
   data: Record<string, any>
   config: Record<string, any>
-}
\ No newline at end of file
+  trace_format?: TraceFormat
+  keyframe_interval?: number
+  max_steps?: number
+  sample_every?: number
+  profile?: boolean
+  timeout?: number
+}
+
+// 批量执行：执行选项对所有输入生效
+export interface BatchExecuteRequest extends Omit<AlgorithmExecuteRequest, 'data' | 'config'> {
+  items: { data?: Record<string, any>, config?: Record<string, any> }[]
+  include_steps?: boolean
+  concurrency?: number
+}
+
+// 批量执行消息（NDJSON），按完成顺序到达
+export type BatchMessage =
+  | { type: 'item', index: number, status: 200, result: Pick<AlgorithmResult, 'final_result' | 'performance_metrics' | 'execution_time'> & Partial<Pick<AlgorithmResult, 'steps' | 'trace'>> }
+  | { type: 'item', index: number, status: number, detail: string }
+  | { type: 'done', total: number, succeeded: number, failed: number, wall_time: number }
+
+// 服务端保存的运行，步骤按窗口读取
+export interface RunSummary {
+  run_id: string
+  algorithm_name: string
+  step_count: number
+  trace_format: TraceFormat
+  final_result: any
+  performance_metrics: Record<string, any>
+  execution_time: number
+  created_at: string
+}
+
+// 异步运行：提交后立即返回运行ID，通过轮询或WebSocket获取状态
+export interface RunCreateRequest extends AlgorithmExecuteRequest {
+  algorithm_name: string
+}
+
+export type RunState = 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled'
+
+// 运行状态：排队中与执行中时包含进度，成功后包含运行概要
+export interface RunStatus extends Partial<Omit<RunSummary, 'run_id' | 'algorithm_name'>> {
+  run_id: string
+  algorithm_name: string
+  status: RunState
+  submitted_at?: string | null
+  started_at?: string | null
+  finished_at?: string | null
+  queue_position?: number
+  progress: { states_explored?: number, queue_size?: number }
+  outcome?: string
+  error?: string
+  deduplicated?: boolean
+}
+
+export interface StepWindow {
+  run_id: string
+  start: number
+  stop: number
+  total: number
+  steps: AlgorithmStep[]
+}
+
+// 流式执行消息（NDJSON / WebSocket）
+export type StreamMessage =
+  | { type: 'start', algorithm_name: string, trace_format: TraceFormat, keyframe_interval: number }
+  | { type: 'step', step: AlgorithmStep | TraceEntry }
+  | ({ type: 'result' } & Omit<AlgorithmResult, 'steps' | 'trace'>)
+  | { type: 'error', detail: string }
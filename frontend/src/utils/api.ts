@@ -3,8 +3,16 @@ import type {
   AlgorithmMetadata, 
   AlgorithmResult, 
   AlgorithmConfig,
-  AlgorithmExecuteRequest 
+  AlgorithmExecuteRequest,
+  BatchExecuteRequest,
+  BatchMessage,
+  RunCreateRequest,
+  RunStatus,
+  RunSummary,
+  StepWindow,
+  StreamMessage
 } from '@/types/algorithm'
+import { decodeColumnarTrace } from '@/utils/trace'
 
 const api = axios.create({
   baseURL: '/api',
@@ -32,6 +40,46 @@ api.interceptors.response.use(
   }
 )
 
+// POST请求并逐行读取NDJSON响应，每条消息到达时回调
+const postNdjson = async <T>(url: string, body: unknown, onMessage: (message: T) => void): Promise<void> => {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`算法执行失败: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop() || ''
+    for (const line of lines) {
+      if (line.trim()) onMessage(JSON.parse(line))
+    }
+  }
+  if (buffer.trim()) onMessage(JSON.parse(buffer))
+}
+
+// 运行结束的状态
+const isFinished = (status: RunStatus) => !['queued', 'running'].includes(status.status)
+
+// 轮询运行状态直到结束
+const pollRun = async (runId: string, onStatus: (status: RunStatus) => void): Promise<RunStatus> => {
+  while (true) {
+    const status: RunStatus = await api.get(`/runs/${runId}`)
+    onStatus(status)
+    if (isFinished(status)) return status
+    await new Promise((resolve) => setTimeout(resolve, 1000))
+  }
+}
+
 export const algorithmApi = {
   // 获取算法列表
   getAlgorithms: (): Promise<{ algorithms: AlgorithmMetadata[], total: number }> => {
@@ -44,8 +92,81 @@ export const algorithmApi = {
   },
 
   // 执行算法
-  executeAlgorithm: (name: string, request: AlgorithmExecuteRequest): Promise<AlgorithmResult> => {
-    return api.post(`/algorithms/${name}/execute`, request)
+  executeAlgorithm: async (name: string, request: AlgorithmExecuteRequest): Promise<AlgorithmResult> => {
+    const result: AlgorithmResult = await api.post(`/algorithms/${name}/execute`, request)
+    // 列式轨迹在此展开为步骤列表
+    if (result.trace?.format === 'columnar') {
+      return { ...result, steps: decodeColumnarTrace(result.trace), trace: null }
+    }
+    return result
+  },
+
+  // 流式执行算法：逐行读取NDJSON，每条消息到达时回调
+  executeAlgorithmStream: (
+    name: string,
+    request: AlgorithmExecuteRequest,
+    onMessage: (message: StreamMessage) => void
+  ): Promise<void> => {
+    return postNdjson(`/api/algorithms/${name}/execute/stream`, request, onMessage)
+  },
+
+  // 批量执行：每项完成时回调，最后一条消息为汇总
+  executeAlgorithmBatch: (
+    name: string,
+    request: BatchExecuteRequest,
+    onMessage: (message: BatchMessage) => void
+  ): Promise<void> => {
+    return postNdjson(`/api/algorithms/${name}/execute/batch`, request, onMessage)
+  },
+
+  // 执行算法并在服务端保存结果，只返回概要
+  createRun: (name: string, request: AlgorithmExecuteRequest): Promise<RunSummary> => {
+    return api.post(`/algorithms/${name}/runs`, request)
+  },
+
+  // 提交异步运行，立即返回运行ID与状态
+  submitRun: (request: RunCreateRequest): Promise<RunStatus> => {
+    return api.post('/runs', request)
+  },
+
+  // 获取运行状态
+  getRun: (runId: string): Promise<RunStatus> => {
+    return api.get(`/runs/${runId}`)
+  },
+
+  // 订阅运行状态直到结束，每次状态或进度变化时回调；WebSocket不可用时退回轮询
+  watchRun: (runId: string, onStatus: (status: RunStatus) => void): Promise<RunStatus> => {
+    return new Promise((resolve, reject) => {
+      const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
+      const socket = new WebSocket(`${protocol}://${window.location.host}/api/ws/runs/${runId}`)
+      let last: RunStatus | null = null
+      let failed = false
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data)
+        if (message.type === 'error') {
+          failed = true
+          reject(new Error(message.detail))
+          return
+        }
+        last = message as RunStatus
+        onStatus(last)
+      }
+      socket.onclose = () => {
+        if (failed) return
+        if (last && isFinished(last)) resolve(last)
+        else pollRun(runId, onStatus).then(resolve, reject)
+      }
+    })
+  },
+
+  // 读取运行中[from, to)范围内的步骤
+  getRunSteps: (runId: string, from: number, to: number): Promise<StepWindow> => {
+    return api.get(`/runs/${runId}/steps`, { params: { from, to } })
+  },
+
+  // 删除服务端保存的运行
+  deleteRun: (runId: string): Promise<void> => {
+    return api.delete(`/runs/${runId}`)
   },
 
   // 获取算法元数据
@@ -0,0 +1,136 @@
+import type { AlgorithmStep, ColumnarTrace, DeltaTrace, PackedNumbers, SnapshotDelta, TraceColumn } from '@/types/algorithm'
+
+// 将增量应用到快照上，返回新的快照（不修改原快照）
+export const applyDelta = (
+  snapshot: Record<string, any>,
+  delta: SnapshotDelta
+): Record<string, any> => {
+  const result: Record<string, any> = { ...snapshot }
+
+  for (const key of delta.unset || []) {
+    delete result[key]
+  }
+
+  for (const [key, value] of Object.entries(delta.set || {})) {
+    result[key] = value
+  }
+
+  for (const [key, changes] of Object.entries(delta.patch || {})) {
+    const old = result[key]
+    if (Array.isArray(old)) {
+      const patched = [...old]
+      for (const [index, value] of changes as Array<[number, any]>) {
+        patched[index] = value
+      }
+      result[key] = patched
+    } else {
+      result[key] = applyDelta(old || {}, changes as SnapshotDelta)
+    }
+  }
+
+  return result
+}
+
+// 从增量轨迹中重建第index步的完整步骤数据
+export const rebuildStep = (trace: DeltaTrace, index: number): AlgorithmStep | null => {
+  const entries = trace.steps
+  if (index < 0 || index >= entries.length) return null
+
+  // 找到不晚于index的最近关键帧
+  let start = index
+  while (start > 0 && !entries[start].keyframe) {
+    start--
+  }
+
+  let snapshot = entries[start].keyframe || {}
+  for (let i = start + 1; i <= index; i++) {
+    snapshot = applyDelta(snapshot, entries[i].delta || {})
+  }
+
+  const { step_id, action, highlight, description, timestamp } = entries[index]
+  return { step_id, action, highlight, description, timestamp, data_snapshot: snapshot }
+}
+
+const MISSING = Symbol('missing')
+
+const decodeBase64 = (data: string): Uint8Array => {
+  const binary = atob(data)
+  const bytes = new Uint8Array(binary.length)
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i)
+  }
+  return bytes
+}
+
+const unpackNumbers = (packed: PackedNumbers): number[] => {
+  const bytes = decodeBase64(packed.data)
+  const view = new DataView(bytes.buffer)
+  const size = { i1: 1, i2: 2, i4: 4, f8: 8 }[packed.dtype]
+  const values: number[] = []
+  for (let offset = 0; offset < bytes.length; offset += size) {
+    if (packed.dtype === 'i1') values.push(view.getInt8(offset))
+    else if (packed.dtype === 'i2') values.push(view.getInt16(offset, true))
+    else if (packed.dtype === 'i4') values.push(view.getInt32(offset, true))
+    else values.push(view.getFloat64(offset, true))
+  }
+  return values
+}
+
+const unpackBits = (data: string, count: number): boolean[] => {
+  const bytes = decodeBase64(data)
+  return Array.from({ length: count }, (_, i) => (bytes[i >> 3] & (1 << (i & 7))) !== 0)
+}
+
+// 解码一列，缺少的行为MISSING
+const unpackColumn = (column: TraceColumn, count: number): any[] => {
+  const present = column.present ? unpackBits(column.present, count) : null
+  const size = present ? present.filter(Boolean).length : count
+
+  let values: any[]
+  switch (column.type) {
+    case 'number':
+      values = unpackNumbers(column)
+      break
+    case 'boolean':
+      values = unpackBits(column.data, size)
+      break
+    case 'string':
+      values = unpackNumbers(column.codes).map((code) => column.table[code])
+      break
+    case 'table': {
+      const codes = unpackNumbers(column.codes)
+      const table = unpackColumn(column.table, codes.length ? Math.max(...codes) + 1 : 0)
+      values = codes.map((code) => table[code])
+      break
+    }
+    case 'list': {
+      const lengths = column.lengths ? unpackNumbers(column.lengths) : new Array(size).fill(column.length || 0)
+      const items = unpackColumn(column.items, lengths.reduce((sum, length) => sum + length, 0))
+      let offset = 0
+      values = lengths.map((length) => items.slice(offset, (offset += length)))
+      break
+    }
+    case 'object': {
+      const fields = Object.entries(column.columns).map(([key, sub]) => [key, unpackColumn(sub, size)] as const)
+      values = Array.from({ length: size }, (_, i) => {
+        const row: Record<string, any> = {}
+        for (const [key, field] of fields) {
+          if (field[i] !== MISSING) row[key] = field[i]
+        }
+        return row
+      })
+      break
+    }
+    default:
+      values = column.values
+  }
+
+  if (!present) return values
+  let next = 0
+  return present.map((flag) => (flag ? values[next++] : MISSING))
+}
+
+// 将列式轨迹还原为完整步骤列表
+export const decodeColumnarTrace = (trace: ColumnarTrace): AlgorithmStep[] => {
+  return unpackColumn({ type: 'object', columns: trace.columns }, trace.step_count) as AlgorithmStep[]
+}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试批量执行接口
+多组输入分发到执行池，按完成顺序以NDJSON返回每项结果，最后一行为汇总
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+ARRAYS = [[5, 3, 1, 4, 2], [9, 8, 7], [1, 2, 3, 4], [1]]
+
+def post_batch(client, name, payload):
+    response = client.post(f"/api/algorithms/{name}/execute/batch", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_batch_summaries():
+    """默认只返回汇总；单项输入错误不影响其他项"""
+    with TestClient(app) as client:
+        lines = post_batch(client, "bubble_sort", {"items": [{"data": {"array": a}} for a in ARRAYS]})
+    
+    items = {line["index"]: line for line in lines[:-1]}
+    assert sorted(items) == [0, 1, 2, 3]
+    assert lines[-1]["type"] == "done"
+    assert (lines[-1]["total"], lines[-1]["succeeded"], lines[-1]["failed"]) == (4, 3, 1)
+    
+    for index, array in enumerate(ARRAYS[:3]):
+        result = items[index]["result"]
+        assert items[index]["status"] == 200
+        assert result["final_result"]["sorted_array"] == sorted(array)
+        assert result["performance_metrics"]["step_count"] > 0
+        assert "steps" not in result and "trace" not in result
+    assert items[3]["status"] == 400
+
+def test_batch_with_steps():
+    """include_steps时返回与单次执行相同的步骤；执行选项对所有项生效"""
+    with TestClient(app) as client:
+        single = client.post("/api/algorithms/bubble_sort/execute",
+                             json={"data": {"array": ARRAYS[0]}, "trace_format": "delta"}).json()
+        lines = post_batch(client, "bubble_sort", {
+            "items": [{"data": {"array": ARRAYS[0]}}], "include_steps": True, "trace_format": "delta"
+        })
+    result = lines[0]["result"]
+    assert result["trace"]["format"] == "delta"
+    assert result["trace"]["step_count"] == single["trace"]["step_count"]
+    assert result["steps"] == single["steps"]
+
+def test_batch_columnar():
+    """columnar轨迹格式：只返回汇总时忽略轨迹格式，include_steps时返回列式轨迹"""
+    with TestClient(app) as client:
+        summaries = post_batch(client, "bubble_sort", {
+            "items": [{"data": {"array": a}} for a in ARRAYS[:2]], "trace_format": "columnar"
+        })
+        lines = post_batch(client, "bubble_sort", {
+            "items": [{"data": {"array": ARRAYS[0]}}], "include_steps": True, "trace_format": "columnar"
+        })
+    assert summaries[-1]["succeeded"] == 2
+    assert all(line["status"] == 200 for line in summaries[:-1])
+    assert lines[0]["status"] == 200
+    assert lines[0]["result"]["trace"]["format"] == "columnar"
+
+def test_batch_process_pool():
+    """进程池算法的参数扫描"""
+    items = [{"config": {"k_boxes": k, "n_stones": 12, "p_parts": 3, "use_cache": False}} for k in (3, 4, 5)]
+    with TestClient(app) as client:
+        lines = post_batch(client, "stone_distribution", {"items": items, "concurrency": 8})
+    assert lines[-1]["succeeded"] == 3
+    for line in lines[:-1]:
+        assert line["result"]["final_result"]["k_boxes"] == items[line["index"]]["config"]["k_boxes"]
+
+def test_batch_errors():
+    """未注册的算法返回404，空输入列表返回422"""
+    with TestClient(app) as client:
+        assert client.post("/api/algorithms/unknown/execute/batch",
+                           json={"items": [{}]}).status_code == 404
+        assert client.post("/api/algorithms/bubble_sort/execute/batch",
+                           json={"items": []}).status_code == 422
+
+if __name__ == "__main__":
+    test_batch_summaries()
+    test_batch_with_steps()
+    test_batch_columnar()
+    test_batch_process_pool()
+    test_batch_errors()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+测试基准测试框架
+结果可以保存为基线，再次运行时按中位数与基线比较并发现回退
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from benchmarks.cases import local_cases
+from benchmarks.harness import Case, compare, load_baseline, measure, regressions, save_baseline
+
+def test_baseline_roundtrip_and_regressions():
+    """保存的基线可以读回；慢于阈值的用例被标记为回退"""
+    case = Case("sum", lambda: (lambda: sum(range(1000))), number=10)
+    results = {"sum": measure(case, repeat=3)}
+    assert results["sum"]["median"] > 0 and results["sum"]["repeat"] == 3
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "baselines", "baseline.json")
+        assert load_baseline(path) is None
+        save_baseline(path, {"other": dict(results["sum"])})
+        save_baseline(path, results, merge_with=load_baseline(path))
+        baseline = load_baseline(path)
+    # 部分运行时保留基线中的其他用例
+    assert set(baseline["results"]) == {"sum", "other"}
+    
+    comparisons = compare(results, baseline)
+    assert [item.name for item in comparisons] == ["sum"]
+    assert regressions(comparisons, threshold=0.25) == []
+    
+    slower = {"sum": dict(results["sum"], median=results["sum"]["median"] * 2)}
+    assert [item.name for item in regressions(compare(slower, baseline), threshold=0.25)] == ["sum"]
+
+def test_cases_run():
+    """本地用例可以运行（只运行开销最小的用例）"""
+    cases = {case.name: case for case in local_cases()}
+    assert "add_step[full]" in cases and "bubble_sort.execute[n=200]" in cases
+    result = measure(cases["bubble_sort.execute[n=10]"], repeat=1)
+    assert result["ops"] == 1
+
+if __name__ == "__main__":
+    test_baseline_roundtrip_and_regressions()
+    test_cases_run()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+测试执行超时与协作式取消
+"""
+import sys
+import os
+import asyncio
+import subprocess
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.algorithms.stone_search import solve
+from app.core.cancellation import CancellationToken
+from app.core.exceptions import ExecutionCancelled, ExecutionTimeout
+from app.core.executor import AlgorithmExecutor
+from app.models.algorithm import AlgorithmExecuteRequest
+
+# 在状态上限内搜索很久的参数组合
+SLOW_CONFIG = {"k_boxes": 20, "n_stones": 300, "p_parts": 10, "search_mode": "bfs",
+               "max_states": 100000, "use_cache": False}
+
+def test_token_checks():
+    """取消与超过截止时间分别抛出对应异常"""
+    CancellationToken(deadline=time.time() + 60).check()
+    try:
+        CancellationToken(deadline=time.time() - 1).check()
+        assert False, "应当超时"
+    except ExecutionTimeout:
+        pass
+    token = CancellationToken()
+    token.cancel()
+    try:
+        solve("bfs", [300] + [0] * 19, [30] * 10 + [0] * 10, 20, 100000, cancel_token=token)
+        assert False, "应当被取消"
+    except ExecutionCancelled:
+        pass
+
+def test_request_timeout():
+    """请求的timeout生效，超时返回504"""
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        response = client.post("/api/algorithms/stone_distribution/execute",
+                               json={"data": {}, "config": SLOW_CONFIG, "timeout": 0.5})
+        elapsed = time.perf_counter() - started
+    assert response.status_code == 504
+    assert elapsed < 5, f"超时后仍执行了{elapsed:.1f}s"
+
+def test_cancel_process_execution():
+    """等待被取消时，进程池中正在执行的搜索通过共享标志停止"""
+    async def scenario():
+        executor = AlgorithmExecutor(thread_workers=1, process_workers=1, max_queue=2)
+        try:
+            # 先执行一次，排除子进程启动时间
+            await executor.run("hello_world", AlgorithmExecuteRequest(data={}))
+            quick = AlgorithmExecuteRequest(data={}, config=dict(SLOW_CONFIG, max_states=1000))
+            await executor.run("stone_distribution", quick)
+            
+            task = asyncio.create_task(executor.run(
+                "stone_distribution", AlgorithmExecuteRequest(data={}, config=SLOW_CONFIG)
+            ))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            cancelled_at = time.perf_counter()
+            while executor.stats()["process"]["pending"]:
+                assert time.perf_counter() - cancelled_at < 3, "取消后子进程仍在执行"
+                await asyncio.sleep(0.05)
+            assert task.cancelled()
+            assert len(executor._free_slots) == 3
+        finally:
+            executor.shutdown()
+    asyncio.run(scenario())
+
+MEMORY_SCRIPT = """
+import sys, multiprocessing
+sys.path.append("backend")
+from app.core.cancellation import install_shared_flags, memory_budget
+from app.core.exceptions import MemoryBudgetExceeded
+install_shared_flags(multiprocessing.Array("b", 1, lock=False))
+try:
+    with memory_budget(64 * 1024 * 1024):
+        data = bytearray(512 * 1024 * 1024)
+    print("allocated")
+except MemoryBudgetExceeded:
+    print("exceeded")
+# 预算解除后可以正常分配
+data = bytearray(128 * 1024 * 1024)
+"""
+
+def test_memory_budget():
+    """进程池子进程中超过内存预算抛出MemoryBudgetExceeded，之后恢复原限制"""
+    if not sys.platform.startswith("linux"):
+        return
+    output = subprocess.run([sys.executable, "-c", MEMORY_SCRIPT], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    assert output.strip() == "exceeded"
+
+if __name__ == "__main__":
+    test_token_checks()
+    test_request_timeout()
+    test_cancel_process_execution()
+    test_memory_budget()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+测试响应压缩与列式轨迹
+按Accept-Encoding压缩响应，流式响应逐块压缩；列式轨迹解码后与完整步骤一致
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.compression import negotiate_encoding
+from app.core.result_cache import result_cache
+from app.core.trace import decode_columnar, pack_column, unpack_column
+
+ARRAY = [50 - i for i in range(50)]
+
+def test_negotiate_encoding():
+    """按q值选择，q值相同时按服务端偏好；q=0表示拒绝"""
+    preferred = ["zstd", "br", "gzip"]
+    assert negotiate_encoding("gzip, deflate", preferred) == "gzip"
+    assert negotiate_encoding("gzip, br", preferred) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", preferred) == "gzip"
+    assert negotiate_encoding("gzip;q=0", preferred) is None
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("identity", preferred) is None
+    assert negotiate_encoding(None, preferred) is None
+
+def test_gzip_response():
+    """大响应被压缩，ETag改为弱ETag且仍能命中304；小响应与未声明编码的请求不压缩"""
+    result_cache.clear()
+    payload = {"data": {"array": ARRAY}}
+    with TestClient(app) as client:
+        response = client.post("/api/algorithms/bubble_sort/execute", json=payload,
+                               headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.num_bytes_downloaded * 5 < len(response.content)
+        assert response.json()["final_result"]["sorted_array"] == sorted(ARRAY)
+
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        cached = client.post("/api/algorithms/bubble_sort/execute", json=payload,
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+        plain = client.post("/api/algorithms/bubble_sort/execute", json=payload,
+                            headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.content == response.content
+
+        small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+def test_gzip_stream():
+    """NDJSON流式响应逐块压缩，解压后逐行完整"""
+    with TestClient(app) as client:
+        response = client.post("/api/algorithms/bubble_sort/execute/stream",
+                               json={"data": {"array": ARRAY}}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "start" and lines[-1]["type"] == "result"
+
+def test_pack_column_roundtrip():
+    """各类列：数值、布尔、字符串表、重复数组、嵌套数组、缺少的键、混合类型"""
+    values = [
+        {"array": [3, 1, 2], "flag": True, "label": "a", "grid": [[1, 2], [3]], "ratio": 0.5},
+        {"array": [3, 1, 2], "flag": False, "label": "a", "grid": [], "extra": None},
+        {"array": [1, 2, 3], "flag": True, "label": "b", "grid": [[70000]], "ratio": 1},
+        {"array": [3, 1, 2], "flag": True, "label": "a", "grid": [[-1]], "mixed": [1, "x"]},
+    ]
+    column = pack_column(values)
+    assert column["columns"]["array"]["type"] == "table"
+    assert column["columns"]["label"]["type"] == "string"
+    assert column["columns"]["ratio"]["type"] == "number" and "present" in column["columns"]["ratio"]
+    assert unpack_column(column, len(values)) == values
+
+def test_columnar_trace():
+    """列式轨迹解码后与完整步骤一致，且明显小于完整格式"""
+    result_cache.clear()
+    with TestClient(app) as client:
+        full = client.post("/api/algorithms/bubble_sort/execute", json={"data": {"array": ARRAY}})
+        columnar = client.post("/api/algorithms/bubble_sort/execute",
+                               json={"data": {"array": ARRAY}, "trace_format": "columnar"})
+        # 逐步读取的接口不支持列式轨迹
+        rejected = client.post("/api/algorithms/bubble_sort/runs",
+                               json={"data": {"array": ARRAY}, "trace_format": "columnar"})
+        rejected_stream = client.post("/api/algorithms/bubble_sort/execute/stream",
+                                      json={"data": {"array": ARRAY}, "trace_format": "columnar"})
+
+    trace = columnar.json()["trace"]
+    assert trace["format"] == "columnar"
+    assert columnar.json()["steps"] == []
+    assert len(columnar.content) * 4 < len(full.content)
+
+    decoded = decode_columnar(trace)
+    expected = full.json()["steps"]
+    assert len(decoded) == len(expected) == trace["step_count"]
+    for step in decoded + expected:
+        step.pop("timestamp")
+    assert decoded == expected
+    assert rejected.status_code == 400
+    assert rejected_stream.status_code == 400
+
+if __name__ == "__main__":
+    test_negotiate_encoding()
+    test_gzip_response()
+    test_gzip_stream()
+    test_pack_column_roundtrip()
+    test_columnar_trace()
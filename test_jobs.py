@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+测试异步运行队列
+提交后立即返回运行ID，轮询或WebSocket获取进度与结果，相同请求复用同一个运行
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.cancellation import CancellationToken
+from app.core.jobs import JobQueue
+from app.core.registry import algorithm_registry
+from app.core.shared_store import SharedStore
+from app.models.algorithm import AlgorithmExecuteRequest
+
+ARRAY = [42, 7, 19, 88, 3, 61, 25, 70, 14, 55]
+
+# 在状态上限内搜索很久的参数组合
+SLOW_CONFIG = {"k_boxes": 20, "n_stones": 300, "p_parts": 10, "search_mode": "bfs",
+               "max_states": 5000000, "use_cache": False}
+
+def wait_finished(client, run_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/api/runs/{run_id}").json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"运行{run_id}未在{timeout}s内结束")
+
+def test_submit_and_poll():
+    """提交返回202与运行ID，完成后状态包含概要，步骤窗口与同步创建的运行一致"""
+    payload = {"algorithm_name": "bubble_sort", "data": {"array": ARRAY}, "trace_format": "delta"}
+    with TestClient(app) as client:
+        response = client.post("/api/runs", json=payload)
+        assert response.status_code == 202
+        submitted = response.json()
+        assert submitted["status"] in ("queued", "running") and not submitted["deduplicated"]
+
+        status = wait_finished(client, submitted["run_id"])
+        assert status["status"] == "succeeded"
+        assert status["final_result"]["sorted_array"] == sorted(ARRAY)
+
+        # 确定性算法的相同请求复用已完成的运行
+        again = client.post("/api/runs", json=payload).json()
+        assert again["run_id"] == submitted["run_id"] and again["deduplicated"]
+
+        window = client.get(f"/api/runs/{status['run_id']}/steps", params={"from": 0, "to": 5}).json()
+        sync = client.post("/api/algorithms/bubble_sort/runs",
+                           json={"data": {"array": ARRAY}, "trace_format": "delta"}).json()
+        sync_window = client.get(f"/api/runs/{sync['run_id']}/steps", params={"from": 0, "to": 5}).json()
+        strip = lambda steps: [{k: v for k, v in step.items() if k != "timestamp"} for step in steps]
+        assert strip(window["steps"]) == strip(sync_window["steps"])
+        assert client.get(f"/api/runs/{sync['run_id']}").json()["status"] == "succeeded"
+
+        # 两次提交复用同一运行，两次删除后才真正删除
+        assert not client.delete(f"/api/runs/{status['run_id']}").json()["deleted"]
+        assert client.get(f"/api/runs/{status['run_id']}").status_code == 200
+        assert client.delete(f"/api/runs/{status['run_id']}").json()["deleted"]
+        assert client.get(f"/api/runs/{status['run_id']}").status_code == 404
+
+def test_failed_run():
+    """输入错误的运行以failed结束，不返回步骤"""
+    with TestClient(app) as client:
+        submitted = client.post("/api/runs", json={"algorithm_name": "bubble_sort",
+                                                   "data": {"array": [1, "x"]}}).json()
+        status = wait_finished(client, submitted["run_id"])
+        assert status["status"] == "failed" and status["outcome"] == "invalid_input"
+        assert client.get(f"/api/runs/{submitted['run_id']}/steps").status_code == 409
+        assert client.post("/api/runs", json={"algorithm_name": "missing", "data": {}}).status_code == 404
+
+def test_websocket_progress_and_cancel():
+    """WebSocket推送进程池中搜索报告的进度，删除运行后推送cancelled并关闭"""
+    with TestClient(app) as client:
+        submitted = client.post("/api/runs", json={
+            "algorithm_name": "stone_distribution", "data": {}, "config": SLOW_CONFIG
+        }).json()
+        run_id = submitted["run_id"]
+        with client.websocket_connect(f"/api/ws/runs/{run_id}") as websocket:
+            deadline = time.time() + 30
+            while True:
+                message = websocket.receive_json()
+                assert message["status"] in ("queued", "running"), message
+                if message["progress"].get("states_explored", 0) > 0:
+                    break
+                assert time.time() < deadline, "未收到搜索进度"
+            assert message["progress"]["queue_size"] > 0
+
+            assert client.delete(f"/api/runs/{run_id}").status_code == 200
+            while True:
+                message = websocket.receive_json()
+                if message.get("type") == "error" or message["status"] == "cancelled":
+                    break
+
+def test_queue_ttl():
+    """完成的运行超过保留时间后被删除"""
+    token = CancellationToken()
+    token.report_progress(10, 3)
+    assert token.progress == {"states_explored": 10, "queue_size": 3}
+
+    queue = JobQueue(workers=1, ttl=0.01)
+
+    async def scenario():
+        job, _ = await queue.submit("hello_world", AlgorithmExecuteRequest(data={}))
+        await queue.wait(job.job_id, 10)
+        assert (await queue.status(job.job_id))["status"] == "succeeded"
+        time.sleep(0.02)
+        assert await queue.status(job.job_id) is None
+        await queue.stop()
+
+    algorithm_registry.discover_algorithms()
+    asyncio.run(scenario())
+
+def test_shared_status():
+    """配置了共享存储时，另一个工作进程的队列可以读到运行状态，删除后读不到"""
+    async def scenario(directory):
+        store = SharedStore(directory)
+        first = JobQueue(workers=1, store=store)
+        second = JobQueue(workers=1, store=SharedStore(directory))
+        job, _ = await first.submit("hello_world", AlgorithmExecuteRequest(data={}))
+        await first.wait(job.job_id, 10)
+        await first.stop()
+        assert (await second.status(job.job_id))["status"] == "succeeded"
+        assert await second.cancel(job.job_id)
+        assert await second.status(job.job_id) is None
+
+    algorithm_registry.discover_algorithms()
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(scenario(directory))
+
+if __name__ == "__main__":
+    test_submit_and_poll()
+    test_failed_run()
+    test_websocket_progress_and_cancel()
+    test_queue_ttl()
+    test_shared_status()
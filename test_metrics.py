@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+测试指标接口
+请求、执行与缓存指标按路由模板和算法名记录，以Prometheus文本格式输出
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.metrics import (
+    Histogram,
+    algorithm_executions,
+    algorithm_steps,
+    http_requests,
+    result_cache_lookups
+)
+from app.core.result_cache import result_cache
+
+ROUTE = "/api/algorithms/{algorithm_name}/execute"
+PAYLOAD = {"data": {"array": [9, 4, 7, 1, 3, 8]}, "config": {"show_swaps": False}}
+
+def test_execute_metrics():
+    """执行接口记录请求数、执行结果、步骤数与缓存命中"""
+    result_cache.clear()
+    before_ok = algorithm_executions.value("bubble_sort", "ok")
+    before_invalid = algorithm_executions.value("bubble_sort", "invalid_input")
+    before_steps = algorithm_steps.value("bubble_sort")
+    before_requests = http_requests.value("POST", ROUTE, "bubble_sort", "200")
+    before_hits = result_cache_lookups.value("bubble_sort", "hit")
+    
+    with TestClient(app) as client:
+        first = client.post("/api/algorithms/bubble_sort/execute", json=PAYLOAD).json()
+        client.post("/api/algorithms/bubble_sort/execute", json=PAYLOAD)
+        assert client.post("/api/algorithms/bubble_sort/execute", json={"data": {"array": [1]}}).status_code == 400
+        assert client.post("/api/algorithms/no_such_algorithm/execute", json=PAYLOAD).status_code == 404
+        # 请求体校验失败（422）时同样不记录未注册的算法名
+        assert client.post("/api/algorithms/zzz_invalid_body/execute", json={}).status_code == 422
+        assert client.post("/api/algorithms/zzz_invalid_batch/execute/batch", json={}).status_code == 422
+        text = client.get("/metrics").text
+    
+    # 第二次请求命中结果缓存，不再执行
+    assert algorithm_executions.value("bubble_sort", "ok") == before_ok + 1
+    assert algorithm_executions.value("bubble_sort", "invalid_input") == before_invalid + 1
+    assert algorithm_steps.value("bubble_sort") == before_steps + first["performance_metrics"]["step_count"]
+    assert http_requests.value("POST", ROUTE, "bubble_sort", "200") == before_requests + 2
+    assert result_cache_lookups.value("bubble_sort", "hit") == before_hits + 1
+    # 未注册的算法名不作为标签值
+    assert "no_such_algorithm" not in text and "zzz_invalid" not in text
+    assert 'algorithm="unknown",status="404"' in text
+    assert 'algorithm="unknown",status="422"' in text
+    assert "# TYPE algorithm_execute_duration_seconds histogram" in text
+    assert 'executor_pending{pool="thread"} 0' in text
+
+def test_histogram_buckets():
+    """直方图的桶计数是累计的，+Inf等于总数"""
+    histogram = Histogram("latency_seconds", "test", ("algorithm",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "a")
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{algorithm="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{algorithm="a",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{algorithm="a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{algorithm="a"} 4' in lines
+    assert 'latency_seconds_sum{algorithm="a"} 6.05' in lines
+
+if __name__ == "__main__":
+    test_execute_metrics()
+    test_histogram_buckets()
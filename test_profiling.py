@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+测试执行剖析
+默认只报告墙钟与CPU时间；开启剖析后报告峰值内存、记录步骤耗时与轨迹大小
+"""
+import sys
+import os
+import threading
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.executor import run_algorithm
+from app.core.profiling import ExecutionProfiler
+from app.core.serialization import dumps_json
+from app.models.algorithm import AlgorithmExecuteRequest
+
+ARRAY = [89, 34, 67, 23, 78, 45, 12, 56, 91, 38, 72, 15, 84, 29, 63] * 3
+PROFILE_KEYS = {"memory_usage", "step_time", "logic_time", "trace_bytes"}
+
+def test_default_metrics():
+    """未开启剖析时不启动tracemalloc，只报告时间"""
+    metrics = run_algorithm("bubble_sort", AlgorithmExecuteRequest(data={"array": ARRAY})).performance_metrics
+    assert metrics["execution_time"] > 0 and metrics["cpu_time"] >= 0
+    assert not PROFILE_KEYS & set(metrics)
+    assert not tracemalloc.is_tracing()
+
+def test_profiled_metrics():
+    """开启剖析后报告各项指标，执行结束后停止tracemalloc"""
+    for trace_format in ("full", "delta"):
+        result = run_algorithm("bubble_sort", AlgorithmExecuteRequest(
+            data={"array": ARRAY}, trace_format=trace_format, profile=True
+        ))
+        metrics = result.performance_metrics
+        assert metrics["memory_usage"] > 0
+        assert 0 < metrics["step_time"] < metrics["execution_time"]
+        assert abs(metrics["step_time"] + metrics["logic_time"] - metrics["execution_time"]) < 1e-9
+        trace = result.trace if trace_format == "delta" else result.steps
+        assert metrics["trace_bytes"] == len(dumps_json(trace))
+    assert not tracemalloc.is_tracing()
+
+def test_concurrent_profilers():
+    """并发的剖析依次进行：小分配的峰值不包含另一个剖析的大分配，结束后停止追踪"""
+    peaks = {}
+    big_started = threading.Event()
+
+    def profile(name, size):
+        profiler = ExecutionProfiler()
+        with profiler:
+            if name == "big":
+                big_started.set()
+            data = bytearray(size)
+            time.sleep(0.05)
+            del data
+        peaks[name] = profiler.peak_memory
+
+    big = threading.Thread(target=profile, args=("big", 8 * 1024 * 1024))
+    big.start()
+    big_started.wait()
+    small = threading.Thread(target=profile, args=("small", 1024))
+    small.start()
+    big.join()
+    small.join()
+    assert peaks["big"] >= 8 * 1024 * 1024
+    assert peaks["small"] < 1024 * 1024
+    assert not tracemalloc.is_tracing()
+
+def test_profile_via_api():
+    """通过执行接口开启剖析"""
+    with TestClient(app) as client:
+        response = client.post("/api/algorithms/bubble_sort/execute",
+                               json={"data": {"array": ARRAY}, "profile": True})
+    assert response.status_code == 200
+    assert PROFILE_KEYS <= set(response.json()["performance_metrics"])
+
+if __name__ == "__main__":
+    test_default_metrics()
+    test_profiled_metrics()
+    test_concurrent_profilers()
+    test_profile_via_api()
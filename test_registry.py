@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试算法注册器
+元数据与配置模式在注册时缓存，读取接口不再创建算法实例；
+按清单发现算法时不导入算法模块
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.algorithms.bubble_sort import BubbleSortAlgorithm
+from app.core.registry import algorithm_registry
+
+def test_read_endpoints_do_not_instantiate():
+    """列表、配置、元数据接口返回缓存的JSON，不调用算法构造函数"""
+    created = []
+    original_init = BubbleSortAlgorithm.__init__
+    
+    def counting_init(self):
+        created.append(self)
+        original_init(self)
+    
+    with TestClient(app) as client:
+        BubbleSortAlgorithm.__init__ = counting_init
+        try:
+            listing = client.get("/api/algorithms").json()
+            config = client.get("/api/algorithms/bubble_sort/config").json()
+            metadata = client.get("/api/algorithms/bubble_sort/metadata").json()
+        finally:
+            BubbleSortAlgorithm.__init__ = original_init
+    
+    assert created == []
+    assert listing["total"] == len(listing["algorithms"])
+    assert config == {"name": "bubble_sort", "config_schema": BubbleSortAlgorithm().get_config_schema()}
+    # 装饰器声明的元数据被保留，未声明的author取自get_metadata
+    assert metadata["display_name"] == "冒泡排序"
+    assert metadata["author"] == BubbleSortAlgorithm().get_metadata().author
+    assert metadata in listing["algorithms"]
+
+def test_unknown_algorithm():
+    """未注册的算法返回404"""
+    with TestClient(app) as client:
+        assert client.get("/api/algorithms/unknown/config").status_code == 404
+        assert client.get("/api/algorithms/unknown/metadata").status_code == 404
+    assert "unknown" not in [m.name for m in algorithm_registry.list_algorithms()]
+
+# 在子进程中执行：当前进程已导入算法模块
+DISCOVER_SCRIPT = """
+import sys, json
+sys.path.append("backend")
+from app.core.registry import algorithm_registry
+algorithm_registry.discover_algorithms()
+names = [m.name for m in algorithm_registry.list_algorithms()]
+assert "bubble_sort" in names and "stone_distribution" in names
+assert b"minItems" in algorithm_registry.config_body("bubble_sort")
+loaded = sorted(m for m in sys.modules if m.startswith("app.algorithms."))
+if "--execute" in sys.argv:
+    algorithm_registry.get_algorithm_instance("bubble_sort")
+    assert "app.algorithms.bubble_sort" in sys.modules
+print(json.dumps(loaded))
+"""
+
+def discover_in_subprocess(manifest_path, *args):
+    """返回子进程完成发现后已导入的算法模块"""
+    output = subprocess.run(
+        [sys.executable, "-c", DISCOVER_SCRIPT, *args],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, "ALGO_MANIFEST_PATH": manifest_path},
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_manifest_lazy_import():
+    """清单有效时发现算法不导入算法模块，首次执行时才导入；模块变化后只重新导入该模块"""
+    with tempfile.TemporaryDirectory() as directory:
+        manifest_path = os.path.join(directory, "manifest.json")
+        
+        # 第一次启动生成清单，需要导入所有模块
+        assert "app.algorithms.bubble_sort" in discover_in_subprocess(manifest_path)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        entries = manifest["modules"]["app.algorithms.bubble_sort"]["algorithms"]
+        assert [entry["name"] for entry in entries] == ["bubble_sort"]
+        assert entries[0]["options"]["deterministic"] is True
+        assert manifest["modules"]["app.algorithms.stone_search"]["algorithms"] == []
+        
+        # 清单有效：不导入任何算法模块，执行时只导入所需模块
+        assert discover_in_subprocess(manifest_path) == []
+        assert discover_in_subprocess(manifest_path, "--execute") == []
+        
+        # 模块文件变化（此处伪造过期的时间戳）时只重新导入该模块
+        manifest["modules"]["app.algorithms.hello_world"]["stamp"] = [0, 0]
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+        assert discover_in_subprocess(manifest_path) == ["app.algorithms.hello_world"]
+        assert discover_in_subprocess(manifest_path) == []
+
+if __name__ == "__main__":
+    test_read_endpoints_do_not_instantiate()
+    test_unknown_algorithm()
+    test_manifest_lazy_import()
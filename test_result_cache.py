@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试确定性算法的结果缓存与ETag
+在进程内通过TestClient调用执行接口，无需启动服务器
+"""
+import json
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.result_cache import result_cache
+from app.core.executor import run_algorithm
+from app.core.serialization import MEDIA_TYPE_MSGPACK, msgpack
+from app.models.algorithm import AlgorithmExecuteRequest
+
+def test_execute_cache_and_etag():
+    """相同请求返回相同的响应体与ETag；If-None-Match一致时返回304"""
+    result_cache.clear()
+    payload = {"data": {"array": [5, 3, 8, 1]}, "config": {}}
+    
+    with TestClient(app) as client:
+        first = client.post("/api/algorithms/bubble_sort/execute", json=payload)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        
+        # 字段顺序不同的等价请求命中同一条缓存
+        second = client.post("/api/algorithms/bubble_sort/execute",
+                             json={"config": {}, "data": {"array": [5, 3, 8, 1]}})
+        assert second.status_code == 200
+        assert second.headers["etag"] == etag
+        assert second.content == first.content
+        assert result_cache.stats()["hits"] == 1
+        
+        not_modified = client.post("/api/algorithms/bubble_sort/execute", json=payload,
+                                   headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        
+        other = client.post("/api/algorithms/bubble_sort/execute",
+                            json={"data": {"array": [2, 1]}, "config": {}})
+        assert other.status_code == 200
+        assert other.headers["etag"] != etag
+        print(f"ETag: {etag}, 缓存统计: {result_cache.stats()}")
+
+def test_errors_are_not_cached():
+    """输入错误不进入缓存"""
+    result_cache.clear()
+    with TestClient(app) as client:
+        for _ in range(2):
+            response = client.post("/api/algorithms/bubble_sort/execute",
+                                   json={"data": {"array": [1, "x"]}, "config": {}})
+            assert response.status_code == 400
+    assert result_cache.stats()["entries"] == 0
+
+def test_fast_path_matches_pydantic():
+    """直接编码的响应与pydantic序列化的结果一致（忽略计时字段）"""
+    result_cache.clear()
+    payload = {"data": {"array": [4, 2, 9, 1, 7]}, "config": {}, "trace_format": "delta",
+               "keyframe_interval": 3}
+    
+    with TestClient(app) as client:
+        response = client.post("/api/algorithms/bubble_sort/execute", json=payload)
+    fast = response.json()
+    expected = json.loads(run_algorithm("bubble_sort", AlgorithmExecuteRequest(**payload)).json())
+    
+    for body in (fast, expected):
+        for key in ("created_at", "execution_time", "performance_metrics"):
+            body.pop(key)
+        for step in body["trace"]["steps"]:
+            step.pop("timestamp")
+    assert fast == expected
+
+def test_msgpack_negotiation():
+    """Accept为application/msgpack时返回MessagePack，未安装msgpack时退回JSON"""
+    result_cache.clear()
+    payload = {"data": {"array": [3, 1, 2]}, "config": {}}
+    with TestClient(app) as client:
+        response = client.post("/api/algorithms/bubble_sort/execute", json=payload,
+                               headers={"Accept": MEDIA_TYPE_MSGPACK})
+    assert response.status_code == 200
+    if msgpack is None:
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+    else:
+        assert response.headers["content-type"] == MEDIA_TYPE_MSGPACK
+        body = msgpack.unpackb(response.content)
+    assert body["final_result"]["sorted_array"] == [1, 2, 3]
+
+if __name__ == "__main__":
+    test_execute_cache_and_etag()
+    test_errors_are_not_cached()
+    test_fast_path_matches_pydantic()
+    test_msgpack_negotiation()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试服务端运行存储与步骤窗口接口
+在进程内通过TestClient调用，无需启动服务器
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.algorithms.hello_world import HelloWorldAlgorithm
+from app.core.run_store import RunStore
+
+ARRAY = [42, 7, 19, 88, 3, 61, 25, 70, 14, 55, 9, 33]
+
+def create_run(client, trace_format):
+    response = client.post("/api/algorithms/bubble_sort/runs", json={
+        "data": {"array": ARRAY}, "trace_format": trace_format, "keyframe_interval": 5
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def test_step_windows():
+    """full与delta格式保存的运行返回相同的步骤窗口，单步读取与窗口一致"""
+    with TestClient(app) as client:
+        full, delta = create_run(client, "full"), create_run(client, "delta")
+        assert full["step_count"] == delta["step_count"] > 20
+        assert "steps" not in full
+        
+        windows = {}
+        for run in (full, delta):
+            response = client.get(f"/api/runs/{run['run_id']}/steps", params={"from": 7, "to": 19})
+            window = response.json()
+            assert (window["start"], window["stop"], window["total"]) == (7, 19, run["step_count"])
+            single = client.get(f"/api/runs/{run['run_id']}/steps/12").json()
+            assert window["steps"][5] == single
+            windows[run["trace_format"]] = [
+                {key: value for key, value in step.items() if key != "timestamp"}
+                for step in window["steps"]
+            ]
+        assert windows["full"] == windows["delta"]
+        
+        # 越界窗口被截断，单步越界返回404
+        tail = client.get(f"/api/runs/{full['run_id']}/steps",
+                          params={"from": full["step_count"] - 2, "to": full["step_count"] + 50}).json()
+        assert len(tail["steps"]) == 2
+        assert client.get(f"/api/runs/{full['run_id']}/steps/{full['step_count']}").status_code == 404
+        assert client.get(f"/api/runs/{full['run_id']}/steps", params={"from": 5, "to": 1}).status_code == 400
+        
+        assert client.delete(f"/api/runs/{full['run_id']}").status_code == 200
+        assert client.get(f"/api/runs/{full['run_id']}").status_code == 404
+
+def test_lru_eviction():
+    """超过运行数或总步骤数上限时淘汰最久未访问的运行"""
+    algorithm = HelloWorldAlgorithm()
+    
+    def result():
+        algorithm.reset_steps()
+        return algorithm.create_result(algorithm.execute({}, {}))
+    
+    store = RunStore(max_runs=2, max_steps=1000)
+    first, second = store.add("hello_world", result()), store.add("hello_world", result())
+    store.get(first.run_id)  # first变为最近访问
+    third = store.add("hello_world", result())
+    store.get(first.run_id)
+    store.get(third.run_id)
+    assert_evicted(store, second.run_id)
+    
+    small = RunStore(max_runs=10, max_steps=first.step_count * 2)
+    runs = [small.add("hello_world", result()) for _ in range(3)]
+    assert small.stats() == {"runs": 2, "steps": first.step_count * 2}
+    assert_evicted(small, runs[0].run_id)
+
+def assert_evicted(store, run_id):
+    try:
+        store.get(run_id)
+    except ValueError:
+        return
+    assert False, f"{run_id}应已被淘汰"
+
+if __name__ == "__main__":
+    test_step_windows()
+    test_lru_eviction()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试多工作进程共享的缓存存储
+两个指向同一目录的缓存实例模拟两个工作进程，一个写入的结果与运行另一个可以读到
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app.algorithms.hello_world import HelloWorldAlgorithm
+from app.core.result_cache import ResultCache
+from app.core.run_store import RunStore
+from app.core.shared_store import RESULT_NAMESPACE, SharedStore
+
+def test_ttl_and_limits():
+    """过期条目读不到，清理后每个命名空间最多保留max_entries条最新的条目"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = SharedStore(directory, {"a": 3})
+        store.set("a", "expired", b"x", ttl=0.01)
+        store.set("a", "forever", b"y")
+        time.sleep(0.02)
+        assert store.get("a", "expired") is None
+        value, remaining = store.get_entry("a", "forever")
+        assert value == b"y" and remaining is None
+
+        for i in range(5):
+            store.set("a", f"k{i}", str(i).encode())
+            store.set("b", f"k{i}", str(i).encode())
+        store.purge()
+        assert store.count("a") == 3 and store.count("b") == 5
+        assert store.get("a", "k4") == b"4" and store.get("a", "k0") is None
+
+        assert store.delete("b", "k0") and not store.delete("b", "k0")
+        store.clear("b")
+        assert store.count("b") == 0
+
+def test_result_cache_shared():
+    """一个实例写入的响应体在另一个实例的内存缓存未命中时从共享存储读出"""
+    with tempfile.TemporaryDirectory() as directory:
+        first = ResultCache(ttl=60, store=SharedStore(directory))
+        second = ResultCache(ttl=60, store=SharedStore(directory))
+        entry = first.put("key", b'{"ok":true}')
+        shared = second.get("key")
+        assert shared is not None
+        assert (shared.etag, shared.body) == (entry.etag, entry.body)
+        assert second.stats()["hits"] == 1
+
+        # 异步版本在线程中读取共享存储
+        third = ResultCache(ttl=60, store=SharedStore(directory))
+        loaded = asyncio.run(third.get_async("key"))
+        assert loaded is not None and loaded.etag == entry.etag
+        assert asyncio.run(third.get_async("missing")) is None
+        assert third.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+        second.clear()
+        assert first.store.count(RESULT_NAMESPACE) == 0
+
+def test_run_store_shared():
+    """一个实例保存的运行可以在另一个实例中读取步骤与删除"""
+    algorithm = HelloWorldAlgorithm()
+    result = algorithm.create_result(algorithm.execute({}, {}))
+    with tempfile.TemporaryDirectory() as directory:
+        first = RunStore(store=SharedStore(directory))
+        second = RunStore(store=SharedStore(directory))
+        run = first.add("hello_world", result)
+        loaded = second.get(run.run_id)
+        assert loaded.summary() == run.summary()
+        assert loaded.steps(0, run.step_count) == run.steps(0, run.step_count)
+
+        second.delete(run.run_id)
+        third = RunStore(store=SharedStore(directory))
+        try:
+            third.get(run.run_id)
+            assert False, "删除后不应再能读取"
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_ttl_and_limits()
+    test_result_cache_shared()
+    test_run_store_shared()
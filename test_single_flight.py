@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试进行中请求的合并
+相同的并发执行请求共享一次执行与响应体，部分客户端离开时执行继续
+"""
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from app.main import app
+from app.core.metrics import algorithm_executions, coalesced_executions
+from app.core.registry import algorithm_registry
+from app.core.result_cache import result_cache
+from app.core.single_flight import SingleFlight
+
+def test_calls_coalesced():
+    """相同键的并发调用只执行一次，异常传给所有调用方，结束后再次调用重新执行"""
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": len(calls)}
+
+        results = await asyncio.gather(*(flights.do("a", work) for _ in range(5)))
+        assert len(calls) == 1
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+        assert all(result is results[0][0] for result, _ in results)
+        assert flights.in_flight() == 0
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad")
+        outcomes = await asyncio.gather(*(flights.do("b", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+        await flights.do("a", work)
+        assert len(calls) == 2
+    asyncio.run(scenario())
+
+def test_cancel_waiters():
+    """一个调用方取消时执行继续，所有调用方都取消后执行被取消"""
+    async def scenario():
+        flights = SingleFlight()
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.1)
+            finished.append(1)
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == ("done", True)
+        assert finished == [1]
+
+        third = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        await asyncio.sleep(0.15)
+        assert finished == [1] and flights.in_flight() == 0
+    asyncio.run(scenario())
+
+def test_execute_requests_coalesced():
+    """并发的相同石头分配请求只执行一次搜索，所有响应的响应体与ETag相同"""
+    algorithm_registry.discover_algorithms()
+    result_cache.clear()
+    payload = {"data": {}, "config": {"k_boxes": 9, "n_stones": 90, "p_parts": 3,
+                                      "search_mode": "bfs", "max_states": 20000, "use_cache": False}}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/algorithms/stone_distribution/execute", json=payload) for _ in range(5)
+            ))
+
+    before_ok = algorithm_executions.value("stone_distribution", "ok")
+    before_coalesced = coalesced_executions.value("stone_distribution")
+    responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.headers["etag"] for response in responses}) == 1
+    assert len({response.content for response in responses}) == 1
+    assert algorithm_executions.value("stone_distribution", "ok") == before_ok + 1
+    assert coalesced_executions.value("stone_distribution") == before_coalesced + 4
+
+if __name__ == "__main__":
+    test_calls_coalesced()
+    test_cancel_waiters()
+    test_execute_requests_coalesced()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试步骤预算与采样
+无论输入多大，记录的非关键步骤数不超过max_steps，关键步骤始终保留
+"""
+import sys
+import os
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app.core.executor import run_algorithm
+from app.core.trace import decode_step
+from app.models.algorithm import AlgorithmExecuteRequest
+from app.algorithms.bubble_sort import BubbleSortAlgorithm
+
+random.seed(7)
+ARRAY = [random.randint(1, 500) for _ in range(120)]
+
+def run(**options):
+    return run_algorithm("bubble_sort", AlgorithmExecuteRequest(data={"array": ARRAY}, **options))
+
+def test_budget_bounds_trace():
+    """预算内只记录有限的步骤，关键步骤全部保留"""
+    unbounded = run()
+    total = unbounded.performance_metrics["steps_generated"]
+    key_count = sum(1 for step in unbounded.steps if step.action in BubbleSortAlgorithm.key_actions)
+    
+    for max_steps in (50, 300, 2000):
+        result = run(max_steps=max_steps)
+        actions = [step.action for step in result.steps]
+        non_key = [a for a in actions if a not in BubbleSortAlgorithm.key_actions]
+        assert len(non_key) <= max_steps
+        assert sum(1 for a in actions if a in BubbleSortAlgorithm.key_actions) == key_count
+        assert actions[0] == "initialize" and actions[-1] == "complete"
+        assert result.performance_metrics["steps_generated"] == total
+        assert result.performance_metrics["step_count"] == len(actions)
+        # 步骤编号保留原始序号，单调递增
+        step_ids = [step.step_id for step in result.steps]
+        assert step_ids == sorted(step_ids) and step_ids[-1] == total - 1
+        print(f"max_steps={max_steps}: 记录 {len(actions)} / {total} 步")
+
+def test_sample_every():
+    """sample_every=N时非关键步骤约每N步记录一次"""
+    full = run()
+    sampled = run(sample_every=10)
+    full_non_key = [s for s in full.steps if s.action not in BubbleSortAlgorithm.key_actions]
+    sampled_non_key = [s for s in sampled.steps if s.action not in BubbleSortAlgorithm.key_actions]
+    assert len(sampled_non_key) == (len(full_non_key) + 9) // 10
+    assert [s.step_id for s in sampled_non_key] == [s.step_id for s in full_non_key[::10]]
+
+def test_budget_with_delta_trace():
+    """预算下delta轨迹解码结果与full一致"""
+    full = run(max_steps=200, sample_every=3)
+    delta = run(max_steps=200, sample_every=3, trace_format="delta", keyframe_interval=16)
+    assert delta.trace["step_count"] == len(full.steps)
+    for index, expected in enumerate(full.steps):
+        step = decode_step(delta.trace, index)
+        assert step["data_snapshot"] == expected.data_snapshot
+        assert step["step_id"] == expected.step_id
+
+def test_dropped_snapshots_not_built():
+    """被丢弃的步骤不会调用快照函数"""
+    algorithm = BubbleSortAlgorithm()
+    algorithm.set_step_budget(max_steps=10)
+    algorithm.reset_steps()
+    built = []
+    for i in range(1000):
+        algorithm.add_step("compare", lambda i=i: built.append(i) or {"i": i})
+    assert len(built) == len(algorithm.steps) <= 10
+
+if __name__ == "__main__":
+    test_budget_bounds_trace()
+    test_sample_every()
+    test_budget_with_delta_trace()
+    test_dropped_snapshots_not_built()
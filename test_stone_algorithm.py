@@ -4,9 +4,12 @@
 """
 import sys
 import os
+import tempfile
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from app.algorithms.stone_distribution import StoneDistributionAlgorithm
+from app.algorithms.stone_search import solve
+from app.algorithms.stone_cache import SolutionCache, stone_solution_cache
 
 def test_simple_case():
     """测试简单情况：9格子，90石头，3等分"""
@@ -82,9 +85,115 @@ def test_multiple_cases():
         except Exception as e:
             print(f"失败: {e}")
 
+def test_search_modes():
+    """对比不同搜索方式在原问题上的探索状态数和耗时"""
+    print(f"\n{'='*50}")
+    print("搜索方式对比: 9格子，90石头，3等分")
+    
+    for mode in ["bfs", "bidirectional", "astar"]:
+        algorithm = StoneDistributionAlgorithm()
+        algorithm.reset_steps()
+        
+        config = {
+            "k_boxes": 9,
+            "n_stones": 90,
+            "p_parts": 3,
+            "search_mode": mode,
+            "max_states": 100000,
+            "use_cache": False
+        }
+        
+        try:
+            result = algorithm.execute({}, config)
+            stats = result["search_stats"]
+            print(f"{mode:>14}: {result['min_steps']} 步, "
+                  f"探索 {stats['states_explored']} 个状态, 耗时 {stats['wall_time']:.3f}s")
+        except Exception as e:
+            print(f"{mode:>14}: 失败: {e}")
+
+def replay_path(initial_state, path):
+    """按规则重放路径，校验每一步的移动数量与状态，返回最终状态"""
+    state = list(initial_state)
+    for action_type, from_box, to_box, amount, new_state in path:
+        expected = state[from_box] // 2 if action_type == "half" else state[from_box]
+        assert amount == expected and amount > 0, f"非法移动: {action_type} {from_box}->{to_box} {amount}"
+        state[from_box] -= amount
+        state[to_box] += amount
+        assert state == list(new_state), f"状态不一致: {state} != {new_state}"
+    return state
+
+def test_search_modes_agree():
+    """三种搜索方式在小规模参数网格上的最少步数一致，且路径都能重放到目标状态"""
+    for k in range(3, 6):
+        for p in range(2, k + 1):
+            for n in range(p, 16, p):
+                lengths = {}
+                for mode in ["bfs", "bidirectional", "astar"]:
+                    algorithm = StoneDistributionAlgorithm()
+                    algorithm.reset_steps()
+                    result = algorithm.execute({}, {
+                        "k_boxes": k, "n_stones": n, "p_parts": p, "search_mode": mode,
+                        "use_cache": False
+                    })
+                    lengths[mode] = result["min_steps"]
+                    if result["min_steps"] >= 0:
+                        assert len(result["path"]) == result["min_steps"]
+                        assert replay_path(result["initial_state"], result["path"]) == result["target_state"]
+                assert len(set(lengths.values())) == 1, f"k={k}, n={n}, p={p}: {lengths}"
+
+def test_symmetry_reduction():
+    """合并可互换格子后最少步数不变，路径能重放到目标状态，且探索的状态数不增加"""
+    for k in range(4, 7):
+        for p in range(2, k):
+            for n in range(p, 13, p):
+                initial_state = [n] + [0] * (k - 1)
+                target_state = [n // p] * p + [0] * (k - p)
+                for mode in ["bfs", "bidirectional", "astar"]:
+                    plain = solve(mode, initial_state, target_state, k, symmetry=False)
+                    reduced = solve(mode, initial_state, target_state, k, symmetry=True)
+                    assert plain.found == reduced.found, f"k={k}, n={n}, p={p}, {mode}"
+                    if reduced.found:
+                        assert len(plain.path) == len(reduced.path), f"k={k}, n={n}, p={p}, {mode}"
+                        assert replay_path(initial_state, reduced.path) == target_state
+                        if mode != "bidirectional":
+                            assert reduced.states_explored <= plain.states_explored
+
+def test_solution_cache():
+    """缓存命中时不再搜索，重建的路径与步骤和搜索结果一致；磁盘缓存可跨实例读取"""
+    stone_solution_cache.clear()
+    config = {"k_boxes": 6, "n_stones": 24, "p_parts": 3}
+    
+    results = []
+    for _ in range(2):
+        algorithm = StoneDistributionAlgorithm()
+        algorithm.reset_steps()
+        result = algorithm.execute({}, config)
+        results.append((result, [(step.action, step.data_snapshot) for step in algorithm.steps]))
+    
+    (searched, searched_steps), (cached, cached_steps) = results
+    assert not searched["search_stats"]["cached"]
+    assert cached["search_stats"]["cached"]
+    assert cached["search_stats"]["states_explored"] == 0
+    assert cached["path"] == searched["path"]
+    assert [s for s in cached_steps if s[0] == "move"] == [s for s in searched_steps if s[0] == "move"]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        moves = [3, 7, 11]
+        SolutionCache(directory=directory).put(5, 20, 2, moves)
+        reopened = SolutionCache(directory=directory)
+        assert reopened.get(5, 20, 2) == moves
+        assert reopened.get(5, 20, 4) is None
+        assert list(reopened.stored_keys()) == [(5, 20, 2)]
+
 if __name__ == "__main__":
     # 测试原问题
     result = test_simple_case()
     
     # 测试其他案例
-    test_multiple_cases()
\ No newline at end of file
+    test_multiple_cases()
+    
+    # 对比搜索方式
+    test_search_modes()
+    test_search_modes_agree()
+    test_symmetry_reduction()
+    test_solution_cache()
\ No newline at end of file
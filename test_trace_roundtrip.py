@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+测试增量轨迹格式的往返一致性
+delta轨迹逐步解码后应与full格式的步骤完全一致
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app.algorithms.bubble_sort import BubbleSortAlgorithm
+from app.algorithms.stone_distribution import StoneDistributionAlgorithm
+from app.core.trace import decode_step
+
+def run_trace(algorithm_class, data, config, trace_format, keyframe_interval=50):
+    """执行算法并返回结果"""
+    algorithm = algorithm_class()
+    algorithm.set_trace_format(trace_format, keyframe_interval)
+    algorithm.reset_steps()
+    final_result = algorithm.execute(data, config)
+    return algorithm.create_result(final_result)
+
+def assert_roundtrip(algorithm_class, data, config, keyframe_interval):
+    """对比full轨迹与delta轨迹解码后的每一步"""
+    full = run_trace(algorithm_class, data, config, "full")
+    delta = run_trace(algorithm_class, data, config, "delta", keyframe_interval)
+    
+    trace = delta.trace
+    assert len(delta.steps) == 0
+    assert trace["step_count"] == len(full.steps)
+    
+    for index, expected in enumerate(full.steps):
+        step = decode_step(trace, index)
+        assert step["data_snapshot"] == expected.data_snapshot, f"步骤{index}快照不一致"
+        assert step["action"] == expected.action
+        assert step["highlight"] == expected.highlight
+        assert step["description"] == expected.description
+        assert step["step_id"] == expected.step_id
+    
+    print(f"{algorithm_class.__name__} (keyframe_interval={keyframe_interval}): "
+          f"{len(full.steps)} 步一致")
+
+def test_bubble_sort_roundtrip():
+    """冒泡排序：数组下标修改、列表长度变化、嵌套字典与键的增删"""
+    data = {"array": [89, 34, 67, 23, 78, 45, 12, 56, 91, 38, 72, 15, 84, 29, 63]}
+    for keyframe_interval in (1, 7, 50):
+        assert_roundtrip(BubbleSortAlgorithm, data, {}, keyframe_interval)
+
+def test_stone_distribution_roundtrip():
+    """石头分配：包含搜索进度步骤与移动步骤"""
+    config = {"k_boxes": 6, "n_stones": 18, "p_parts": 3, "search_mode": "bfs",
+              "use_cache": False}
+    for keyframe_interval in (1, 3, 50):
+        assert_roundtrip(StoneDistributionAlgorithm, {}, config, keyframe_interval)
+
+if __name__ == "__main__":
+    test_bubble_sort_roundtrip()
+    test_stone_distribution_roundtrip()
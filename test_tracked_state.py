@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试可追踪状态
+未修改的字段在步骤之间共享快照，增量由修改记录生成并能还原出与完整快照一致的步骤
+"""
+import sys
+import os
+import json
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app.algorithms.bubble_sort import BubbleSortAlgorithm
+from app.core.executor import prepare_algorithm, execute_prepared
+from app.core.serialization import dumps_json
+from app.core.trace import apply_delta, decode_range
+from app.core.tracked_state import TrackedDict, TrackedList, TrackedState
+from app.models.algorithm import AlgorithmExecuteRequest
+
+def test_snapshots_shared_until_modified():
+    """快照在修改前复用同一个对象，修改后生成新对象且不影响旧快照"""
+    state = TrackedState(array=TrackedList([3, 1, 2]), counters=TrackedDict({"swaps": 0}), label="a")
+    first = state.snapshot()
+    second = state.snapshot()
+    assert first["array"] is second["array"] and first["counters"] is second["counters"]
+
+    state["array"].swap(0, 1)
+    state["counters"].incr("swaps")
+    third = state.snapshot()
+    assert third == {"array": [1, 3, 2], "counters": {"swaps": 1}, "label": "a"}
+    assert first["array"] == [3, 1, 2] and first["counters"] == {"swaps": 0}
+
+def test_delta_from_mutations():
+    """随机修改后，把每一步的增量依次应用到初始快照上与完整快照一致"""
+    rng = random.Random(7)
+    state = TrackedState(array=TrackedList(range(20)), stats=TrackedDict({"n": 0}), marker=[])
+    snapshot = state.snapshot()
+    state.mark_recorded()
+
+    for _ in range(300):
+        operation = rng.randrange(7)
+        array = state["array"]
+        if operation == 0:
+            array.swap(rng.randrange(len(array)), rng.randrange(len(array)))
+        elif operation == 1:
+            array[rng.randrange(len(array))] = rng.randrange(100)
+        elif operation == 2:
+            array.append(rng.randrange(100))
+        elif operation == 3:
+            state["stats"].incr("n")
+        elif operation == 4:
+            state["marker"] = [rng.randrange(3)]
+        elif operation == 5 and "extra" in state:
+            del state["extra"]
+        else:
+            state["extra"] = rng.randrange(3)
+
+        extra = {"note": rng.randrange(2)} if rng.random() < 0.5 else None
+        snapshot = apply_delta(snapshot, state.take_delta(extra))
+        assert snapshot == state.snapshot(extra)
+
+def run_bubble(trace_format, array):
+    algorithm = BubbleSortAlgorithm()
+    request = AlgorithmExecuteRequest(data={"array": array}, trace_format=trace_format, keyframe_interval=16)
+    prepare_algorithm(algorithm, request)
+    return execute_prepared(algorithm, request)
+
+def test_bubble_sort_tracked():
+    """冒泡排序只在交换时复制数组；增量轨迹解码后与完整轨迹一致"""
+    array = [9, 4, 7, 1, 8, 2, 6, 3, 5, 0]
+    full = run_bubble("full", array)
+    snapshots = full.steps.snapshots
+    # 比较步骤之间数组没有变化，快照共享同一个列表
+    distinct_arrays = {id(snapshot["array"]) for snapshot in snapshots}
+    assert len(distinct_arrays) <= full.final_result["swaps"] + 1
+    assert array == [9, 4, 7, 1, 8, 2, 6, 3, 5, 0]
+
+    delta = run_bubble("delta", array)
+    expected = json.loads(dumps_json(full.steps))
+    decoded = json.loads(dumps_json(decode_range(delta.trace, 0, delta.trace["step_count"])))
+    for step in expected + decoded:
+        step.pop("timestamp")
+    assert decoded == expected
+    assert expected[-1]["data_snapshot"]["array"] == sorted(array)
+    assert "comparison_result" in expected[2]["data_snapshot"]
+    assert "comparison_result" not in expected[-1]["data_snapshot"]
+
+if __name__ == "__main__":
+    test_snapshots_shared_until_modified()
+    test_delta_from_mutations()
+    test_bubble_sort_tracked()